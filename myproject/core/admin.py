@@ -1,5 +1,85 @@
 from django.contrib import admin
-from .models import Tarefa, Projeto, Categoria, PerfilUsuario
+from django.core.paginator import EmptyPage, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .models import Tarefa, Projeto, Categoria, PerfilUsuario, Trabalho, TransicaoTarefa
+
+
+def estimar_linhas(model, using='default'):
+    """Número aproximado de linhas da tabela pelas estatísticas do banco, ou None.
+
+    PostgreSQL: pg_class.reltuples (atualizado pelo ANALYZE/autovacuum).
+    SQLite: sqlite_stat1, que só existe depois de um ANALYZE.
+    """
+    conexao = connections[using]
+    tabela = model._meta.db_table
+    try:
+        with conexao.cursor() as cursor:
+            if conexao.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [tabela])
+            elif conexao.vendor == 'sqlite':
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [tabela])
+            else:
+                return None
+            linha = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not linha or linha[0] is None:
+        return None
+    # No SQLite o primeiro número de "stat" é o total de linhas
+    estimativa = int(str(linha[0]).split()[0])
+    return estimativa if estimativa >= 0 else None
+
+
+class PaginatorContagemEstimada(Paginator):
+    """Paginator do changelist que evita o COUNT(*) exato em tabelas grandes.
+
+    Sem filtros nem busca, conta no máximo `minimo` + 1 linhas; só acima
+    disso usa a estimativa do banco. Com filtros, a contagem continua exata.
+    Páginas fora do intervalo (ex.: estimativa desatualizada) vão para a
+    última página real, em vez da página de erro do admin.
+    """
+    minimo = 10000
+    estimada = False
+    
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            # COUNT sobre um LIMIT: barato mesmo numa tabela enorme
+            limitada = queryset.order_by()[:self.minimo + 1].count()
+            if limitada <= self.minimo:
+                return limitada
+            estimativa = estimar_linhas(queryset.model, queryset.db)
+            if estimativa is not None:
+                self.estimada = True
+                return max(estimativa, limitada)
+        return super().count
+    
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            return 1 if int(number) < 1 else max(self.num_pages, 1)
+    
+    def page(self, number):
+        pagina = super().page(number)
+        if self.estimada and pagina.number > 1 and not pagina.object_list:
+            # A estimativa passou do fim da tabela: conta de verdade e volta
+            # para a última página
+            self.estimada = False
+            self.count = Paginator.count.func(self)
+            self.__dict__.pop('num_pages', None)
+            pagina = super().page(number)
+        return pagina
+
+
+class ContagemEstimadaAdminMixin:
+    paginator = PaginatorContagemEstimada
+    # Não repete o COUNT(*) da tabela inteira ao lado do resultado filtrado
+    show_full_result_count = False
 
 
 @admin.register(Categoria)
@@ -8,19 +88,24 @@ class CategoriaAdmin(admin.ModelAdmin):
     search_fields = ['nome', 'descricao']
     ordering = ['nome']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(num_tarefas=Count('tarefas'))
+    
     def total_tarefas(self, obj):
-        return obj.tarefas.count()
+        return obj.num_tarefas
     total_tarefas.short_description = 'Total de Tarefas'
+    total_tarefas.admin_order_field = 'num_tarefas'
 
 
 @admin.register(Projeto)
-class ProjetoAdmin(admin.ModelAdmin):
-    list_display = ['nome', 'responsavel', 'status', 'data_inicio', 'data_fim', 'progresso']
-    list_filter = ['status', 'data_criacao', 'data_inicio']
+class ProjetoAdmin(ContagemEstimadaAdminMixin, admin.ModelAdmin):
+    list_display = ['nome', 'responsavel', 'status', 'data_inicio', 'data_fim', 'progresso', 'exclusao']
+    list_filter = ['status', 'excluindo', 'data_criacao', 'data_inicio']
+    list_select_related = ['responsavel']
     search_fields = ['nome', 'descricao']
     date_hierarchy = 'data_criacao'
-    filter_horizontal = ['membros']
-    readonly_fields = ['data_criacao', 'data_atualizacao']
+    autocomplete_fields = ['responsavel', 'membros']
+    readonly_fields = ['data_criacao', 'data_atualizacao'] + Projeto.CAMPOS_CONTADORES
     
     fieldsets = (
         ('Informações Básicas', {
@@ -32,28 +117,77 @@ class ProjetoAdmin(admin.ModelAdmin):
         ('Prazos', {
             'fields': ('data_inicio', 'data_fim')
         }),
+        ('Progresso', {
+            'fields': tuple(Projeto.CAMPOS_CONTADORES),
+            'classes': ('collapse',)
+        }),
         ('Metadados', {
             'fields': ('data_criacao', 'data_atualizacao'),
             'classes': ('collapse',)
         }),
     )
     
+    # Lido dos contadores guardados no próprio projeto (sem COUNT por linha)
     def progresso(self, obj):
         return f"{obj.progresso}%"
     progresso.short_description = 'Progresso'
+    
+    # Andamento da exclusão em partes (core/exclusao.py), gravado a cada lote
+    def exclusao(self, obj):
+        if not obj.excluindo:
+            return '-'
+        return f"{obj.exclusao_removidas} de {obj.exclusao_total} tarefa(s)"
+    exclusao.short_description = 'Exclusão'
+
+
+class ProjetoListFilter(admin.SimpleListFilter):
+    """Filtro por projeto que lista só os maiores (e o selecionado), em vez de todos."""
+    title = 'projeto'
+    parameter_name = 'projeto'
+    limite = 20
+    
+    def lookups(self, request, model_admin):
+        projetos = list(
+            Projeto.objects.order_by('-contador_tarefas', 'nome').values_list('pk', 'nome')[:self.limite]
+        )
+        if self.value() and self.value().isdigit() and int(self.value()) not in dict(projetos):
+            projetos += list(Projeto.objects.filter(pk=self.value()).values_list('pk', 'nome'))
+        return projetos
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(projeto_id=self.value())
+        return queryset
+
+
+class TransicaoTarefaInline(admin.TabularInline):
+    model = TransicaoTarefa
+    fields = ['data', 'campo', 'valor_anterior', 'valor_novo']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    
+    # Histórico só recebe inclusões, e pelo código (core/historico.py)
+    def has_add_permission(self, request, obj=None):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Tarefa)
-class TarefaAdmin(admin.ModelAdmin):
+class TarefaAdmin(ContagemEstimadaAdminMixin, admin.ModelAdmin):
     list_display = [
         'titulo', 'projeto', 'responsavel', 'status', 
         'prioridade', 'data_limite', 'atrasada_badge'
     ]
-    list_filter = ['status', 'prioridade', 'projeto', 'data_criacao']
+    list_filter = ['status', 'prioridade', ProjetoListFilter, 'data_criacao']
+    list_select_related = ['projeto', 'responsavel']
     search_fields = ['titulo', 'descricao']
     date_hierarchy = 'data_criacao'
-    filter_horizontal = ['categorias']
+    autocomplete_fields = ['projeto', 'responsavel', 'categorias']
     readonly_fields = ['data_criacao', 'data_atualizacao', 'data_conclusao']
+    inlines = [TransicaoTarefaInline]
     
     fieldsets = (
         ('Informações Básicas', {
@@ -98,3 +232,18 @@ class PerfilUsuarioAdmin(admin.ModelAdmin):
             'fields': ('bio', 'foto')
         }),
     )
+
+
+@admin.register(Trabalho)
+class TrabalhoAdmin(admin.ModelAdmin):
+    list_display = ['nome', 'status', 'prioridade', 'tentativas', 'disponivel_em', 'data_criacao', 'data_conclusao']
+    list_filter = ['status', 'nome']
+    readonly_fields = ['tentativas', 'erro', 'data_criacao', 'data_conclusao']
+    actions = ['reenfileirar']
+    
+    def reenfileirar(self, request, queryset):
+        total = queryset.exclude(status='EXECUTANDO').update(
+            status='PENDENTE', tentativas=0, erro='', disponivel_em=timezone.now(), data_conclusao=None
+        )
+        self.message_user(request, f'{total} trabalho(s) de volta à fila.')
+    reenfileirar.short_description = 'Colocar de volta na fila'
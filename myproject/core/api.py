@@ -0,0 +1,351 @@
+import io
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views import View
+
+from .busca import filtrar_prefixo
+from .exportacao import FORMATOS, importar_tarefas, ler_linhas
+from .forms import CategoriaForm, TarefaLoteForm
+from .lote import EscolhasTarefa, atualizar_tarefas, criar_tarefas, excluir_tarefas
+from .models import AcessoProjeto, Categoria, Projeto, Tarefa
+from .paginacao import paginar_por_cursor
+from .retratos import serie_projeto
+
+
+# API JSON (sessão do Django; requisições de escrita precisam do X-CSRFToken)
+
+class ErroApi(Exception):
+    def __init__(self, status, dados):
+        super().__init__(dados)
+        self.status = status
+        self.dados = dados
+
+
+def serializar_projeto(projeto):
+    return {
+        'id': projeto.pk,
+        'nome': projeto.nome,
+        'descricao': projeto.descricao,
+        'status': projeto.status,
+        'responsavel': projeto.responsavel_id,
+        'data_inicio': projeto.data_inicio,
+        'data_fim': projeto.data_fim,
+        'progresso': projeto.progresso,
+        'total_tarefas': projeto.total_tarefas,
+        'tarefas_concluidas': projeto.tarefas_concluidas,
+        'data_atualizacao': projeto.data_atualizacao,
+    }
+
+
+def serializar_tarefa(tarefa):
+    return {
+        'id': tarefa.pk,
+        'titulo': tarefa.titulo,
+        'descricao': tarefa.descricao,
+        'projeto': tarefa.projeto_id,
+        'status': tarefa.status,
+        'prioridade': tarefa.prioridade,
+        'responsavel': tarefa.responsavel_id,
+        'data_limite': tarefa.data_limite,
+        'data_conclusao': tarefa.data_conclusao,
+        'estimativa_horas': tarefa.estimativa_horas,
+        'horas_trabalhadas': tarefa.horas_trabalhadas,
+        'data_atualizacao': tarefa.data_atualizacao,
+    }
+
+
+def serializar_categoria(categoria):
+    return {
+        'id': categoria.pk,
+        'nome': categoria.nome,
+        'descricao': categoria.descricao,
+        'cor': categoria.cor,
+    }
+
+
+class ApiView(View):
+    """Base das views da API: autenticação por sessão, JSON de entrada e saída."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'erro': 'Autenticação necessária.'}, status=401)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ErroApi as erro:
+            return JsonResponse(erro.dados, status=erro.status)
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        resposta = super().http_method_not_allowed(request, *args, **kwargs)
+        return JsonResponse({'erro': 'Método não permitido.'}, status=405, headers={'Allow': resposta['Allow']})
+
+    def ler_json(self):
+        try:
+            return json.loads(self.request.body or b'{}')
+        except (ValueError, UnicodeDecodeError):
+            raise ErroApi(400, {'erro': 'JSON inválido.'})
+
+    def ler_lista(self, chave):
+        lista = self.ler_json().get(chave)
+        if not isinstance(lista, list) or not lista:
+            raise ErroApi(400, {'erro': f'Informe uma lista não vazia em "{chave}".'})
+        limite = getattr(settings, 'API_LOTE_MAXIMO', 1000)
+        if len(lista) > limite:
+            raise ErroApi(400, {'erro': f'No máximo {limite} itens por requisição.'})
+        return lista
+
+    def paginar(self, queryset, serializar):
+        """Lista paginada por cursor (?cursor=, ?limite=, ?ordem=)."""
+        try:
+            limite = min(int(self.request.GET.get('limite', 50)), 200)
+        except ValueError:
+            limite = 50
+        queryset = queryset.ordenar(self.request.GET.get('ordem'))
+        pagina = paginar_por_cursor(queryset, max(limite, 1), self.request.GET.get('cursor'))
+        if pagina is None:
+            # Ordenação sem suporte a cursor: apenas a primeira página
+            return JsonResponse({'resultados': [serializar(obj) for obj in queryset[:limite]]})
+        return JsonResponse({
+            'resultados': [serializar(obj) for obj in pagina.objetos],
+            'proximo': pagina.proximo,
+            'anterior': pagina.anterior,
+        })
+
+
+# Projetos
+class ProjetoApiListView(ApiView):
+    def get(self, request):
+        queryset = Projeto.objects.visiveis_para(request.user)
+        status = request.GET.get('status')
+        if status:
+            queryset = queryset.filter(status=status)
+        return self.paginar(queryset, serializar_projeto)
+
+
+class ProjetoApiDetailView(ApiView):
+    def get(self, request, pk):
+        projeto = Projeto.objects.visiveis_para(request.user).filter(pk=pk).first()
+        if projeto is None:
+            raise ErroApi(404, {'erro': 'Projeto não encontrado.'})
+        return JsonResponse(serializar_projeto(projeto))
+
+
+class ProjetoApiHistoricoView(ApiView):
+    """Série diária para os gráficos de burndown e vazão (?dias=, até 365)."""
+
+    def get(self, request, pk):
+        projeto = Projeto.objects.visiveis_para(request.user).filter(pk=pk).first()
+        if projeto is None:
+            raise ErroApi(404, {'erro': 'Projeto não encontrado.'})
+        try:
+            dias = min(max(int(request.GET.get('dias', 30)), 1), 365)
+        except ValueError:
+            raise ErroApi(400, {'erro': 'Informe "dias" como um número.'})
+        return JsonResponse({'projeto': projeto.pk, 'dias': serie_projeto(projeto, dias)})
+
+
+# Tarefas
+class TarefaApiListView(ApiView):
+    def get(self, request):
+        queryset = Tarefa.objects.visiveis_para(request.user)
+        for campo in ('status', 'prioridade', 'projeto', 'responsavel'):
+            valor = request.GET.get(campo)
+            if valor:
+                queryset = queryset.filter(**{campo: valor})
+        return self.paginar(queryset, serializar_tarefa)
+
+
+class TarefaApiDetailView(ApiView):
+    def get(self, request, pk):
+        tarefa = Tarefa.objects.visiveis_para(request.user).filter(pk=pk).first()
+        if tarefa is None:
+            raise ErroApi(404, {'erro': 'Tarefa não encontrada.'})
+        return JsonResponse(serializar_tarefa(tarefa))
+
+
+class TarefaApiLoteView(ApiView):
+    """Criação (POST), alteração (PATCH) e exclusão (DELETE) de várias tarefas.
+
+    Cada requisição é tudo ou nada: se um item for inválido, nada é gravado e
+    os erros voltam indexados pela posição do item.
+    """
+    # Campos aceitos no PATCH
+    CAMPOS_ALTERAVEIS = ('status', 'prioridade', 'responsavel')
+
+    def post(self, request):
+        escolhas = EscolhasTarefa(request.user)
+        itens, erros = [], {}
+        for indice, dados in enumerate(self.ler_lista('tarefas')):
+            if not isinstance(dados, dict):
+                erros[indice] = {'__all__': ['Item inválido.']}
+                continue
+            # Mesmo padrão do TarefaCreateView: sem responsável, fica com quem criou
+            dados = {'responsavel': request.user.pk, **dados}
+            form = TarefaLoteForm(data=dados, escolhas=escolhas)
+            if form.is_valid():
+                itens.append((form.save(commit=False), form.cleaned_data['categorias']))
+            else:
+                erros[indice] = form.errors.get_json_data()
+        if erros:
+            raise ErroApi(400, {'erros': erros})
+
+        tarefas = criar_tarefas(itens)
+        return JsonResponse({'resultados': [serializar_tarefa(tarefa) for tarefa in tarefas]}, status=201)
+
+    def patch(self, request):
+        alteracoes = self.ler_lista('tarefas')
+        escolhas = EscolhasTarefa(request.user)
+        if not all(isinstance(item, dict) and isinstance(item.get('id'), int) for item in alteracoes):
+            raise ErroApi(400, {'erro': 'Cada item precisa de um "id" numérico.'})
+
+        tarefas = Tarefa.objects.visiveis_para(request.user).in_bulk(
+            [item['id'] for item in alteracoes]
+        )
+        status_validos = dict(Tarefa.STATUS_CHOICES)
+        prioridades_validas = dict(Tarefa.PRIORIDADE_CHOICES)
+
+        campos, erros, responsaveis_anteriores = set(), {}, set()
+        for indice, item in enumerate(alteracoes):
+            tarefa = tarefas.get(item['id'])
+            if tarefa is None:
+                erros[indice] = {'id': ['Tarefa não encontrada.']}
+                continue
+            desconhecidos = set(item) - {'id', *self.CAMPOS_ALTERAVEIS}
+            if desconhecidos:
+                erros[indice] = {campo: ['Campo não pode ser alterado em lote.'] for campo in desconhecidos}
+                continue
+            if 'status' in item:
+                if item['status'] not in status_validos:
+                    erros.setdefault(indice, {})['status'] = ['Status inválido.']
+                tarefa.status = item['status']
+            if 'prioridade' in item:
+                if item['prioridade'] not in prioridades_validas:
+                    erros.setdefault(indice, {})['prioridade'] = ['Prioridade inválida.']
+                tarefa.prioridade = item['prioridade']
+            if 'responsavel' in item:
+                # null (ou "") tira o responsável; inteiro é pk, texto é username
+                responsavel = None
+                if item['responsavel'] not in (None, ''):
+                    responsavel = escolhas.usuarios.get(item['responsavel'])
+                    if responsavel is None:
+                        erros.setdefault(indice, {})['responsavel'] = ['Responsável inválido.']
+                        continue
+                responsaveis_anteriores.add(tarefa.responsavel_id)
+                tarefa.responsavel = responsavel
+            campos.update(set(item) - {'id'})
+        if erros:
+            raise ErroApi(400, {'erros': erros})
+
+        lista = list(tarefas.values())
+        if campos:
+            atualizar_tarefas(lista, campos, responsaveis_anteriores)
+        return JsonResponse({'resultados': [serializar_tarefa(tarefa) for tarefa in lista]})
+
+    def delete(self, request):
+        ids = self.ler_lista('ids')
+        if not all(isinstance(pk, int) for pk in ids):
+            raise ErroApi(400, {'erro': 'Os ids devem ser numéricos.'})
+        queryset = Tarefa.objects.visiveis_para(request.user).filter(pk__in=ids)
+        encontrados = set(queryset.values_list('pk', flat=True))
+        ausentes = [pk for pk in ids if pk not in encontrados]
+        if ausentes:
+            raise ErroApi(404, {'erro': 'Tarefas não encontradas.', 'ids': ausentes})
+        return JsonResponse({'excluidas': excluir_tarefas(queryset)})
+
+
+class TarefaApiImportView(ApiView):
+    """Importa tarefas de um arquivo CSV/NDJSON (campo "arquivo" ou corpo da requisição).
+
+    Linhas inválidas são ignoradas e relatadas pelo número da linha.
+    """
+
+    def post(self, request):
+        formato = request.GET.get('formato', 'csv')
+        if formato not in FORMATOS:
+            raise ErroApi(400, {'erro': f'Formato inválido. Use um de: {", ".join(FORMATOS)}.'})
+        arquivo = request.FILES.get('arquivo') or io.BytesIO(request.body)
+        texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+        try:
+            resultado = importar_tarefas(ler_linhas(texto, formato), request.user)
+        except UnicodeDecodeError:
+            raise ErroApi(400, {'erro': 'O arquivo deve estar em UTF-8.'})
+        return JsonResponse(resultado)
+
+
+# Categorias
+class CategoriaApiListView(ApiView):
+    def get(self, request):
+        return JsonResponse({
+            'resultados': [serializar_categoria(categoria) for categoria in Categoria.objects.all()]
+        })
+
+    def post(self, request):
+        form = CategoriaForm(data=self.ler_json())
+        if not form.is_valid():
+            raise ErroApi(400, {'erros': form.errors.get_json_data()})
+        return JsonResponse(serializar_categoria(form.save()), status=201)
+
+
+# Autocomplete dos formulários (widgets AutocompleteSelect em forms.py)
+class AutocompleteApiView(ApiView):
+    """Opções por prefixo (?q=), paginadas (?pagina=), no formato {id, texto}."""
+    por_pagina = 20
+
+    def consulta(self, termo):
+        raise NotImplementedError
+
+    def get(self, request):
+        termo = request.GET.get('q', '').strip()
+        try:
+            pagina = max(int(request.GET.get('pagina', 1)), 1)
+        except ValueError:
+            pagina = 1
+        inicio = (pagina - 1) * self.por_pagina
+        # Um item a mais só para saber se há próxima página (sem COUNT)
+        objetos = list(self.consulta(termo)[inicio:inicio + self.por_pagina + 1])
+        return JsonResponse({
+            'resultados': [{'id': obj.pk, 'texto': str(obj)} for obj in objetos[:self.por_pagina]],
+            'mais': len(objetos) > self.por_pagina,
+        })
+
+
+class UsuarioApiAutocompleteView(AutocompleteApiView):
+    """Usuários com acesso aos projetos visíveis (?projeto= restringe a um projeto).
+
+    Com ?escopo=todos (membros de um projeto), a equipe (is_staff) vê qualquer
+    usuário ativo; os demais, além dos colegas de projeto, só quem tiver
+    exatamente o nome de usuário digitado, sem poder listar as contas.
+    """
+
+    def consulta(self, termo):
+        queryset = User.objects.filter(is_active=True)
+        escopo_todos = self.request.GET.get('escopo') == 'todos'
+        if not (escopo_todos and self.request.user.is_staff):
+            acessos = AcessoProjeto.objects.filter(
+                projeto_id__in=AcessoProjeto.objects.projetos_de(self.request.user)
+            )
+            projeto_id = self.request.GET.get('projeto', '')
+            if projeto_id.isdigit():
+                acessos = acessos.filter(projeto_id=projeto_id)
+            filtro = Q(pk__in=acessos.values('user_id'))
+            if escopo_todos and termo:
+                filtro |= Q(username__iexact=termo)
+            queryset = queryset.filter(filtro)
+        # Prefixo do nome de usuário, pelo índice de lower(username)
+        return filtrar_prefixo(queryset, 'username', termo).order_by('username')
+
+
+class ProjetoApiAutocompleteView(AutocompleteApiView):
+    def consulta(self, termo):
+        queryset = Projeto.objects.visiveis_para(self.request.user)
+        if termo:
+            queryset = queryset.buscar(termo)
+        return queryset.order_by('nome', 'pk')
+
+
+class CategoriaApiAutocompleteView(AutocompleteApiView):
+    def consulta(self, termo):
+        return filtrar_prefixo(Categoria.objects.all(), 'nome', termo).order_by('nome')
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+    
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from . import signals  # noqa: F401
+        from . import trabalhos  # noqa: F401
+        from .busca import instalar_indices_post_migrate
+        
+        post_migrate.connect(instalar_indices_post_migrate, sender=self)
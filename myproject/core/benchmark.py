@@ -0,0 +1,294 @@
+import asyncio
+import json
+import math
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connections
+from django.db.models import Count
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from .dashboard import invalidar_dashboard
+from .instrumentacao import MedidorConsultas
+from .models import Projeto, Tarefa
+
+
+# Benchmark das principais views (ver o comando benchmark_views).
+#
+# Cada view é requisitada pelo Client de teste, com middlewares e templates,
+# para uma amostra de usuários. Para cada uma registra-se o número de
+# consultas, o tempo gasto no banco e o tempo total, e o resultado é
+# comparado com uma linha de base gravada em JSON.
+
+METRICAS = ('consultas', 'tempo_db_ms', 'tempo_total_ms')
+
+
+def _urls_usuario(user):
+    """Views medidas para um usuário. O detalhe usa o maior projeto visível."""
+    urls = {
+        'dashboard': reverse('dashboard'),
+        'projeto_list': reverse('projeto_list'),
+        'tarefa_list': reverse('tarefa_list'),
+    }
+    projeto = Projeto.objects.visiveis_para(user).order_by('-contador_tarefas').first()
+    if projeto is not None:
+        urls['projeto_detail'] = reverse('projeto_detail', args=[projeto.pk])
+    return urls
+
+
+def medir_requisicao(cliente, url, using='default'):
+    medidor = MedidorConsultas()
+    with medidor.medir([using]):
+        inicio = time.perf_counter()
+        resposta = cliente.get(url)
+        if resposta.streaming:
+            b''.join(resposta.streaming_content)
+        tempo_total = time.perf_counter() - inicio
+    return resposta.status_code, {
+        'consultas': medidor.consultas,
+        'tempo_db_ms': medidor.tempo * 1000,
+        'tempo_total_ms': tempo_total * 1000,
+    }
+
+
+def executar_benchmark(usuarios, repeticoes=3):
+    """Mede as views para cada usuário e agrega por view.
+
+    Consultas: o máximo observado (a primeira requisição é feita com o cache
+    do dashboard vazio). Tempos: a mediana de todas as requisições.
+    """
+    amostras = {}
+    # O Client de teste usa o host "testserver"
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for user in usuarios:
+            cliente = Client()
+            cliente.force_login(user)
+            invalidar_dashboard([user.pk])
+            for nome, url in _urls_usuario(user).items():
+                for _ in range(repeticoes):
+                    status, medidas = medir_requisicao(cliente, url)
+                    if status != 200:
+                        raise RuntimeError(f'{url} respondeu {status} para {user.username}.')
+                    amostras.setdefault(nome, []).append(medidas)
+
+    resultado = {}
+    for nome, medidas in amostras.items():
+        resultado[nome] = {
+            'consultas': max(medida['consultas'] for medida in medidas),
+            'tempo_db_ms': round(statistics.median(medida['tempo_db_ms'] for medida in medidas), 2),
+            'tempo_total_ms': round(statistics.median(medida['tempo_total_ms'] for medida in medidas), 2),
+            'requisicoes': len(medidas),
+        }
+    return resultado
+
+
+def amostrar_usuarios(quantidade):
+    """Usuários com mais projetos visíveis primeiro (o pior caso das listas)."""
+    return list(
+        User.objects.filter(is_active=True)
+        .annotate(total_acessos=Count('acessos_projeto'))
+        .order_by('-total_acessos', 'pk')[:quantidade]
+    )
+
+
+def comparar(resultado, linha_base, tolerancia=0.5, folga_ms=5.0):
+    """Lista as regressões em relação à linha de base.
+
+    O número de consultas não pode aumentar. Os tempos podem variar até
+    `tolerancia` (fração) mais `folga_ms`, para absorver o ruído da máquina.
+    """
+    regressoes = []
+    for nome, medidas in resultado.items():
+        base = linha_base.get(nome)
+        if base is None:
+            continue
+        if medidas['consultas'] > base['consultas']:
+            regressoes.append(f'{nome}: {medidas["consultas"]} consultas (base: {base["consultas"]})')
+        for metrica in ('tempo_db_ms', 'tempo_total_ms'):
+            limite = base[metrica] * (1 + tolerancia) + folga_ms
+            if medidas[metrica] > limite:
+                regressoes.append(
+                    f'{nome}: {metrica} {medidas[metrica]:.1f} (base: {base[metrica]:.1f}, limite: {limite:.1f})'
+                )
+    return regressoes
+
+
+# Latência sob concorrência (ver o comando benchmark_latencia): as mesmas
+# páginas pelo handler WSGI (Client em várias threads) ou ASGI (AsyncClient
+# em tarefas asyncio), conforme settings.VIEWS_ASYNC.
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo."""
+    ordenados = sorted(valores)
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+
+def _alvos(usuarios, requisicoes):
+    """(user, nome da view, url), com `requisicoes` itens por view."""
+    por_view = {}
+    for user in usuarios:
+        for nome, url in _urls_usuario(user).items():
+            por_view.setdefault(nome, []).append((user, nome, url))
+    return [
+        alvos[indice % len(alvos)]
+        for alvos in por_view.values()
+        for indice in range(requisicoes)
+    ]
+
+
+def _resumir_latencias(amostras):
+    return {
+        nome: {
+            'p50_ms': round(percentil(tempos, 50), 2),
+            'p99_ms': round(percentil(tempos, 99), 2),
+            'requisicoes': len(tempos),
+        }
+        for nome, tempos in amostras.items()
+    }
+
+
+def medir_latencias_wsgi(usuarios, requisicoes=100, concorrencia=8):
+    alvos = _alvos(usuarios, requisicoes)
+    amostras = {}
+    local = threading.local()
+
+    def requisitar(alvo):
+        user, nome, url = alvo
+        clientes = getattr(local, 'clientes', None)
+        if clientes is None:
+            clientes = local.clientes = {}
+        if user.pk not in clientes:
+            clientes[user.pk] = Client()
+            clientes[user.pk].force_login(user)
+        inicio = time.perf_counter()
+        resposta = clientes[user.pk].get(url)
+        return nome, resposta.status_code, (time.perf_counter() - inicio) * 1000
+
+    def trabalhar(lote):
+        try:
+            return [requisitar(alvo) for alvo in lote]
+        finally:
+            # Cada thread abriu as suas próprias conexões
+            connections.close_all()
+
+    lotes = [alvos[indice::concorrencia] for indice in range(concorrencia)]
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            for resultados in executor.map(trabalhar, lotes):
+                for nome, status, tempo in resultados:
+                    if status != 200:
+                        raise RuntimeError(f'{nome} respondeu {status}.')
+                    amostras.setdefault(nome, []).append(tempo)
+    return _resumir_latencias(amostras)
+
+
+async def medir_latencias_asgi(usuarios, requisicoes=100, concorrencia=8):
+    alvos = await sync_to_async(_alvos)(usuarios, requisicoes)
+    amostras = {}
+    clientes = {}
+    for user in usuarios:
+        clientes[user.pk] = AsyncClient()
+        await clientes[user.pk].aforce_login(user)
+    limite = asyncio.Semaphore(concorrencia)
+
+    async def requisitar(alvo):
+        user, nome, url = alvo
+        async with limite:
+            inicio = time.perf_counter()
+            resposta = await clientes[user.pk].get(url)
+            tempo = (time.perf_counter() - inicio) * 1000
+        if resposta.status_code != 200:
+            raise RuntimeError(f'{nome} respondeu {resposta.status_code}.')
+        amostras.setdefault(nome, []).append(tempo)
+
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        await asyncio.gather(*(requisitar(alvo) for alvo in alvos))
+    return _resumir_latencias(amostras)
+
+
+def medir_carga_mista(usuarios, threads=8, duracao=10.0, fracao_escrita=0.2, semente=None):
+    """Vazão do banco com leituras e escritas concorrentes (comando benchmark_banco).
+
+    Cada thread, até `duracao` segundos, lê a primeira página da lista de
+    tarefas de um usuário (página + contagem) ou, com probabilidade
+    `fracao_escrita`, troca o status de uma tarefa visível a ele pelo save()
+    normal (com os sinais de contadores e cache). Erros de banco, como
+    "database is locked", são contados e não interrompem a medição.
+    """
+    tarefas_por_usuario = {
+        user.pk: list(Tarefa.objects.visiveis_para(user).values_list('pk', flat=True)[:500])
+        for user in usuarios
+    }
+    usuarios = [user for user in usuarios if tarefas_por_usuario[user.pk]]
+    if not usuarios:
+        raise RuntimeError('Nenhuma tarefa visível para os usuários da amostra.')
+    status = [codigo for codigo, _ in Tarefa.STATUS_CHOICES]
+    fim = time.perf_counter() + duracao
+
+    def trabalhar(indice):
+        sorteio = random.Random(None if semente is None else semente + indice)
+        amostras = {'leitura': [], 'escrita': []}
+        erros = 0
+        try:
+            while time.perf_counter() < fim:
+                user = sorteio.choice(usuarios)
+                operacao = 'escrita' if sorteio.random() < fracao_escrita else 'leitura'
+                inicio = time.perf_counter()
+                try:
+                    if operacao == 'escrita':
+                        tarefa = Tarefa.objects.get(pk=sorteio.choice(tarefas_por_usuario[user.pk]))
+                        tarefa.status = sorteio.choice(status)
+                        tarefa.save()
+                    else:
+                        visiveis = Tarefa.objects.visiveis_para(user)
+                        list(visiveis.select_related('projeto', 'responsavel').ordenar(None)[:15])
+                        visiveis.count()
+                except DatabaseError:
+                    erros += 1
+                    continue
+                amostras[operacao].append((time.perf_counter() - inicio) * 1000)
+        finally:
+            connections.close_all()
+        return amostras, erros
+
+    amostras = {'leitura': [], 'escrita': []}
+    erros = 0
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for parciais, erros_thread in executor.map(trabalhar, range(threads)):
+            for operacao, tempos in parciais.items():
+                amostras[operacao].extend(tempos)
+            erros += erros_thread
+    decorrido = time.perf_counter() - inicio
+
+    resultado = {
+        operacao: {
+            'ops': len(tempos),
+            'ops_s': round(len(tempos) / decorrido, 1),
+            'p50_ms': round(percentil(tempos, 50), 2) if tempos else None,
+            'p99_ms': round(percentil(tempos, 99), 2) if tempos else None,
+        }
+        for operacao, tempos in amostras.items()
+    }
+    resultado['total_ops_s'] = round(sum(len(tempos) for tempos in amostras.values()) / decorrido, 1)
+    resultado['erros'] = erros
+    return resultado
+
+
+def ler_linha_base(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)['views']
+
+
+def gravar_linha_base(caminho, resultado):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump({'views': resultado}, arquivo, indent=2, sort_keys=True)
+        arquivo.write('\n')
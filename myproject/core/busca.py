@@ -0,0 +1,164 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+
+
+# Busca textual (parâmetro ?busca=) com índice de texto completo.
+#
+# SQLite: tabela virtual FTS5 com conteúdo externo, sincronizada por
+# triggers no próprio banco (cobre save, delete e operações em lote).
+# PostgreSQL: índice GIN sobre to_tsvector(), que o próprio banco mantém.
+# Outros bancos caem no icontains original.
+
+CAMPOS_BUSCA = {
+    'core.tarefa': ('titulo', 'descricao'),
+    'core.projeto': ('nome', 'descricao'),
+}
+
+CONFIGURACAO_POSTGRES = 'portuguese'
+
+
+def _termos(texto):
+    return re.findall(r'\w+', texto or '')
+
+
+def _tabela_fts(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def _expressao_tsvector(model, conexao, qualificar=True):
+    # O índice GIN é criado sobre esta mesma expressão (sem o nome da tabela)
+    prefixo = f'{conexao.ops.quote_name(model._meta.db_table)}.' if qualificar else ''
+    partes = [
+        f"coalesce({prefixo}{conexao.ops.quote_name(campo)}, '')"
+        for campo in CAMPOS_BUSCA[model._meta.label_lower]
+    ]
+    concatenacao = " || ' ' || ".join(partes)
+    return f"to_tsvector('{CONFIGURACAO_POSTGRES}', {concatenacao})"
+
+
+def buscar(queryset, texto):
+    """Filtra o queryset pelo texto e anota a relevância em `relevancia`.
+
+    Cada palavra é buscada por prefixo (útil para buscas enquanto se digita)
+    e todas precisam aparecer. Maior relevância = resultado melhor.
+    """
+    model = queryset.model
+    termos = _termos(texto)
+    if not termos:
+        return queryset
+
+    conexao = connections[queryset.db]
+    tabela = conexao.ops.quote_name(model._meta.db_table)
+    pk = conexao.ops.quote_name(model._meta.pk.column)
+
+    if conexao.vendor == 'sqlite':
+        fts = _tabela_fts(model)
+        consulta = ' '.join(f'"{termo}"*' for termo in termos)
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [consulta])
+        ).annotate(relevancia=RawSQL(
+            # bm25() é menor para resultados melhores; o sinal é invertido
+            f'(SELECT -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND rowid = {tabela}.{pk})',
+            [consulta],
+            output_field=FloatField()
+        ))
+
+    if conexao.vendor == 'postgresql':
+        vetor = _expressao_tsvector(model, conexao)
+        consulta = ' & '.join(f'{termo}:*' for termo in termos)
+        tsquery = f"to_tsquery('{CONFIGURACAO_POSTGRES}', %s)"
+        return queryset.filter(
+            RawSQL(f'{vetor} @@ {tsquery}', [consulta], output_field=BooleanField())
+        ).annotate(relevancia=RawSQL(
+            f'ts_rank({vetor}, {tsquery})', [consulta], output_field=FloatField()
+        ))
+
+    filtro = Q()
+    for campo in CAMPOS_BUSCA[model._meta.label_lower]:
+        filtro |= Q(**{f'{campo}__icontains': texto})
+    return queryset.filter(filtro)
+
+
+def filtrar_prefixo(queryset, campo, termo):
+    """Filtra pelo prefixo de `campo` sem diferenciar maiúsculas.
+
+    A comparação é feita sobre lower(campo), que tem índice (migração
+    0012_indices_prefixo). O SQLite não usa índice de expressão num LIKE,
+    então lá o prefixo vira um intervalo: termo <= lower(campo) < sucessor.
+    """
+    if not termo:
+        return queryset
+    queryset = queryset.alias(minusculo=Lower(campo))
+    if connections[queryset.db].vendor == 'sqlite':
+        # O lower() do SQLite só converte letras ASCII
+        termo = ''.join(letra.lower() if letra.isascii() else letra for letra in termo)
+        sucessor = termo[:-1] + chr(ord(termo[-1]) + 1)
+        return queryset.filter(minusculo__gte=termo, minusculo__lt=sucessor)
+    return queryset.filter(minusculo__startswith=termo.lower())
+
+
+def instalar_indices(using='default', reconstruir=False):
+    """Cria (se necessário) os índices de busca. Chamado no post_migrate."""
+    from django.apps import apps
+
+    conexao = connections[using]
+    with conexao.cursor() as cursor:
+        tabelas_existentes = set(conexao.introspection.table_names(cursor))
+        for label, campos in CAMPOS_BUSCA.items():
+            model = apps.get_model(label)
+            tabela = model._meta.db_table
+            pk = model._meta.pk.column
+            if tabela not in tabelas_existentes:
+                continue
+
+            if conexao.vendor == 'sqlite':
+                fts = _tabela_fts(model)
+                colunas = ', '.join(campos)
+                novos = ', '.join(f'new.{campo}' for campo in campos)
+                antigos = ', '.join(f'old.{campo}' for campo in campos)
+                cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+                    [tabela]
+                )
+                existentes = {linha[0] for linha in cursor.fetchall()}
+                triggers = {
+                    f'{fts}_ai': (
+                        f'AFTER INSERT ON {tabela} BEGIN '
+                        f'INSERT INTO {fts}(rowid, {colunas}) VALUES (new.{pk}, {novos}); END'
+                    ),
+                    f'{fts}_ad': (
+                        f'AFTER DELETE ON {tabela} BEGIN '
+                        f"INSERT INTO {fts}({fts}, rowid, {colunas}) VALUES ('delete', old.{pk}, {antigos}); END"
+                    ),
+                    f'{fts}_au': (
+                        f'AFTER UPDATE OF {colunas} ON {tabela} BEGIN '
+                        f"INSERT INTO {fts}({fts}, rowid, {colunas}) VALUES ('delete', old.{pk}, {antigos}); "
+                        f'INSERT INTO {fts}(rowid, {colunas}) VALUES (new.{pk}, {novos}); END'
+                    ),
+                }
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5('
+                    f"{colunas}, content='{tabela}', content_rowid='{pk}', "
+                    f"tokenize='unicode61 remove_diacritics 2')"
+                )
+                for nome, corpo in triggers.items():
+                    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {nome} {corpo}')
+                # Triggers ausentes (tabela recriada por uma migração) = índice possivelmente defasado
+                if reconstruir or not set(triggers) <= existentes:
+                    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+            elif conexao.vendor == 'postgresql':
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {tabela}_busca_gin ON {tabela} '
+                    f'USING GIN ({_expressao_tsvector(model, conexao, qualificar=False)})'
+                )
+                if reconstruir:
+                    cursor.execute(f'REINDEX INDEX {tabela}_busca_gin')
+
+
+def instalar_indices_post_migrate(sender, using='default', **kwargs):
+    instalar_indices(using=using)
@@ -0,0 +1,60 @@
+import hashlib
+
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+
+from .dashboard import versao_usuario
+
+
+# GET condicional (ETag) para páginas que o usuário recarrega com frequência.
+#
+# Cada view informa em partes_validador() alguns valores baratos de obter
+# (ex.: maior data_atualizacao e total do conjunto visível, em uma consulta
+# agregada). Junto com o usuário, a URL com os parâmetros, a data de hoje
+# (tarefas "atrasadas") e a versão do usuário no dashboard (trocada pelos
+# sinais a cada alteração visível, inclusive exclusões e contadores), eles
+# formam o ETag. Se o navegador já tem essa versão, a resposta é um 304 sem
+# executar a view nem renderizar o template.
+#
+# Só ETag, sem Last-Modified: a maior data_atualizacao não muda quando um
+# item é excluído, então If-Modified-Since sozinho poderia dar um 304 errado.
+
+
+class RespostaCondicionalMixin:
+    def partes_validador(self):
+        return []
+
+    def calcular_etag(self):
+        request = self.request
+        partes = [
+            request.user.pk,
+            request.get_full_path(),
+            request.META.get('CSRF_COOKIE', ''),
+            timezone.now().date(),
+            versao_usuario(request.user.pk),
+            *self.partes_validador(),
+        ]
+        return quote_etag(hashlib.md5(repr(partes).encode(), usedforsecurity=False).hexdigest())
+
+    def resposta_condicional(self):
+        """Resposta 304 se o ETag do navegador ainda vale; senão None."""
+        self.etag = None
+        # Mensagens pendentes aparecem uma única vez: a página precisa ser renderizada
+        if self.request.method not in ('GET', 'HEAD') or len(get_messages(self.request)):
+            return None
+        self.etag = self.calcular_etag()
+        return get_conditional_response(self.request, etag=self.etag)
+
+    def aplicar_validador(self, response):
+        if self.etag and response.status_code == 200 and not response.has_header('ETag'):
+            response['ETag'] = self.etag
+            # Conteúdo por usuário; o navegador guarda, mas sempre revalida
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        resposta = self.resposta_condicional()
+        if resposta is not None:
+            return resposta
+        return self.aplicar_validador(super().get(request, *args, **kwargs))
@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def cache_fragmentos(request):
+    """Tempo de expiração usado nas tags {% cache %} dos templates."""
+    return {'CACHE_FRAGMENTOS_TIMEOUT': getattr(settings, 'CACHE_FRAGMENTOS_TIMEOUT', 3600)}
@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import AcessoProjeto, Projeto, Tarefa
+
+
+# Estatísticas do dashboard com cache por usuário.
+#
+# Cada usuário tem uma "versão" guardada no cache; a chave das estatísticas
+# inclui essa versão. Invalidar é só trocar a versão: as entradas antigas
+# deixam de ser lidas e expiram sozinhas.
+#
+# O que vai para o cache é sempre calculado no banco principal, e por isso o
+# dashboard não lê da réplica: a escrita de um membro troca a versão de todos
+# os outros, mas só quem escreveu fica preso ao principal, e o resultado de
+# uma réplica atrasada ficaria guardado sob a versão nova.
+
+CHAVE_VERSAO = 'dashboard:versao:{user_id}'
+CHAVE_ESTATISTICAS = 'dashboard:estatisticas:{user_id}:{versao}:{data}'
+
+
+def versao_usuario(user_id):
+    """Versão atual dos dados visíveis ao usuário (muda a cada invalidar_dashboard)."""
+    chave = CHAVE_VERSAO.format(user_id=user_id)
+    versao = cache.get(chave)
+    if versao is None:
+        versao = time.time_ns()
+        cache.set(chave, versao, None)
+    return versao
+
+
+async def aversao_usuario(user_id):
+    chave = CHAVE_VERSAO.format(user_id=user_id)
+    versao = await cache.aget(chave)
+    if versao is None:
+        versao = time.time_ns()
+        await cache.aset(chave, versao, None)
+    return versao
+
+
+def _chave_estatisticas(user_id, versao):
+    return CHAVE_ESTATISTICAS.format(
+        user_id=user_id, versao=versao, data=timezone.now().date().isoformat()
+    )
+
+
+def invalidar_dashboard(user_ids):
+    """Descarta as estatísticas em cache dos usuários informados."""
+    versao = time.time_ns()
+    cache.set_many(
+        {CHAVE_VERSAO.format(user_id=user_id): versao for user_id in user_ids if user_id},
+        None
+    )
+
+
+async def alistar(queryset):
+    """Avalia o queryset pelo ORM assíncrono."""
+    return [objeto async for objeto in queryset]
+
+
+# As consultas do dashboard são independentes entre si: a versão síncrona
+# as faz em sequência e a assíncrona (DashboardView de views_async.py) as
+# dispara juntas com asyncio.gather.
+
+def _consultas_estatisticas(user):
+    hoje = timezone.now().date()
+    projetos_visiveis = Projeto.objects.using(DEFAULT_DB_ALIAS).visiveis_para(user)
+    tarefas_visiveis = Tarefa.objects.using(DEFAULT_DB_ALIAS).visiveis_para(user)
+    # Agregações condicionais sobre as tarefas visíveis (uma única consulta)
+    agregacoes = {
+        'total_tarefas': Count('pk'),
+        'tarefas_pendentes': Count('pk', filter=Q(status='PENDENTE')),
+        'tarefas_atrasadas': Count('pk', filter=Q(
+            status__in=['PENDENTE', 'EM_ANDAMENTO'],
+            data_limite__lt=hoje
+        )),
+    }
+    projetos_recentes = projetos_visiveis.order_by('-data_criacao')[:5]
+    tarefas_urgentes = tarefas_visiveis.filter(
+        nivel_prioridade__gte=Tarefa.NIVEL_PRIORIDADE['ALTA'],
+        status__in=['PENDENTE', 'EM_ANDAMENTO']
+    ).select_related('projeto').order_by('-nivel_prioridade', 'data_limite')[:10]
+    return tarefas_visiveis, agregacoes, projetos_visiveis, projetos_recentes, tarefas_urgentes
+
+
+def calcular_estatisticas(user):
+    tarefas_visiveis, agregacoes, projetos_visiveis, projetos_recentes, tarefas_urgentes = (
+        _consultas_estatisticas(user)
+    )
+    contadores = tarefas_visiveis.aggregate(**agregacoes)
+    contadores['total_projetos'] = projetos_visiveis.count()
+    contadores['projetos_recentes'] = list(projetos_recentes)
+    contadores['tarefas_urgentes'] = list(tarefas_urgentes)
+    return contadores
+
+
+async def acalcular_estatisticas(user):
+    tarefas_visiveis, agregacoes, projetos_visiveis, projetos_recentes, tarefas_urgentes = (
+        _consultas_estatisticas(user)
+    )
+    contadores, total_projetos, recentes, urgentes = await asyncio.gather(
+        tarefas_visiveis.aaggregate(**agregacoes),
+        projetos_visiveis.acount(),
+        alistar(projetos_recentes),
+        alistar(tarefas_urgentes),
+    )
+    contadores['total_projetos'] = total_projetos
+    contadores['projetos_recentes'] = recentes
+    contadores['tarefas_urgentes'] = urgentes
+    return contadores
+
+
+def obter_estatisticas(user):
+    """Estatísticas do dashboard, lidas do cache quando possível."""
+    chave = _chave_estatisticas(user.pk, versao_usuario(user.pk))
+    estatisticas = cache.get(chave)
+    if estatisticas is None:
+        estatisticas = calcular_estatisticas(user)
+        cache.set(chave, estatisticas, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+    return estatisticas
+
+
+async def aobter_estatisticas(user):
+    """Versão assíncrona de obter_estatisticas()."""
+    chave = _chave_estatisticas(user.pk, await aversao_usuario(user.pk))
+    estatisticas = await cache.aget(chave)
+    if estatisticas is None:
+        estatisticas = await acalcular_estatisticas(user)
+        await cache.aset(chave, estatisticas, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+    return estatisticas
+
+
+def usuarios_com_acesso(projeto_ids):
+    """IDs dos responsáveis e membros dos projetos informados."""
+    projeto_ids = [pk for pk in projeto_ids if pk]
+    if not projeto_ids:
+        return set()
+    return set(
+        AcessoProjeto.objects.filter(projeto_id__in=projeto_ids).values_list('user_id', flat=True)
+    )
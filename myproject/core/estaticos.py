@@ -0,0 +1,186 @@
+import gzip
+import json
+import mimetypes
+import os
+from email.utils import formatdate
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:  # opcional: pip install brotli
+    brotli = None
+
+
+# Arquivos estáticos com impressão digital e pré-comprimidos.
+#
+# No collectstatic, ArmazenamentoComprimido grava cada arquivo com o hash do
+# conteúdo no nome (style.3f2a….css, via ManifestStaticFilesStorage) e, para
+# os tipos de texto, as variantes .gz e .br (esta só com o pacote brotli).
+# EstaticosMiddleware serve STATIC_ROOT pelo próprio processo, escolhendo a
+# variante pelo Accept-Encoding; os nomes com hash vão com cache "immutable"
+# de um ano, já que qualquer mudança no arquivo muda o nome.
+
+EXTENSOES_COMPRIMIVEIS = {'.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.html', '.xml', '.ico'}
+TAMANHO_MINIMO_COMPRESSAO = 256
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+CACHE_SEM_HASH = 'public, max-age=60'
+
+
+class ArmazenamentoComprimido(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for nome in set(self.hashed_files.values()):
+            if os.path.splitext(nome)[1].lower() in EXTENSOES_COMPRIMIVEIS:
+                self.comprimir(self.path(nome))
+
+    def comprimir(self, caminho):
+        with open(caminho, 'rb') as arquivo:
+            conteudo = arquivo.read()
+        if len(conteudo) < TAMANHO_MINIMO_COMPRESSAO:
+            return
+        # mtime=0: o mesmo arquivo gera sempre o mesmo .gz
+        variantes = {'.gz': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variantes['.br'] = brotli.compress(conteudo, quality=11)
+        for sufixo, comprimido in variantes.items():
+            # Só vale a pena se ficar menor
+            if len(comprimido) < len(conteudo):
+                with open(caminho + sufixo, 'wb') as arquivo:
+                    arquivo.write(comprimido)
+
+
+def codificacoes_aceitas(cabecalho):
+    """{codificação: q} do Accept-Encoding (q=0 recusa a codificação)."""
+    aceitas = {}
+    for item in cabecalho.split(','):
+        nome, _, parametros = item.partition(';')
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        q = 1.0
+        for parametro in parametros.split(';'):
+            chave, _, valor = parametro.partition('=')
+            if chave.strip().lower() == 'q':
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        aceitas[nome] = q
+    return aceitas
+
+
+class Arquivo:
+    """Um arquivo de STATIC_ROOT e as suas variantes comprimidas."""
+
+    def __init__(self, caminho, imutavel):
+        estado = os.stat(caminho)
+        self.caminho = caminho
+        self.tamanho = estado.st_size
+        self.modificado = int(estado.st_mtime)
+        self.tipo = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+        # Fraco: vale para todas as codificações do mesmo arquivo
+        self.etag = f'W/"{self.modificado:x}-{self.tamanho:x}"'
+        self.cache_control = CACHE_IMUTAVEL if imutavel else CACHE_SEM_HASH
+        self.variantes = [
+            (codificacao, caminho + sufixo)
+            for codificacao, sufixo in (('br', '.br'), ('gzip', '.gz'))
+            if os.path.exists(caminho + sufixo)
+        ]
+
+
+class EstaticosMiddleware:
+    """Serve STATIC_ROOT (após o collectstatic) sem um servidor web à frente.
+
+    A lista de arquivos é lida uma vez, na inicialização; depois de um novo
+    collectstatic, reinicie o processo. Sem STATIC_ROOT, não faz nada.
+    """
+    sync_capable = True
+    async_capable = True
+    # Até este tamanho o arquivo vai inteiro na resposta; acima, em streaming
+    TAMANHO_MAXIMO_MEMORIA = 1024 * 1024
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefixo = '/' + settings.STATIC_URL.lstrip('/')
+        self.arquivos = self.indexar(settings.STATIC_ROOT) if settings.STATIC_ROOT else {}
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def indexar(self, raiz):
+        raiz = str(raiz)
+        if not os.path.isdir(raiz):
+            return {}
+        try:
+            with open(os.path.join(raiz, ArmazenamentoComprimido.manifest_name)) as manifesto:
+                com_hash = set(json.load(manifesto).get('paths', {}).values())
+        except (OSError, ValueError):
+            com_hash = set()
+
+        arquivos = {}
+        for pasta, _, nomes in os.walk(raiz):
+            for nome in nomes:
+                if nome.endswith(('.gz', '.br')):
+                    continue
+                caminho = os.path.join(pasta, nome)
+                relativo = os.path.relpath(caminho, raiz).replace(os.sep, '/')
+                arquivos[self.prefixo + relativo] = Arquivo(caminho, relativo in com_hash)
+        return arquivos
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        return self.servir(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.servir(request) or await self.get_response(request)
+
+    def servir(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        arquivo = self.arquivos.get(request.path_info)
+        if arquivo is None:
+            return None
+
+        if self.nao_modificado(request, arquivo):
+            response = HttpResponseNotModified()
+        else:
+            codificacao, caminho = self.escolher_variante(arquivo, request.headers.get('Accept-Encoding', ''))
+            if os.path.getsize(caminho) <= self.TAMANHO_MAXIMO_MEMORIA:
+                with open(caminho, 'rb') as conteudo:
+                    response = HttpResponse(conteudo.read(), content_type=arquivo.tipo)
+            else:
+                response = FileResponse(open(caminho, 'rb'), content_type=arquivo.tipo)
+            if codificacao:
+                response['Content-Encoding'] = codificacao
+            response['Last-Modified'] = formatdate(arquivo.modificado, usegmt=True)
+            response['X-Content-Type-Options'] = 'nosniff'
+        response['ETag'] = arquivo.etag
+        response['Cache-Control'] = arquivo.cache_control
+        if arquivo.variantes:
+            response['Vary'] = 'Accept-Encoding'
+        return response
+
+    def escolher_variante(self, arquivo, accept_encoding):
+        """(codificação, caminho) com o maior q aceito; no empate, br antes de gzip."""
+        aceitas = codificacoes_aceitas(accept_encoding)
+        melhor, melhor_q = (None, arquivo.caminho), 0
+        for codificacao, caminho in arquivo.variantes:
+            q = aceitas.get(codificacao, aceitas.get('*', 0))
+            if q > melhor_q:
+                melhor, melhor_q = (codificacao, caminho), q
+        return melhor
+
+    def nao_modificado(self, request, arquivo):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return arquivo.etag in if_none_match
+        desde = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+        return desde is not None and arquivo.modificado <= desde
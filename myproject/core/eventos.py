@@ -0,0 +1,318 @@
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import EventoProjeto, InteresseProjeto, Projeto
+
+
+# Eventos ao vivo das tarefas de um projeto (Server-Sent Events).
+#
+# Os sinais de Tarefa publicam, depois do commit, um evento no canal do
+# projeto ("tarefa_criada", "tarefa_atualizada", "tarefa_removida"; nas
+# operações em lote, um único "recarregar"). ProjetoEventosView
+# (views_async.py, sob ASGI) assina o canal e repassa os eventos ao
+# navegador, que atualiza a tabela de tarefas sem recarregar a página.
+#
+# O barramento padrão fica na memória do processo. Com
+# EVENTOS_BARRAMENTO = 'banco', os eventos passam pela tabela EventoProjeto,
+# um broker local que leva ao processo ASGI o que outros processos gravaram
+# (servidor WSGI, run_workers). Quem tem assinantes renova, em
+# InteresseProjeto, os projetos que está ouvindo; os demais processos só
+# gravam eventos (e leem o progresso) desses projetos, e apagam os eventos
+# vencidos ao publicar.
+#
+# Cada conexão tem uma fila limitada (EVENTOS_LIMITE_FILA eventos e
+# EVENTOS_LIMITE_BYTES). Um cliente lento não segura quem publica nem faz a
+# memória crescer: a fila dele é descartada e ele recebe "recarregar".
+
+logger = logging.getLogger('core.eventos')
+
+
+class FilaCheia(Exception):
+    """O cliente ficou para trás e perdeu eventos."""
+
+
+def formatar(tipo, dados, id_evento=None):
+    """Mensagem SSE pronta, serializada uma vez para todos os assinantes."""
+    linhas = [f'event: {tipo}']
+    if id_evento is not None:
+        linhas.append(f'id: {id_evento}')
+    linhas.append('data: ' + json.dumps(dados, ensure_ascii=False, separators=(',', ':')))
+    return '\n'.join(linhas) + '\n\n'
+
+
+class Assinatura:
+    """Fila de uma conexão SSE. Consumida no loop de eventos; alimentada de
+    qualquer thread por entregar()."""
+
+    def __init__(self, barramento, projeto_id, limite_eventos, limite_bytes):
+        self.barramento = barramento
+        self.projeto_id = projeto_id
+        self.limite_eventos = limite_eventos
+        self.limite_bytes = limite_bytes
+        self.loop = asyncio.get_running_loop()
+        self.fila = deque()
+        self.bytes = 0
+        self.transbordou = False
+        self.sinal = asyncio.Event()
+
+    def entregar(self, mensagem):
+        try:
+            self.loop.call_soon_threadsafe(self._entregar, mensagem)
+        except RuntimeError:
+            # Loop já encerrado: a conexão acabou
+            self.barramento.cancelar(self)
+
+    def _entregar(self, mensagem):
+        if self.transbordou:
+            return
+        if len(self.fila) >= self.limite_eventos or self.bytes + len(mensagem) > self.limite_bytes:
+            self.fila.clear()
+            self.bytes = 0
+            self.transbordou = True
+        else:
+            self.fila.append(mensagem)
+            self.bytes += len(mensagem)
+        self.sinal.set()
+
+    async def proxima(self, timeout):
+        """Próxima mensagem, ou None se nada chegar em `timeout` segundos."""
+        if not self.fila and not self.transbordou:
+            self.sinal.clear()
+            try:
+                await asyncio.wait_for(self.sinal.wait(), timeout)
+            except TimeoutError:
+                return None
+        if self.transbordou:
+            raise FilaCheia
+        mensagem = self.fila.popleft()
+        self.bytes -= len(mensagem)
+        return mensagem
+
+    def fechar(self):
+        self.barramento.cancelar(self)
+
+
+class BarramentoMemoria:
+    """Publica e assina dentro do próprio processo."""
+
+    def __init__(self):
+        self.assinaturas = defaultdict(set)
+        self.trava = threading.Lock()
+        self.sequencia = itertools.count(1)
+
+    def assinar(self, projeto_id):
+        assinatura = Assinatura(
+            self, projeto_id,
+            limite_eventos=getattr(settings, 'EVENTOS_LIMITE_FILA', 100),
+            limite_bytes=getattr(settings, 'EVENTOS_LIMITE_BYTES', 64 * 1024),
+        )
+        with self.trava:
+            self.assinaturas[projeto_id].add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura):
+        with self.trava:
+            assinaturas = self.assinaturas.get(assinatura.projeto_id)
+            if assinaturas is not None:
+                assinaturas.discard(assinatura)
+                if not assinaturas:
+                    del self.assinaturas[assinatura.projeto_id]
+
+    def interessado(self, projeto_id):
+        with self.trava:
+            return projeto_id in self.assinaturas
+
+    def conexoes(self):
+        with self.trava:
+            return sum(len(assinaturas) for assinaturas in self.assinaturas.values())
+
+    def publicar(self, projeto_id, tipo, dados):
+        self.distribuir(projeto_id, formatar(tipo, dados, next(self.sequencia)))
+
+    def distribuir(self, projeto_id, mensagem):
+        with self.trava:
+            assinaturas = list(self.assinaturas.get(projeto_id, ()))
+        for assinatura in assinaturas:
+            assinatura.entregar(mensagem)
+
+
+class BarramentoBanco(BarramentoMemoria):
+    """Publica na tabela EventoProjeto; uma thread do processo que tem
+    assinantes lê os eventos novos e os distribui."""
+
+    def __init__(self):
+        super().__init__()
+        self.leitor = None
+        # Interesses de outros processos já vistos: {projeto_id: valido_ate}
+        self.interesses = {}
+        self.renovar_interesses = False
+        self.proxima_limpeza = 0
+
+    def assinar(self, projeto_id):
+        assinatura = super().assinar(projeto_id)
+        with self.trava:
+            # Chamado no loop de eventos: o leitor grava o interesse
+            self.renovar_interesses = True
+            if self.leitor is None:
+                self.leitor = threading.Thread(target=self.ler, name='eventos-leitor', daemon=True)
+                self.leitor.start()
+        return assinatura
+
+    def interessado(self, projeto_id):
+        # Os assinantes podem estar em outro processo
+        agora = timezone.now()
+        with self.trava:
+            if projeto_id in self.assinaturas or self.interesses.get(projeto_id, agora) > agora:
+                return True
+        valido_ate = (
+            InteresseProjeto.objects.filter(projeto_id=projeto_id, valido_ate__gt=agora)
+            .values_list('valido_ate', flat=True).first()
+        )
+        if valido_ate is None:
+            return False
+        with self.trava:
+            self.interesses[projeto_id] = valido_ate
+        return True
+
+    def publicar(self, projeto_id, tipo, dados):
+        EventoProjeto.objects.create(projeto_id=projeto_id, tipo=tipo, dados=dados)
+        self.limpar()
+
+    def limpar(self):
+        """Apaga eventos e interesses vencidos, no máximo a cada meia retenção."""
+        retencao = getattr(settings, 'EVENTOS_RETENCAO', 300)
+        with self.trava:
+            if time.monotonic() < self.proxima_limpeza:
+                return
+            self.proxima_limpeza = time.monotonic() + retencao / 2
+            self.interesses.clear()
+        agora = timezone.now()
+        EventoProjeto.objects.filter(data_criacao__lt=agora - timedelta(seconds=retencao)).delete()
+        InteresseProjeto.objects.filter(valido_ate__lt=agora).delete()
+
+    def renovar(self, projeto_ids, validade):
+        valido_ate = timezone.now() + timedelta(seconds=validade)
+        InteresseProjeto.objects.bulk_create(
+            [InteresseProjeto(projeto_id=projeto_id, valido_ate=valido_ate) for projeto_id in projeto_ids],
+            update_conflicts=True, unique_fields=['projeto_id'], update_fields=['valido_ate'],
+        )
+
+    def ler(self):
+        intervalo = getattr(settings, 'EVENTOS_INTERVALO', 0.5)
+        validade = getattr(settings, 'EVENTOS_VALIDADE_INTERESSE', 30)
+        ultimo = None
+        proxima_renovacao = 0
+        while True:
+            try:
+                if ultimo is None:
+                    # Só o que for publicado daqui em diante
+                    ultimo = EventoProjeto.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+                with self.trava:
+                    projeto_ids = list(self.assinaturas)
+                    renovar = self.renovar_interesses or time.monotonic() >= proxima_renovacao
+                    self.renovar_interesses = False
+                if projeto_ids and renovar:
+                    # Renovado bem antes de vencer, para não perder eventos
+                    proxima_renovacao = time.monotonic() + validade / 3
+                    self.renovar(projeto_ids, validade)
+                if projeto_ids:
+                    eventos = list(
+                        EventoProjeto.objects.filter(pk__gt=ultimo, projeto_id__in=projeto_ids)
+                        .order_by('pk').values_list('pk', 'projeto_id', 'tipo', 'dados')[:500]
+                    )
+                    for pk, projeto_id, tipo, dados in eventos:
+                        self.distribuir(projeto_id, formatar(tipo, dados, pk))
+                    if eventos:
+                        ultimo = eventos[-1][0]
+                        if len(eventos) == 500:
+                            continue
+            except Exception:
+                logger.exception('Falha ao ler os eventos do banco.')
+                proxima_renovacao = 0
+                close_old_connections()
+            time.sleep(intervalo)
+
+
+BARRAMENTOS = {'memoria': BarramentoMemoria, 'banco': BarramentoBanco}
+
+_barramento = None
+_trava_barramento = threading.Lock()
+
+
+def barramento():
+    global _barramento
+    with _trava_barramento:
+        if _barramento is None:
+            _barramento = BARRAMENTOS[getattr(settings, 'EVENTOS_BARRAMENTO', 'memoria')]()
+        return _barramento
+
+
+def publicar(projeto_id, tipo, dados=None, com_progresso=False):
+    """Publica no canal do projeto quando a transação atual for confirmada.
+
+    `dados` pode ser uma função: só é chamada na hora de enviar, e só se
+    houver quem receba. Com com_progresso, o progresso do projeto também é
+    lido nessa hora, já com os contadores atualizados.
+    """
+    def enviar():
+        try:
+            canal = barramento()
+            if not canal.interessado(projeto_id):
+                return
+            conteudo = dict((dados() if callable(dados) else dados) or {})
+            if com_progresso:
+                projeto = Projeto.objects.filter(pk=projeto_id).first()
+                conteudo['progresso'] = projeto.progresso if projeto else None
+            canal.publicar(projeto_id, tipo, conteudo)
+        except Exception:
+            # Atualização ao vivo é acessória: nunca derruba quem gravou
+            logger.exception('Falha ao publicar %s no projeto %s.', tipo, projeto_id)
+    transaction.on_commit(enviar)
+
+
+def publicar_tarefa(tipo, tarefa, projeto_id=None):
+    if tipo == 'tarefa_removida':
+        dados = {'id': tarefa.pk}
+    else:
+        # Montado só se alguém assina o canal (o responsável pode custar uma consulta)
+        def dados():
+            return {
+                'id': tarefa.pk,
+                'titulo': tarefa.titulo,
+                'status': tarefa.status,
+                'status_display': tarefa.get_status_display(),
+                'prioridade': tarefa.prioridade,
+                'prioridade_display': tarefa.get_prioridade_display(),
+                'responsavel': tarefa.responsavel.username if tarefa.responsavel_id else None,
+                'url': tarefa.get_absolute_url(),
+            }
+    publicar(projeto_id or tarefa.projeto_id, tipo, dados, com_progresso=True)
+
+
+async def transmitir(assinatura):
+    """Corpo do StreamingHttpResponse: eventos, comentários de keep-alive e,
+    após EVENTOS_DURACAO_MAXIMA, o fim da conexão (o navegador reconecta e o
+    acesso é verificado de novo)."""
+    ping = getattr(settings, 'EVENTOS_PING', 15)
+    fim = time.monotonic() + getattr(settings, 'EVENTOS_DURACAO_MAXIMA', 300)
+    try:
+        yield 'retry: 3000\n\n'
+        while (restante := fim - time.monotonic()) > 0:
+            try:
+                mensagem = await assinatura.proxima(min(ping, restante))
+            except FilaCheia:
+                yield formatar('recarregar', {'motivo': 'fila_cheia'})
+                return
+            yield mensagem if mensagem is not None else ': ping\n\n'
+    finally:
+        assinatura.fechar()
@@ -0,0 +1,79 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .dashboard import invalidar_dashboard, usuarios_com_acesso
+from .eventos import publicar
+from .lote import operacao_em_lote
+from .models import AcessoProjeto, Projeto, Tarefa
+
+
+# Exclusão de projetos grandes.
+#
+# O CASCADE do Django carrega todas as tarefas e ligações com categorias em
+# memória e apaga tudo em uma única transação longa, que no SQLite bloqueia
+# qualquer outra escrita. Aqui a exclusão tem duas etapas:
+#
+# 1. marcar_para_exclusao(): marca o projeto (excluindo=True) e remove as
+#    linhas de AcessoProjeto, o que o esconde de visiveis_para() na hora;
+# 2. excluir_em_partes(): apaga as tarefas em lotes, cada um na sua própria
+#    transação curta, e por fim o projeto. Roda na fila de trabalhos
+#    (trabalho "excluir_projeto", core/trabalhos.py) ou pelo comando
+#    purge_projects.
+#
+# O andamento fica no próprio projeto (exclusao_removidas/exclusao_total),
+# atualizado na transação de cada lote, e aparece no admin de Projetos.
+
+logger = logging.getLogger('core.exclusao')
+
+
+def marcar_para_exclusao(projeto):
+    with transaction.atomic():
+        user_ids = usuarios_com_acesso([projeto.pk])
+        user_ids.update(
+            Tarefa.objects.filter(projeto=projeto).values_list('responsavel_id', flat=True).distinct()
+        )
+        # update() em vez de save(): sem os sinais de Projeto, que recriariam o acesso
+        Projeto.objects.filter(pk=projeto.pk).update(
+            excluindo=True, exclusao_removidas=0, exclusao_total=F('contador_tarefas')
+        )
+        AcessoProjeto.objects.filter(projeto=projeto).delete()
+    projeto.excluindo = True
+    invalidar_dashboard(user_ids)
+    publicar(projeto.pk, 'recarregar')
+
+
+def excluir_em_partes(projeto_id, tamanho_lote=None, progresso=None):
+    """Apaga as tarefas do projeto em lotes e depois o projeto.
+
+    `progresso(removidas, total)` é chamado após cada lote. Retorna o número
+    de tarefas removidas. Pode ser chamada de novo se for interrompida.
+    """
+    tamanho_lote = tamanho_lote or getattr(settings, 'EXCLUSAO_TAMANHO_LOTE', 500)
+    projeto = Projeto.objects.filter(pk=projeto_id, excluindo=True)
+    tarefas = Tarefa.objects.filter(projeto_id=projeto_id)
+    # Retomada: as já removidas continuam contando
+    anteriores = projeto.values_list('exclusao_removidas', flat=True).first() or 0
+    total = anteriores + tarefas.count()
+    removidas = 0
+    projeto.update(exclusao_total=total)
+    while True:
+        # Sinais de Tarefa em silêncio: os contadores e o cache do projeto
+        # que está saindo não interessam mais
+        with transaction.atomic(), operacao_em_lote():
+            ids = list(tarefas.order_by('pk').values_list('pk', flat=True)[:tamanho_lote])
+            if not ids:
+                break
+            Tarefa.objects.filter(pk__in=ids).delete()
+            projeto.update(exclusao_removidas=anteriores + removidas + len(ids))
+        removidas += len(ids)
+        logger.info('Projeto %s: %s de %s tarefa(s) removida(s).', projeto_id, anteriores + removidas, total)
+        if progresso:
+            progresso(anteriores + removidas, total)
+
+    projeto.delete()
+    logger.info('Projeto %s excluído.', projeto_id)
+    return removidas
+
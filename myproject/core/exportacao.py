@@ -0,0 +1,133 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .forms import TarefaLoteForm
+from .lote import EscolhasTarefa, apos_alteracao_em_lote, criar_tarefas
+
+
+# Exportação e importação de tarefas em CSV ou NDJSON (um JSON por linha).
+#
+# A exportação é um gerador: percorre o banco com .iterator(chunk_size=...) e
+# produz uma linha por vez, então a memória não cresce com o tamanho do
+# projeto. A importação lê as linhas em blocos e grava cada bloco com
+# bulk_create.
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+COLUNAS = [
+    'id', 'titulo', 'descricao', 'projeto', 'projeto_nome', 'status', 'prioridade',
+    'responsavel', 'categorias', 'data_limite', 'data_conclusao',
+    'estimativa_horas', 'horas_trabalhadas', 'data_criacao',
+]
+
+# Categorias são gravadas pelo nome, separadas por este caractere
+SEPARADOR_CATEGORIAS = '|'
+
+
+def _linha_tarefa(tarefa):
+    return {
+        'id': tarefa.pk,
+        'titulo': tarefa.titulo,
+        'descricao': tarefa.descricao or '',
+        'projeto': tarefa.projeto_id,
+        'projeto_nome': tarefa.projeto.nome,
+        'status': tarefa.status,
+        'prioridade': tarefa.prioridade,
+        'responsavel': tarefa.responsavel.username if tarefa.responsavel else '',
+        'categorias': SEPARADOR_CATEGORIAS.join(categoria.nome for categoria in tarefa.categorias.all()),
+        'data_limite': tarefa.data_limite,
+        'data_conclusao': tarefa.data_conclusao,
+        'estimativa_horas': tarefa.estimativa_horas,
+        'horas_trabalhadas': tarefa.horas_trabalhadas,
+        'data_criacao': tarefa.data_criacao,
+    }
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de gravá-la."""
+
+    def write(self, valor):
+        return valor
+
+
+def exportar_tarefas(queryset, formato='csv', chunk_size=2000):
+    """Gera o conteúdo exportado, linha a linha."""
+    queryset = queryset.select_related('projeto', 'responsavel').prefetch_related('categorias')
+    tarefas = queryset.order_by('pk').iterator(chunk_size=chunk_size)
+
+    if formato == 'ndjson':
+        for tarefa in tarefas:
+            yield json.dumps(_linha_tarefa(tarefa), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+        return
+
+    escritor = csv.DictWriter(_Eco(), fieldnames=COLUNAS)
+    yield escritor.writeheader()
+    for tarefa in tarefas:
+        yield escritor.writerow(_linha_tarefa(tarefa))
+
+
+def ler_linhas(arquivo, formato='csv'):
+    """Lê um arquivo de texto e gera um dicionário por linha."""
+    if formato == 'ndjson':
+        for linha in arquivo:
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                yield json.loads(linha)
+            except ValueError:
+                yield None
+        return
+    yield from csv.DictReader(arquivo)
+
+
+def _dados_formulario(linha):
+    dados = {chave: valor for chave, valor in linha.items() if valor not in ('', None)}
+    categorias = dados.get('categorias')
+    if isinstance(categorias, str):
+        dados['categorias'] = [nome.strip() for nome in categorias.split(SEPARADOR_CATEGORIAS) if nome.strip()]
+    return dados
+
+
+def importar_tarefas(linhas, user, batch_size=500):
+    """Valida e cria tarefas a partir de dicionários (ver ler_linhas).
+
+    Linhas inválidas são ignoradas e relatadas; as válidas são gravadas em
+    blocos de `batch_size`. O campo "id" é ignorado: toda linha gera uma nova
+    tarefa. Retorna {'criadas': n, 'erros': {numero_da_linha: erros}}.
+    """
+    escolhas = EscolhasTarefa(user)
+    criadas, erros, bloco = 0, {}, []
+    projeto_ids, user_ids = set(), set()
+
+    def gravar(bloco):
+        tarefas = criar_tarefas(bloco, batch_size=batch_size, atualizar_derivados=False)
+        projeto_ids.update(tarefa.projeto_id for tarefa in tarefas)
+        user_ids.update(tarefa.responsavel_id for tarefa in tarefas)
+        return len(tarefas)
+
+    for numero, linha in enumerate(linhas, start=1):
+        if not isinstance(linha, dict):
+            erros[numero] = {'__all__': ['Linha inválida.']}
+            continue
+        dados = {'responsavel': user.username, **_dados_formulario(linha)}
+        form = TarefaLoteForm(data=dados, escolhas=escolhas)
+        if not form.is_valid():
+            erros[numero] = form.errors.get_json_data()
+            continue
+        bloco.append((form.save(commit=False), form.cleaned_data['categorias']))
+        if len(bloco) >= batch_size:
+            criadas += gravar(bloco)
+            bloco = []
+
+    if bloco:
+        criadas += gravar(bloco)
+    # Os contadores acompanharam cada bloco; cache do dashboard e eventos vão
+    # uma vez, no fim da importação
+    apos_alteracao_em_lote(projeto_ids, user_ids, deltas={})
+    return {'criadas': criadas, 'erros': erros}
@@ -0,0 +1,163 @@
+import logging
+import traceback
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Trabalho
+
+
+# Fila de trabalhos em segundo plano, guardada no próprio banco.
+#
+# As funções são registradas com @trabalho('nome') (ver core/trabalhos.py) e
+# enfileiradas com enfileirar('nome', **argumentos). O comando run_workers
+# mantém trabalhadores (threads e/ou processos) que reservam o próximo
+# trabalho disponível, por prioridade, e o executam.
+#
+# Ao reservar, o trabalho fica EXECUTANDO até disponivel_em (prazo de
+# visibilidade). Se o trabalhador morrer no meio, o prazo vence e outro o
+# reserva de novo. Em caso de erro, ele volta a PENDENTE com espera
+# exponencial até esgotar max_tentativas (FALHOU). Os trabalhos podem então
+# rodar mais de uma vez e precisam ser idempotentes. Trabalhos longos chamam
+# estender_reserva() entre etapas para renovar o prazo.
+
+logger = logging.getLogger('core.fila')
+
+_registro = {}
+
+# (trabalho, timeout de visibilidade) em execução nesta thread, para estender_reserva()
+_em_execucao = ContextVar('core_trabalho_em_execucao', default=None)
+
+
+def trabalho(nome):
+    """Decorador que registra a função como o trabalho `nome`."""
+    def registrar(funcao):
+        _registro[nome] = funcao
+        return funcao
+    return registrar
+
+
+def enfileirar(nome, prioridade=0, atraso=None, max_tentativas=None, **argumentos):
+    """Cria o trabalho `nome`; os argumentos (serializáveis em JSON) vão para a função."""
+    if nome not in _registro:
+        raise ValueError(f'Trabalho não registrado: {nome}')
+    return Trabalho.objects.create(
+        nome=nome,
+        argumentos=argumentos,
+        prioridade=prioridade,
+        max_tentativas=max_tentativas or getattr(settings, 'FILA_MAX_TENTATIVAS', 3),
+        disponivel_em=timezone.now() + (atraso or timedelta()),
+    )
+
+
+def reservar(timeout_visibilidade=None):
+    """Reserva o próximo trabalho disponível (ou None).
+
+    A reserva é um UPDATE condicionado ao status e ao disponivel_em lidos:
+    se dois trabalhadores escolherem o mesmo, só um deles o grava. Funciona
+    igual no SQLite e no PostgreSQL, sem SELECT ... FOR UPDATE.
+    """
+    timeout = timeout_visibilidade or getattr(settings, 'FILA_TIMEOUT_VISIBILIDADE', 300)
+    for _ in range(5):
+        agora = timezone.now()
+        candidato = (
+            Trabalho.objects.filter(status__in=['PENDENTE', 'EXECUTANDO'], disponivel_em__lte=agora)
+            .order_by('-prioridade', 'disponivel_em', 'pk')
+            .values('pk', 'status', 'disponivel_em')
+            .first()
+        )
+        if candidato is None:
+            return None
+        reservado = Trabalho.objects.filter(**candidato).update(
+            status='EXECUTANDO',
+            tentativas=F('tentativas') + 1,
+            disponivel_em=agora + timedelta(seconds=timeout),
+        )
+        if reservado:
+            return Trabalho.objects.get(pk=candidato['pk'])
+    # Disputa com outros trabalhadores; tenta de novo na próxima volta
+    return None
+
+
+def _reserva(trabalho):
+    # As gravações sobre o trabalho só valem se ninguém o reservou de novo
+    return Trabalho.objects.filter(pk=trabalho.pk, tentativas=trabalho.tentativas)
+
+
+def estender_reserva():
+    """Renova o prazo de visibilidade do trabalho em execução nesta thread.
+
+    Retorna False se a reserva já foi perdida para outro trabalhador. Fora de
+    um trabalho da fila (ex.: num comando), não faz nada e retorna True.
+    """
+    atual = _em_execucao.get()
+    if atual is None:
+        return True
+    trabalho, timeout = atual
+    return bool(_reserva(trabalho).filter(status='EXECUTANDO').update(
+        disponivel_em=timezone.now() + timedelta(seconds=timeout)
+    ))
+
+
+def executar(trabalho, timeout_visibilidade=None):
+    """Executa um trabalho reservado e grava o resultado. Retorna True se deu certo."""
+    este = _reserva(trabalho)
+    timeout = timeout_visibilidade or getattr(settings, 'FILA_TIMEOUT_VISIBILIDADE', 300)
+    token = _em_execucao.set((trabalho, timeout))
+    try:
+        if trabalho.tentativas > trabalho.max_tentativas:
+            raise RuntimeError('Tentativas esgotadas (prazo de visibilidade vencido).')
+        funcao = _registro.get(trabalho.nome)
+        if funcao is None:
+            raise LookupError(f'Trabalho não registrado: {trabalho.nome}')
+        funcao(**trabalho.argumentos)
+    except Exception:
+        erro = traceback.format_exc()
+        if trabalho.tentativas >= trabalho.max_tentativas:
+            este.update(status='FALHOU', erro=erro, data_conclusao=timezone.now())
+            logger.error('Trabalho %s falhou:\n%s', trabalho, erro)
+        else:
+            espera = getattr(settings, 'FILA_ESPERA_BASE', 10) * 2 ** (trabalho.tentativas - 1)
+            este.update(
+                status='PENDENTE', erro=erro, disponivel_em=timezone.now() + timedelta(seconds=espera)
+            )
+            logger.warning('Trabalho %s falhou; nova tentativa em %ss.', trabalho, espera)
+        return False
+    finally:
+        _em_execucao.reset(token)
+    este.update(status='CONCLUIDO', erro='', data_conclusao=timezone.now())
+    logger.info('Trabalho %s concluído.', trabalho)
+    return True
+
+
+def trabalhar(parar, intervalo=1.0, timeout_visibilidade=None, ate_esvaziar=False):
+    """Laço de um trabalhador até `parar` (threading.Event) ser acionado.
+
+    Com ate_esvaziar=True, termina assim que não houver trabalho disponível.
+    Retorna quantos trabalhos executou.
+    """
+    executados = 0
+    try:
+        while not parar.is_set():
+            close_old_connections()
+            try:
+                trabalho = reservar(timeout_visibilidade)
+                if trabalho is not None:
+                    executar(trabalho, timeout_visibilidade)
+                    executados += 1
+                    continue
+            except DatabaseError:
+                # Ex.: "database is locked" no SQLite. Um trabalho já reservado
+                # volta à fila quando o prazo de visibilidade vencer
+                logger.exception('Erro de banco no trabalhador.')
+            if ate_esvaziar:
+                break
+            parar.wait(intervalo)
+    finally:
+        # Conexões abertas por esta thread
+        connections.close_all()
+    return executados
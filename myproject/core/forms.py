@@ -1,7 +1,10 @@
+from urllib.parse import urlencode
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import Tarefa, Projeto, Categoria, PerfilUsuario
+from django.urls import reverse
+from .models import Tarefa, Projeto, Categoria, PerfilUsuario, AcessoProjeto
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -30,6 +33,46 @@ class CustomUserCreationForm(UserCreationForm):
         return user
 
 
+class AutocompleteWidgetMixin:
+    """Renderiza só as opções selecionadas; as demais são buscadas na URL de
+    autocomplete (core/js/autocomplete.js) conforme o usuário digita."""
+    
+    def __init__(self, url, parametros=None, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+        self.parametros = parametros or {}
+    
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        url = reverse(self.url)
+        if self.parametros:
+            url += '?' + urlencode(self.parametros)
+        attrs['data-autocomplete-url'] = url
+        return attrs
+    
+    def optgroups(self, name, value, attrs=None):
+        selecionados = [item for item in value if item and str(item).isdigit()]
+        opcoes = []
+        if not self.allow_multiple_selected:
+            opcoes.append(self.create_option(name, '', '---------', not selecionados, 0))
+        if selecionados:
+            queryset = self.choices.queryset.filter(pk__in=selecionados)
+            for indice, objeto in enumerate(queryset, start=len(opcoes)):
+                rotulo = self.choices.field.label_from_instance(objeto)
+                opcoes.append(self.create_option(name, objeto.pk, rotulo, True, indice))
+        return [(None, opcoes, 0)]
+
+
+class AutocompleteSelect(AutocompleteWidgetMixin, forms.Select):
+    class Media:
+        js = ['core/js/autocomplete.js']
+
+
+class AutocompleteSelectMultiple(AutocompleteWidgetMixin, forms.SelectMultiple):
+    class Media:
+        js = ['core/js/autocomplete.js']
+
+
 class ProjetoForm(forms.ModelForm):
     class Meta:
         model = Projeto
@@ -38,7 +81,9 @@ class ProjetoForm(forms.ModelForm):
             'nome': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Nome do projeto'}),
             'descricao': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Descrição detalhada do projeto'}),
             'status': forms.Select(attrs={'class': 'form-select'}),
-            'membros': forms.SelectMultiple(attrs={'class': 'form-select', 'size': '5'}),
+            'membros': AutocompleteSelectMultiple(
+                'api_autocomplete_usuarios', {'escopo': 'todos'}, attrs={'class': 'form-select', 'size': '5'}
+            ),
             'data_inicio': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'data_fim': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
         }
@@ -59,15 +104,14 @@ class TarefaForm(forms.ModelForm):
         
         # Filtrar projetos disponíveis para o usuário
         if self.user:
-            from django.db.models import Q
-            self.fields['projeto'].queryset = Projeto.objects.filter(
-                Q(responsavel=self.user) | Q(membros=self.user)
-            ).distinct()
+            self.fields['projeto'].queryset = Projeto.objects.visiveis_para(self.user)
             
+            # Usuários com acesso a algum projeto visível para o usuário atual
             self.fields['responsavel'].queryset = User.objects.filter(
-                Q(projetos_responsavel__in=self.fields['projeto'].queryset) |
-                Q(projetos_membro__in=self.fields['projeto'].queryset)
-            ).distinct()
+                pk__in=AcessoProjeto.objects.filter(
+                    projeto_id__in=AcessoProjeto.objects.projetos_de(self.user)
+                ).values('user_id')
+            )
     
     class Meta:
         model = Tarefa
@@ -79,11 +123,13 @@ class TarefaForm(forms.ModelForm):
         widgets = {
             'titulo': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Título da tarefa'}),
             'descricao': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Descrição detalhada'}),
-            'projeto': forms.Select(attrs={'class': 'form-select'}),
+            'projeto': AutocompleteSelect('api_autocomplete_projetos', attrs={'class': 'form-select'}),
             'status': forms.Select(attrs={'class': 'form-select'}),
             'prioridade': forms.Select(attrs={'class': 'form-select'}),
-            'responsavel': forms.Select(attrs={'class': 'form-select'}),
-            'categorias': forms.SelectMultiple(attrs={'class': 'form-select', 'size': '4'}),
+            'responsavel': AutocompleteSelect('api_autocomplete_usuarios', attrs={'class': 'form-select'}),
+            'categorias': AutocompleteSelectMultiple(
+                'api_autocomplete_categorias', attrs={'class': 'form-select', 'size': '4'}
+            ),
             'data_limite': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'estimativa_horas': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.5', 'min': '0'}),
             'horas_trabalhadas': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.5', 'min': '0'}),
@@ -102,6 +148,86 @@ class TarefaForm(forms.ModelForm):
         }
 
 
+class EscolhaEmCacheField(forms.ModelChoiceField):
+    """ModelChoiceField que resolve o valor em um core.lote.Escolhas já carregado."""
+    
+    def __init__(self, objetos, **kwargs):
+        self.objetos = objetos
+        super().__init__(queryset=None, **kwargs)
+    
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.objetos[value]
+        except KeyError:
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+
+class EscolhasEmCacheField(forms.ModelMultipleChoiceField):
+    """ModelMultipleChoiceField que resolve os valores em um core.lote.Escolhas já carregado."""
+    
+    def __init__(self, objetos, **kwargs):
+        self.objetos = objetos
+        super().__init__(queryset=None, **kwargs)
+    
+    def clean(self, value):
+        if not value:
+            if self.required:
+                raise forms.ValidationError(self.error_messages['required'], code='required')
+            return []
+        if isinstance(value, (str, int)):
+            value = [value]
+        escolhidos = []
+        for item in value:
+            try:
+                escolhidos.append(self.objetos[item])
+            except KeyError:
+                raise forms.ValidationError(
+                    self.error_messages['invalid_choice'],
+                    code='invalid_choice',
+                    params={'value': item},
+                )
+        return escolhidos
+
+
+class TarefaLoteForm(TarefaForm):
+    """TarefaForm para muitas linhas: mesmas regras, sem uma consulta por linha.
+
+    Projeto, responsável e categorias são resolvidos em um EscolhasTarefa
+    (core/lote.py) compartilhado por todas as linhas do lote.
+    """
+    
+    def __init__(self, data=None, *args, escolhas, **kwargs):
+        if data is not None:
+            # Campos omitidos na linha assumem o padrão do modelo (status, prioridade...)
+            padroes = {
+                campo.name: campo.get_default()
+                for campo in Tarefa._meta.concrete_fields
+                if campo.name in self._meta.fields and campo.has_default()
+            }
+            data = {**padroes, **data}
+        super().__init__(data, *args, **kwargs)
+        for nome, objetos, classe in (
+            ('projeto', escolhas.projetos, EscolhaEmCacheField),
+            ('responsavel', escolhas.usuarios, EscolhaEmCacheField),
+            ('categorias', escolhas.categorias, EscolhasEmCacheField),
+        ):
+            original = self.fields[nome]
+            self.fields[nome] = classe(objetos, required=original.required, label=original.label)
+    
+    def _get_validation_exclusions(self):
+        # Projeto e responsável já foram validados contra o cache; a validação
+        # do modelo faria uma consulta de existência por linha para cada um
+        exclusoes = super()._get_validation_exclusions()
+        exclusoes.update({'projeto', 'responsavel'})
+        return exclusoes
+    
+    def _save_m2m(self):
+        # As categorias de um lote são gravadas de uma vez por core.lote.criar_tarefas
+        pass
+
+
 class CategoriaForm(forms.ModelForm):
     class Meta:
         model = Categoria
@@ -126,14 +252,16 @@ class PerfilUsuarioForm(forms.ModelForm):
     
     class Meta:
         model = PerfilUsuario
-        fields = ['telefone', 'cargo', 'departamento', 'bio']
+        fields = ['foto', 'telefone', 'cargo', 'departamento', 'bio']
         widgets = {
+            'foto': forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': 'image/*'}),
             'telefone': forms.TextInput(attrs={'class': 'form-control', 'placeholder': '(00) 00000-0000'}),
             'cargo': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ex: Desenvolvedor'}),
             'departamento': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ex: TI'}),
             'bio': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Fale um pouco sobre você...'}),
         }
         labels = {
+            'foto': 'Foto',
             'telefone': 'Telefone',
             'cargo': 'Cargo',
             'departamento': 'Departamento',
@@ -0,0 +1,115 @@
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Tarefa, TransicaoTarefa
+
+
+# Histórico de transições das tarefas e tempos de ciclo.
+#
+# Cada mudança de status, prioridade ou responsável vira uma linha de
+# TransicaoTarefa, vinda do sinal post_save (core/signals.py) ou das
+# alterações em lote (core.lote.atualizar_tarefas). Dentro de uma transação,
+# as transições ficam pendentes na conexão e são gravadas de uma vez, num
+# único INSERT, quando ela é confirmada: N gravações num mesmo atomic() não
+# viram N INSERTs, e uma transação desfeita não deixa histórico. A criação
+# não gera transição; o início fica em Tarefa.data_criacao.
+
+# Atributo da tarefa -> campo da transição
+CAMPOS_RASTREADOS = {
+    'status': TransicaoTarefa.STATUS,
+    'prioridade': TransicaoTarefa.PRIORIDADE,
+    'responsavel_id': TransicaoTarefa.RESPONSAVEL,
+}
+
+
+def valores_rastreados(tarefa):
+    return {atributo: getattr(tarefa, atributo) for atributo in CAMPOS_RASTREADOS}
+
+
+def transicoes(tarefa_id, anterior, atual, data):
+    """Transições (ainda não gravadas) dos campos que mudaram de `anterior` para `atual`."""
+    return [
+        TransicaoTarefa(
+            tarefa_id=tarefa_id,
+            campo=campo,
+            valor_anterior='' if anterior[atributo] is None else str(anterior[atributo]),
+            valor_novo='' if atual[atributo] is None else str(atual[atributo]),
+            data=data,
+        )
+        for atributo, campo in CAMPOS_RASTREADOS.items()
+        if anterior[atributo] != atual[atributo]
+    ]
+
+
+class _Pendentes:
+    """Transições de uma transação, gravadas no commit."""
+
+    def __init__(self, batch_size):
+        self.lista = []
+        self.batch_size = batch_size
+
+    def agendado(self, conexao):
+        # Some da fila de on_commit se a transação (ou o savepoint em que foi
+        # agendado) for desfeita, levando as transições junto
+        return any(func == self.gravar for _, func, _ in conexao.run_on_commit)
+
+    def gravar(self):
+        lista, self.lista = self.lista, []
+        TransicaoTarefa.objects.bulk_create(lista, batch_size=self.batch_size)
+
+
+def registrar(lista, batch_size=500):
+    """Grava as transições; dentro de uma transação, junto com as demais dela, no commit."""
+    if not lista:
+        return
+    conexao = transaction.get_connection()
+    if not conexao.in_atomic_block:
+        TransicaoTarefa.objects.bulk_create(lista, batch_size=batch_size)
+        return
+    pendentes = getattr(conexao, 'transicoes_pendentes', None)
+    if pendentes is None or not pendentes.agendado(conexao):
+        pendentes = conexao.transicoes_pendentes = _Pendentes(batch_size)
+        transaction.on_commit(pendentes.gravar)
+    pendentes.lista.extend(lista)
+
+
+def _horas(intervalo):
+    return None if intervalo is None else round(intervalo.total_seconds() / 3600, 2)
+
+
+def tempos_de_ciclo(projeto_ids, desde=None):
+    """Tempos médios das tarefas concluídas, por projeto, em horas.
+
+    Ciclo: do primeiro "Em Andamento" até a conclusão; a tarefa que não tem
+    essa transição (criada já em andamento ou concluída) conta da criação.
+    Lead: da criação até a conclusão. Uma consulta agrupada por projeto, com
+    o início de cada tarefa numa subconsulta sobre o índice do histórico;
+    `desde` limita às concluídas a partir dessa data/hora.
+
+    Retorna {projeto_id: {'concluidas', 'ciclo_medio', 'lead_medio'}}.
+    """
+    inicio = TransicaoTarefa.objects.filter(
+        tarefa=OuterRef('pk'), campo=TransicaoTarefa.STATUS, valor_novo='EM_ANDAMENTO'
+    ).order_by('data').values('data')[:1]
+    consulta = Tarefa.objects.filter(
+        projeto_id__in=projeto_ids, status='CONCLUIDA', data_conclusao__isnull=False
+    )
+    if desde is not None:
+        consulta = consulta.filter(data_conclusao__gte=desde)
+    linhas = consulta.alias(
+        inicio=Coalesce(Subquery(inicio), 'data_criacao'),
+    ).values('projeto_id').annotate(
+        concluidas=Count('pk'),
+        ciclo_medio=Avg(ExpressionWrapper(F('data_conclusao') - F('inicio'), output_field=DurationField())),
+        lead_medio=Avg(ExpressionWrapper(F('data_conclusao') - F('data_criacao'), output_field=DurationField())),
+    ).order_by()
+
+    return {
+        linha['projeto_id']: {
+            'concluidas': linha['concluidas'],
+            'ciclo_medio': _horas(linha['ciclo_medio']),
+            'lead_medio': _horas(linha['lead_medio']),
+        }
+        for linha in linhas
+    }
@@ -0,0 +1,76 @@
+import hashlib
+import io
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import PerfilUsuario
+
+
+# Miniaturas das fotos de perfil.
+#
+# A foto enviada é decodificada uma única vez e reduzida para cada tamanho de
+# MINIATURAS_TAMANHOS, em WebP e JPEG (para navegadores sem WebP). Os
+# arquivos ficam ao lado do original, com o hash do conteúdo no nome
+# (perfis/<nome>.<hash>.<tamanho>.<formato>): o nome muda quando a foto muda,
+# então podem ser servidos com cache longo. A geração roda na fila de
+# trabalhos (trabalho "gerar_miniaturas") ou pelo comando generate_thumbnails.
+
+FORMATOS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def tamanhos_miniatura():
+    return getattr(settings, 'MINIATURAS_TAMANHOS', (32, 64, 128))
+
+
+def processar_foto(nome, storage=default_storage):
+    """Gera as miniaturas do arquivo `nome` e devolve {tamanho: {formato: nome}}.
+
+    Não toca no banco; pode rodar em várias threads ao mesmo tempo.
+    """
+    with storage.open(nome, 'rb') as arquivo:
+        conteudo = arquivo.read()
+    resumo = hashlib.sha256(conteudo).hexdigest()[:12]
+    base = posixpath.splitext(nome)[0]
+
+    tamanhos = sorted(tamanhos_miniatura(), reverse=True)
+    imagem = Image.open(io.BytesIO(conteudo))
+    # JPEG: decodifica já reduzido (múltiplo de 1/8) quando a foto é grande
+    imagem.draft('RGB', (tamanhos[0] * 2, tamanhos[0] * 2))
+    imagem = ImageOps.exif_transpose(imagem).convert('RGB')
+
+    miniaturas = {}
+    for tamanho in tamanhos:
+        # Cada tamanho parte do anterior (maior), não do original
+        imagem = ImageOps.fit(imagem, (tamanho, tamanho), Image.Resampling.LANCZOS)
+        miniaturas[str(tamanho)] = {}
+        for formato, formato_pil in FORMATOS.items():
+            destino = f'{base}.{resumo}.{tamanho}.{formato}'
+            if not storage.exists(destino):
+                saida = io.BytesIO()
+                imagem.save(saida, formato_pil, quality=85, optimize=True)
+                destino = storage.save(destino, ContentFile(saida.getvalue()))
+            miniaturas[str(tamanho)][formato] = destino
+    return miniaturas
+
+
+def remover_miniaturas(miniaturas, manter=None, storage=default_storage):
+    """Apaga os arquivos de `miniaturas` que não estão em `manter`."""
+    manter = {nome for formatos in (manter or {}).values() for nome in formatos.values()}
+    for formatos in miniaturas.values():
+        for nome in formatos.values():
+            if nome not in manter:
+                storage.delete(nome)
+
+
+def gerar_miniaturas(perfil):
+    """Gera (ou remove) as miniaturas do perfil e grava o resultado."""
+    novas = processar_foto(perfil.foto.name) if perfil.foto else {}
+    remover_miniaturas(perfil.miniaturas or {}, manter=novas)
+    # update() em vez de save(): não dispara os sinais de novo
+    PerfilUsuario.objects.filter(pk=perfil.pk).update(miniaturas=novas)
+    perfil.miniaturas = novas
+    return novas
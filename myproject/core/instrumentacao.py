@@ -0,0 +1,198 @@
+import json
+import logging
+import time
+import sys
+from contextlib import ExitStack, asynccontextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+
+# Instrumentação por requisição (InstrumentacaoMiddleware).
+#
+# Mede quantas consultas a requisição fez, o tempo gasto no banco, na view e
+# na renderização do template. Os números vão no cabeçalho Server-Timing
+# (visível na aba Rede do navegador) e em uma linha JSON no logger
+# "core.instrumentacao". Consultas lentas e a mesma consulta repetida muitas
+# vezes (padrão N+1, ex.: uma propriedade que consulta o banco chamada em cada
+# linha de uma lista) são registradas com o trecho do código que as originou.
+
+logger = logging.getLogger('core.instrumentacao')
+
+
+def _origem():
+    """Onde a consulta nasceu: o template em renderização (se houver) e as
+    últimas linhas do código do projeto (fora do Django) na pilha atual."""
+    base = str(settings.BASE_DIR)
+    linhas, template = [], None
+    quadro = sys._getframe(2)
+    while quadro is not None:
+        codigo = quadro.f_code
+        if codigo.co_filename.startswith(base) and codigo.co_filename != __file__:
+            linhas.append(f'{codigo.co_filename[len(base) + 1:]}:{quadro.f_lineno} em {codigo.co_name}')
+        if template is None:
+            # Nó de template do Django sendo renderizado: aponta o arquivo e a linha
+            no = quadro.f_locals.get('self')
+            token = getattr(no, 'token', None)
+            if isinstance(no, Node) and token is not None and getattr(no, 'origin', None):
+                template = f'{no.origin.template_name}:{token.lineno}'
+        quadro = quadro.f_back
+    origem = list(reversed(linhas[:3]))
+    if template:
+        origem.append(f'template {template}')
+    return origem
+
+
+class MedidorConsultas:
+    """execute_wrapper que conta as consultas e soma o tempo gasto nelas.
+
+    Com `lenta_ms` e `limite_duplicadas` também guarda as consultas lentas e
+    as repetidas, cada uma com a sua origem no código.
+    """
+
+    def __init__(self, lenta_ms=None, limite_duplicadas=None):
+        self.lenta_ms = lenta_ms
+        self.limite_duplicadas = limite_duplicadas
+        self.consultas = 0
+        self.tempo = 0.0
+        self.lentas = []
+        self.repeticoes = {}
+        self.duplicadas = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao = time.perf_counter() - inicio
+            self.consultas += 1
+            self.tempo += duracao
+            if self.lenta_ms is not None and duracao * 1000 >= self.lenta_ms:
+                self.lentas.append({'sql': sql, 'ms': round(duracao * 1000, 2), 'origem': _origem()})
+            if self.limite_duplicadas:
+                # O SQL ainda tem os marcadores (%s): mesma consulta com outros parâmetros
+                vezes = self.repeticoes[sql] = self.repeticoes.get(sql, 0) + 1
+                if vezes == self.limite_duplicadas:
+                    self.duplicadas[sql] = _origem()
+
+    def medir(self, aliases=None):
+        """Context manager que instala o medidor nas conexões indicadas (padrão: todas)."""
+        pilha = ExitStack()
+        for alias in aliases or connections:
+            pilha.enter_context(connections[alias].execute_wrapper(self))
+        return pilha
+
+    @asynccontextmanager
+    async def amedir(self, aliases=None):
+        """medir() para código assíncrono. O ORM assíncrono executa as consultas
+        na thread do sync_to_async, que tem as suas próprias conexões."""
+        pilha = await sync_to_async(self.medir)(aliases)
+        try:
+            yield self
+        finally:
+            await sync_to_async(pilha.close)()
+
+
+class InstrumentacaoMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.lenta_ms = getattr(settings, 'INSTRUMENTACAO_CONSULTA_LENTA_MS', 100)
+        self.limite_duplicadas = getattr(settings, 'INSTRUMENTACAO_LIMITE_DUPLICADAS', 5)
+        self.server_timing = getattr(settings, 'INSTRUMENTACAO_SERVER_TIMING', settings.DEBUG)
+        # Sob ASGI, não força o Django a adaptar a cadeia para síncrona
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        medidor = self.iniciar(request)
+        inicio = time.perf_counter()
+        with medidor.medir():
+            response = self.get_response(request)
+        return self.finalizar(request, response, medidor, inicio)
+
+    async def __acall__(self, request):
+        medidor = self.iniciar(request)
+        inicio = time.perf_counter()
+        async with medidor.amedir():
+            response = await self.get_response(request)
+        return self.finalizar(request, response, medidor, inicio)
+
+    def iniciar(self, request):
+        request._instrumentacao = {'inicio_view': None, 'fim_view': None, 'template': 0.0}
+        return MedidorConsultas(self.lenta_ms, self.limite_duplicadas)
+
+    def finalizar(self, request, response, medidor, inicio):
+        fim = time.perf_counter()
+        tempos = request._instrumentacao
+
+        view = 0.0
+        if tempos['inicio_view'] is not None:
+            # Sem TemplateResponse, a view termina junto com a requisição
+            view = (tempos['fim_view'] or fim) - tempos['inicio_view']
+        metricas = {
+            'db': medidor.tempo * 1000,
+            'view': view * 1000,
+            'tpl': tempos['template'] * 1000,
+            'total': (fim - inicio) * 1000,
+        }
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join(
+                [f'{nome};dur={valor:.1f}' for nome, valor in metricas.items()]
+                + [f'sql;desc="{medidor.consultas} consultas"']
+            )
+        self.registrar(request, response, medidor, metricas)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        tempos = getattr(request, '_instrumentacao', None)
+        if tempos is not None:
+            tempos['inicio_view'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        tempos = getattr(request, '_instrumentacao', None)
+        if tempos is None:
+            return response
+        tempos['fim_view'] = time.perf_counter()
+
+        renderizar = response.render
+
+        def render():
+            inicio = time.perf_counter()
+            try:
+                return renderizar()
+            finally:
+                tempos['template'] += time.perf_counter() - inicio
+
+        response.render = render
+        return response
+
+    def registrar(self, request, response, medidor, metricas):
+        dados = {
+            'metodo': request.method,
+            'caminho': request.path,
+            'status': response.status_code,
+            'consultas': medidor.consultas,
+            **{f'{nome}_ms': round(valor, 2) for nome, valor in metricas.items()},
+        }
+        logger.info(json.dumps(dados, ensure_ascii=False))
+
+        for lenta in medidor.lentas:
+            logger.warning(json.dumps(
+                {'evento': 'consulta_lenta', 'caminho': request.path, **lenta}, ensure_ascii=False
+            ))
+        for sql, origem in medidor.duplicadas.items():
+            logger.warning(json.dumps({
+                'evento': 'consulta_repetida',
+                'caminho': request.path,
+                'vezes': medidor.repeticoes[sql],
+                'sql': sql,
+                'origem': origem,
+            }, ensure_ascii=False))
@@ -0,0 +1,230 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .dashboard import invalidar_dashboard, usuarios_com_acesso
+from .eventos import publicar
+from .historico import CAMPOS_RASTREADOS, registrar, transicoes, valores_rastreados
+from .models import AcessoProjeto, Categoria, Projeto, Tarefa
+
+
+# Operações em lote sobre Tarefa (API, importação).
+#
+# bulk_create/bulk_update não disparam sinais e queryset.delete() dispara um
+# por objeto. Dentro de operacao_em_lote() os receptores de contadores e de
+# cache ficam em silêncio e o trabalho é feito uma vez por lote em
+# apos_alteracao_em_lote(), somando aos contadores só o que as linhas
+# alteradas mudaram.
+
+# Campos que definem quanto uma tarefa soma aos contadores do seu projeto,
+# na ordem dos argumentos de _somar_deltas()
+CAMPOS_CONTRIBUICAO = ('projeto_id', 'status', 'estimativa_horas', 'horas_trabalhadas')
+
+_em_lote = ContextVar('core_operacao_em_lote', default=False)
+
+
+@contextmanager
+def operacao_em_lote():
+    token = _em_lote.set(True)
+    try:
+        yield
+    finally:
+        _em_lote.reset(token)
+
+
+def em_lote():
+    return _em_lote.get()
+
+
+class Escolhas:
+    """Objetos já carregados, resolvidos pelo pk ou pelo nome.
+
+    Inteiros são pks e textos são nomes (`campo_nome`), cada um no seu
+    dicionário: um nome numérico não se confunde com o pk de outro objeto.
+    Sem `campo_nome`, o texto é o pk escrito por extenso (ex.: coluna de CSV).
+    """
+
+    def __init__(self, objetos, campo_nome=None):
+        self.campo_nome = campo_nome
+        self.por_pk = {obj.pk: obj for obj in objetos}
+        self.por_nome = {getattr(obj, campo_nome): obj for obj in objetos} if campo_nome else {}
+
+    def __getitem__(self, valor):
+        if isinstance(valor, int) and not isinstance(valor, bool):
+            return self.por_pk[valor]
+        if isinstance(valor, str):
+            if self.campo_nome:
+                return self.por_nome[valor]
+            if valor.strip().isdigit():
+                return self.por_pk[int(valor)]
+        raise KeyError(valor)
+
+    def get(self, valor, padrao=None):
+        try:
+            return self[valor]
+        except KeyError:
+            return padrao
+
+
+class EscolhasTarefa:
+    """Projetos, usuários e categorias que um usuário pode usar em tarefas.
+
+    Cada conjunto é carregado uma única vez (ver Escolhas), para validar
+    muitas linhas sem uma consulta por linha.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def projetos(self):
+        return Escolhas(Projeto.objects.visiveis_para(self.user))
+
+    @cached_property
+    def usuarios(self):
+        return Escolhas(
+            User.objects.filter(
+                pk__in=AcessoProjeto.objects.filter(
+                    projeto_id__in=AcessoProjeto.objects.projetos_de(self.user)
+                ).values('user_id')
+            ),
+            campo_nome='username'
+        )
+
+    @cached_property
+    def categorias(self):
+        return Escolhas(Categoria.objects.all(), campo_nome='nome')
+
+
+def _somar_deltas(deltas, projeto_id, status, estimativa_horas, horas_trabalhadas, sinal=1):
+    contribuicao = Tarefa.calcular_contribuicao(status, estimativa_horas, horas_trabalhadas)
+    for campo, valor in contribuicao.items():
+        deltas[projeto_id][campo] += sinal * valor
+
+
+def apos_alteracao_em_lote(projeto_ids, user_ids=(), deltas=None):
+    """Refaz, uma vez por lote, o que os sinais fariam tarefa a tarefa.
+
+    `deltas` ({projeto_id: {campo: incremento}}) são somados aos contadores
+    dos projetos; sem eles (ex.: carga de dados), os contadores são recontados.
+    """
+    projeto_ids = {pk for pk in projeto_ids if pk}
+    if deltas is None:
+        Projeto.objects.filter(pk__in=projeto_ids).recalcular_contadores()
+    else:
+        Projeto.aplicar_deltas(deltas)
+    invalidar_dashboard(usuarios_com_acesso(projeto_ids) | set(user_ids))
+    # Um aviso por projeto em vez de um evento por tarefa
+    for projeto_id in projeto_ids:
+        publicar(projeto_id, 'recarregar')
+
+
+def criar_tarefas(itens, batch_size=500, atualizar_derivados=True):
+    """Cria tarefas com bulk_create. `itens` é uma lista de (tarefa, categorias).
+
+    Os contadores dos projetos são atualizados na mesma transação. Com
+    atualizar_derivados=False, cache e eventos ficam com quem chama
+    apos_alteracao_em_lote(..., deltas={}) (ex.: uma vez ao fim de vários lotes).
+    """
+    tarefas = [tarefa for tarefa, _ in itens]
+    agora = timezone.now()
+    for tarefa in tarefas:
+        tarefa.nivel_prioridade = Tarefa.NIVEL_PRIORIDADE.get(tarefa.prioridade, 0)
+        tarefa.ajustar_data_conclusao(agora)
+
+    with transaction.atomic(), operacao_em_lote():
+        Tarefa.objects.bulk_create(tarefas, batch_size=batch_size)
+
+        TarefaCategoria = Tarefa.categorias.through
+        TarefaCategoria.objects.bulk_create(
+            [
+                TarefaCategoria(tarefa_id=tarefa.pk, categoria_id=categoria.pk)
+                for tarefa, categorias in itens
+                for categoria in categorias
+            ],
+            batch_size=batch_size
+        )
+
+        deltas = defaultdict(lambda: defaultdict(int))
+        for tarefa in tarefas:
+            _somar_deltas(
+                deltas, tarefa.projeto_id, tarefa.status, tarefa.estimativa_horas, tarefa.horas_trabalhadas
+            )
+        if atualizar_derivados:
+            apos_alteracao_em_lote(
+                {tarefa.projeto_id for tarefa in tarefas},
+                {tarefa.responsavel_id for tarefa in tarefas},
+                deltas
+            )
+        else:
+            Projeto.aplicar_deltas(deltas)
+    return tarefas
+
+
+def atualizar_tarefas(tarefas, campos, responsaveis_anteriores=(), batch_size=500):
+    """Grava `campos` das tarefas já alteradas em memória com bulk_update."""
+    campos = set(campos) | {'data_atualizacao'}
+    if 'prioridade' in campos:
+        campos.add('nivel_prioridade')
+    if 'status' in campos:
+        campos.add('data_conclusao')
+
+    agora = timezone.now()
+    for tarefa in tarefas:
+        # bulk_update não aplica auto_now nem o Tarefa.save()
+        tarefa.data_atualizacao = agora
+        tarefa.nivel_prioridade = Tarefa.NIVEL_PRIORIDADE.get(tarefa.prioridade, 0)
+        tarefa.ajustar_data_conclusao(agora)
+
+    with transaction.atomic(), operacao_em_lote():
+        # Valores gravados antes deste lote (com bloqueio das linhas), para os
+        # contadores e o histórico de transições
+        anteriores = {
+            linha['pk']: linha
+            for linha in Tarefa.objects.select_for_update()
+            .filter(pk__in=[tarefa.pk for tarefa in tarefas])
+            .values('pk', *CAMPOS_CONTRIBUICAO, *CAMPOS_RASTREADOS).order_by()
+        }
+        deltas = defaultdict(lambda: defaultdict(int))
+        for tarefa in tarefas:
+            anterior = anteriores.get(tarefa.pk)
+            if anterior is None:
+                continue
+            _somar_deltas(deltas, *(anterior[campo] for campo in CAMPOS_CONTRIBUICAO), sinal=-1)
+            _somar_deltas(deltas, *(
+                getattr(tarefa, campo) if campo.removesuffix('_id') in campos else anterior[campo]
+                for campo in CAMPOS_CONTRIBUICAO
+            ))
+        Tarefa.objects.bulk_update(tarefas, sorted(campos), batch_size=batch_size)
+        registrar([
+            transicao
+            for tarefa in tarefas if tarefa.pk in anteriores
+            for transicao in transicoes(tarefa.pk, anteriores[tarefa.pk], valores_rastreados(tarefa), agora)
+        ], batch_size=batch_size)
+        apos_alteracao_em_lote(
+            {tarefa.projeto_id for tarefa in tarefas},
+            {tarefa.responsavel_id for tarefa in tarefas} | set(responsaveis_anteriores),
+            deltas
+        )
+    return len(tarefas)
+
+
+def excluir_tarefas(queryset):
+    """Exclui as tarefas do queryset e atualiza contadores e cache uma única vez."""
+    with transaction.atomic(), operacao_em_lote():
+        afetados = list(queryset.select_for_update().values_list('responsavel_id', *CAMPOS_CONTRIBUICAO))
+        queryset.delete()
+        deltas = defaultdict(lambda: defaultdict(int))
+        for _, *contribuicao in afetados:
+            _somar_deltas(deltas, *contribuicao, sinal=-1)
+        apos_alteracao_em_lote(
+            {projeto_id for _, projeto_id, *_ in afetados},
+            {responsavel_id for responsavel_id, *_ in afetados},
+            deltas
+        )
+    return len(afetados)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Tarefa
+
+
+class Command(BaseCommand):
+    help = (
+        'Preenche data_conclusao das tarefas concluídas antes de o campo ser mantido '
+        'automaticamente (usa a última alteração) e a limpa nas não concluídas.'
+    )
+
+    def handle(self, *args, **options):
+        total = Tarefa.objects.preencher_data_conclusao()
+        self.stdout.write(self.style.SUCCESS(f'{total} tarefa(s) atualizada(s).'))
@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.benchmark import amostrar_usuarios, medir_carga_mista
+from core.management.commands.seed_load_data import PREFIXO_USUARIO
+from core.models import Projeto
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a vazão do banco sob leituras e escritas concorrentes, com e sem os '
+        'ajustes de desempenho do perfil (settings.BANCOS / BANCO_AJUSTES). As escritas '
+        'alteram tarefas de verdade: use um banco só com os dados do seed_load_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfil', choices=['ambos', 'padrao', 'ajustado'], default='ambos')
+        parser.add_argument('--usuarios', type=int, default=10)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--duracao', type=float, default=10.0, help='Segundos de medição por perfil.')
+        parser.add_argument('--escritas', type=float, default=0.2, help='Fração de escritas (0 a 1).')
+        parser.add_argument('--semente', type=int, default=None)
+        parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON.')
+        parser.add_argument(
+            '--sim', action='store_true',
+            help='Roda mesmo com projetos que não são do seed_load_data (eles podem ser alterados).'
+        )
+
+    def handle(self, *args, **options):
+        # Status, contadores, histórico e data_conclusao das tarefas mudam de
+        # verdade, e o perfil padrão troca o journal_mode do arquivo SQLite
+        if not options['sim'] and Projeto.objects.exclude(
+            responsavel__username__startswith=PREFIXO_USUARIO
+        ).exists():
+            raise CommandError(
+                f'Há projetos que não são de usuários "{PREFIXO_USUARIO}*", e o benchmark altera '
+                'tarefas de verdade. Use um banco só com os dados do seed_load_data ou passe --sim.'
+            )
+        if options['perfil'] == 'ambos':
+            # Sem conexão aberta aqui: trocar o journal_mode exige o arquivo livre
+            connection.close()
+            resultados = {
+                perfil: self.executar_em_subprocesso(perfil, options) for perfil in ('padrao', 'ajustado')
+            }
+            self.imprimir(resultados)
+            return
+
+        if (options['perfil'] == 'ajustado') != settings.BANCO_AJUSTES:
+            raise CommandError('BANCO_AJUSTES precisa combinar com o perfil (1 = ajustado, 0 = padrao).')
+        if connection.vendor == 'sqlite' and not settings.BANCO_AJUSTES:
+            # O modo WAL fica gravado no arquivo; o padrão do SQLite é o journal de rollback
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=DELETE')
+
+        usuarios = amostrar_usuarios(options['usuarios'])
+        if not usuarios:
+            raise CommandError('Nenhum usuário encontrado. Gere dados com: python manage.py seed_load_data')
+        resultado = medir_carga_mista(
+            usuarios, options['threads'], options['duracao'], options['escritas'], options['semente']
+        )
+        if options['json']:
+            self.stdout.write(json.dumps(resultado))
+        else:
+            self.imprimir({options['perfil']: resultado})
+
+    def executar_em_subprocesso(self, perfil, options):
+        comando = [
+            sys.executable, sys.argv[0], 'benchmark_banco', '--perfil', perfil, '--json',
+            '--usuarios', str(options['usuarios']),
+            '--threads', str(options['threads']),
+            '--duracao', str(options['duracao']),
+            '--escritas', str(options['escritas']),
+            '--sim',
+        ]
+        if options['semente'] is not None:
+            comando += ['--semente', str(options['semente'])]
+        ambiente = {**os.environ, 'BANCO_AJUSTES': '1' if perfil == 'ajustado' else '0'}
+        processo = subprocess.run(comando, env=ambiente, capture_output=True, text=True)
+        if processo.returncode != 0:
+            raise CommandError(f'Falha no perfil {perfil}:\n{processo.stderr}')
+        return json.loads(processo.stdout.strip().splitlines()[-1])
+
+    def imprimir(self, resultados):
+        self.stdout.write(
+            f'{"perfil":<10}{"ops/s":>9}{"leit/s":>9}{"leit p50":>10}{"leit p99":>10}'
+            f'{"escr/s":>9}{"escr p50":>10}{"escr p99":>10}{"erros":>8}'
+        )
+        for perfil, resultado in resultados.items():
+            leitura, escrita = resultado['leitura'], resultado['escrita']
+            self.stdout.write(
+                f'{perfil:<10}{resultado["total_ops_s"]:>9}'
+                f'{leitura["ops_s"]:>9}{str(leitura["p50_ms"]):>10}{str(leitura["p99_ms"]):>10}'
+                f'{escrita["ops_s"]:>9}{str(escrita["p50_ms"]):>10}{str(escrita["p99_ms"]):>10}'
+                f'{resultado["erros"]:>8}'
+            )
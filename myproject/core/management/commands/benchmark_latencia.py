@@ -0,0 +1,78 @@
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import amostrar_usuarios, medir_latencias_asgi, medir_latencias_wsgi
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a latência (p50/p99) das páginas principais pelo handler WSGI (views '
+        'síncronas) e pelo ASGI (views assíncronas de core/views_async.py), sob concorrência.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modo', choices=['ambos', 'wsgi', 'asgi'], default='ambos')
+        parser.add_argument('--usuarios', type=int, default=5)
+        parser.add_argument('--requisicoes', type=int, default=100, help='Requisições por view.')
+        parser.add_argument('--concorrencia', type=int, default=8)
+        parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON.')
+
+    def handle(self, *args, **options):
+        # As linhas de log por requisição atrapalhariam a saída; avisos continuam
+        logging.getLogger('core.instrumentacao').setLevel(logging.WARNING)
+
+        if options['modo'] == 'ambos':
+            resultados = {modo: self.executar_em_subprocesso(modo, options) for modo in ('wsgi', 'asgi')}
+            self.imprimir(resultados)
+            return
+
+        resultado = self.medir(options)
+        if options['json']:
+            self.stdout.write(json.dumps(resultado))
+        else:
+            self.imprimir({options['modo']: resultado})
+
+    def medir(self, options):
+        # VIEWS_ASYNC é lido na carga das URLs; cada modo roda no seu próprio processo
+        if settings.VIEWS_ASYNC != (options['modo'] == 'asgi'):
+            raise CommandError(f'Use VIEWS_ASYNC={int(options["modo"] == "asgi")} para o modo {options["modo"]}.')
+        usuarios = amostrar_usuarios(options['usuarios'])
+        if not usuarios:
+            raise CommandError('Nenhum usuário encontrado. Gere dados com: python manage.py seed_load_data')
+
+        parametros = (usuarios, options['requisicoes'], options['concorrencia'])
+        if options['modo'] == 'asgi':
+            return asyncio.run(medir_latencias_asgi(*parametros))
+        return medir_latencias_wsgi(*parametros)
+
+    def executar_em_subprocesso(self, modo, options):
+        comando = [
+            sys.executable, sys.argv[0], 'benchmark_latencia', '--modo', modo, '--json',
+            '--usuarios', str(options['usuarios']),
+            '--requisicoes', str(options['requisicoes']),
+            '--concorrencia', str(options['concorrencia']),
+        ]
+        ambiente = {**os.environ, 'VIEWS_ASYNC': '1' if modo == 'asgi' else '0'}
+        processo = subprocess.run(comando, env=ambiente, capture_output=True, text=True)
+        if processo.returncode != 0:
+            raise CommandError(f'Falha no modo {modo}:\n{processo.stderr}')
+        return json.loads(processo.stdout.strip().splitlines()[-1])
+
+    def imprimir(self, resultados):
+        modos = list(resultados)
+        cabecalho = f'{"view":<16}' + ''.join(f'{modo + " p50":>12}{modo + " p99":>12}' for modo in modos)
+        self.stdout.write(cabecalho)
+        views = sorted({nome for resultado in resultados.values() for nome in resultado})
+        for nome in views:
+            linha = f'{nome:<16}'
+            for modo in modos:
+                medidas = resultados[modo].get(nome, {})
+                linha += f'{medidas.get("p50_ms", "-"):>12}{medidas.get("p99_ms", "-"):>12}'
+            self.stdout.write(linha)
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import (
+    METRICAS, amostrar_usuarios, comparar, executar_benchmark, gravar_linha_base, ler_linha_base,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede consultas, tempo de banco e tempo total do dashboard e das páginas de projetos '
+        'e tarefas, e falha (código de saída 1) se alguma view piorar em relação à linha de base.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=5, help='Tamanho da amostra de usuários.')
+        parser.add_argument('--repeticoes', type=int, default=3, help='Requisições por view e usuário.')
+        parser.add_argument('--linha-base', default=str(settings.BENCHMARK_LINHA_BASE))
+        parser.add_argument(
+            '--gravar-linha-base', action='store_true',
+            help='Grava o resultado como a nova linha de base em vez de comparar.'
+        )
+        parser.add_argument(
+            '--tolerancia', type=float, default=0.5,
+            help='Aumento de tempo aceito, em fração da linha de base (0.5 = 50%%).'
+        )
+        parser.add_argument('--folga-ms', type=float, default=5.0, help='Folga absoluta nos tempos (ms).')
+
+    def handle(self, *args, **options):
+        usuarios = amostrar_usuarios(options['usuarios'])
+        if not usuarios:
+            raise CommandError('Nenhum usuário encontrado. Gere dados com: python manage.py seed_load_data')
+
+        resultado = executar_benchmark(usuarios, options['repeticoes'])
+
+        self.stdout.write(f'{"view":<16}' + ''.join(f'{metrica:>16}' for metrica in METRICAS))
+        for nome, medidas in sorted(resultado.items()):
+            self.stdout.write(f'{nome:<16}' + ''.join(f'{medidas[metrica]:>16}' for metrica in METRICAS))
+
+        if options['gravar_linha_base']:
+            gravar_linha_base(options['linha_base'], resultado)
+            self.stdout.write(self.style.SUCCESS(f'Linha de base gravada em {options["linha_base"]}.'))
+            return
+
+        try:
+            linha_base = ler_linha_base(options['linha_base'])
+        except FileNotFoundError:
+            raise CommandError(
+                f'Linha de base {options["linha_base"]} não encontrada. Rode antes com --gravar-linha-base.'
+            )
+
+        regressoes = comparar(resultado, linha_base, options['tolerancia'], options['folga_ms'])
+        if regressoes:
+            for regressao in regressoes:
+                self.stderr.write(self.style.ERROR(regressao))
+            raise CommandError(f'{len(regressoes)} regressão(ões) de desempenho.')
+        self.stdout.write(self.style.SUCCESS('Nenhuma regressão em relação à linha de base.'))
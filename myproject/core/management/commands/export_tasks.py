@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from core.exportacao import FORMATOS, exportar_tarefas
+from core.models import Tarefa
+
+
+class Command(BaseCommand):
+    help = 'Exporta tarefas em CSV ou NDJSON, lendo o banco em blocos (memória constante).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=list(FORMATOS), default='csv')
+        parser.add_argument(
+            '--projeto', type=int, action='append', dest='projetos',
+            help='Exporta apenas as tarefas deste projeto (pode repetir).'
+        )
+        parser.add_argument('--saida', help='Arquivo de saída (padrão: saída padrão).')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        queryset = Tarefa.objects.all()
+        if options['projetos']:
+            queryset = queryset.filter(projeto_id__in=options['projetos'])
+
+        saida = open(options['saida'], 'w', encoding='utf-8', newline='') if options['saida'] else sys.stdout
+        try:
+            for trecho in exportar_tarefas(queryset, options['formato'], options['chunk_size']):
+                saida.write(trecho)
+        finally:
+            if saida is not sys.stdout:
+                saida.close()
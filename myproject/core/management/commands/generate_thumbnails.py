@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from core.imagens import processar_foto, remover_miniaturas
+from core.models import PerfilUsuario
+
+
+class Command(BaseCommand):
+    help = 'Gera as miniaturas das fotos de perfil existentes, em paralelo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Fotos processadas ao mesmo tempo (o Pillow libera o GIL ao redimensionar).'
+        )
+        parser.add_argument(
+            '--todas', action='store_true',
+            help='Refaz também as fotos que já têm miniaturas (ex.: após mudar MINIATURAS_TAMANHOS).'
+        )
+
+    def handle(self, *args, **options):
+        perfis = PerfilUsuario.objects.exclude(foto='').exclude(foto=None)
+        if not options['todas']:
+            perfis = perfis.filter(miniaturas={})
+        perfis = {perfil.pk: perfil for perfil in perfis.only('pk', 'foto', 'miniaturas')}
+
+        # As threads só leem a foto e gravam os arquivos; o banco fica nesta thread
+        gerados = falhas = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futuros = {executor.submit(processar_foto, perfil.foto.name): perfil for perfil in perfis.values()}
+            for futuro in as_completed(futuros):
+                perfil = futuros[futuro]
+                try:
+                    miniaturas = futuro.result()
+                except Exception as erro:
+                    falhas += 1
+                    self.stderr.write(f'{perfil.foto.name}: {erro}')
+                    continue
+                remover_miniaturas(perfil.miniaturas or {}, manter=miniaturas)
+                PerfilUsuario.objects.filter(pk=perfil.pk).update(miniaturas=miniaturas)
+                gerados += 1
+                self.stdout.write(f'  {gerados + falhas}/{len(perfis)} {perfil.foto.name}')
+
+        self.stdout.write(self.style.SUCCESS(f'{gerados} foto(s) processada(s), {falhas} com erro.'))
@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exportacao import FORMATOS, importar_tarefas, ler_linhas
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa tarefas de um arquivo CSV ou NDJSON, validando cada linha com as '
+        'regras do TarefaForm e gravando em lotes com bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument(
+            '--usuario', required=True,
+            help='Usuário em nome de quem as tarefas são criadas (define os projetos permitidos).'
+        )
+        parser.add_argument('--formato', choices=list(FORMATOS), help='Padrão: pela extensão do arquivo.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuário "{options["usuario"]}" não encontrado.')
+
+        formato = options['formato'] or ('ndjson' if options['arquivo'].endswith(('.ndjson', '.jsonl')) else 'csv')
+        with open(options['arquivo'], encoding='utf-8-sig', newline='') as arquivo:
+            resultado = importar_tarefas(ler_linhas(arquivo, formato), user, options['batch_size'])
+
+        for numero, erros in resultado['erros'].items():
+            self.stderr.write(f'Linha {numero}: {erros}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado["criadas"]} tarefa(s) importada(s), {len(resultado["erros"])} linha(s) com erro.'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.exclusao import excluir_em_partes
+from core.models import Projeto
+
+
+class Command(BaseCommand):
+    help = 'Conclui a exclusão dos projetos marcados, removendo as tarefas em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Tarefas removidas por lote (padrão: settings.EXCLUSAO_TAMANHO_LOTE).'
+        )
+
+    def handle(self, *args, **options):
+        projetos = list(Projeto.objects.filter(excluindo=True).values_list('pk', 'nome'))
+        for projeto_id, nome in projetos:
+            self.stdout.write(f'Excluindo "{nome}" (#{projeto_id})...')
+            removidas = excluir_em_partes(
+                projeto_id,
+                tamanho_lote=options['batch_size'],
+                progresso=lambda feitas, total: self.stdout.write(f'  {feitas}/{total} tarefa(s)'),
+            )
+            self.stdout.write(f'  {removidas} tarefa(s) removida(s).')
+        self.stdout.write(self.style.SUCCESS(f'{len(projetos)} projeto(s) excluído(s).'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from core.busca import instalar_indices
+
+
+class Command(BaseCommand):
+    help = 'Cria e reconstrói os índices de texto completo usados pelo parâmetro ?busca=.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Alias do banco de dados (padrão: "default").'
+        )
+
+    def handle(self, *args, **options):
+        instalar_indices(using=options['database'], reconstruir=True)
+        self.stdout.write(self.style.SUCCESS('Índices de busca reconstruídos.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.models import AcessoProjeto
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói a tabela de acesso (usuário, projeto) a partir de responsáveis e membros.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Quantidade de linhas inseridas por lote.'
+        )
+
+    def handle(self, *args, **options):
+        total = AcessoProjeto.objects.reconstruir(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} acesso(s) registrado(s).'))
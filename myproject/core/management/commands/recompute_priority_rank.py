@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Tarefa
+
+
+class Command(BaseCommand):
+    help = 'Regrava o nível numérico de prioridade (nivel_prioridade) de todas as tarefas.'
+
+    def handle(self, *args, **options):
+        total = Tarefa.objects.recalcular_nivel_prioridade()
+        self.stdout.write(self.style.SUCCESS(f'{total} tarefa(s) atualizada(s).'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Projeto
+
+
+class Command(BaseCommand):
+    help = 'Recalcula em lote os contadores de tarefas e horas dos projetos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'projetos', nargs='*', type=int,
+            help='IDs dos projetos a recalcular (padrão: todos).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Quantidade de projetos gravados por lote.'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Projeto.objects.all()
+        if options['projetos']:
+            queryset = queryset.filter(pk__in=options['projetos'])
+
+        total = queryset.recalcular_contadores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} projeto(s) recalculado(s).'))
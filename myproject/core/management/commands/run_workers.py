@@ -0,0 +1,93 @@
+import signal
+import subprocess
+import sys
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.fila import trabalhar
+
+
+class Command(BaseCommand):
+    help = (
+        'Executa os trabalhos da fila em segundo plano (core/fila.py) com um conjunto '
+        'de threads e, opcionalmente, vários processos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=None,
+            help='Trabalhadores (threads) por processo (padrão: settings.FILA_THREADS).'
+        )
+        parser.add_argument(
+            '--processos', type=int, default=1,
+            help='Processos, cada um com --threads trabalhadores (padrão: 1).'
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=None,
+            help='Segundos entre consultas com a fila vazia (padrão: settings.FILA_INTERVALO).'
+        )
+        parser.add_argument(
+            '--timeout-visibilidade', type=int, default=None,
+            help='Segundos até um trabalho reservado voltar à fila (padrão: settings.FILA_TIMEOUT_VISIBILIDADE).'
+        )
+        parser.add_argument(
+            '--ate-esvaziar', action='store_true',
+            help='Termina quando não houver mais trabalho disponível (ex.: em um cron).'
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads'] or getattr(settings, 'FILA_THREADS', 2)
+        if options['processos'] > 1:
+            self.executar_processos(options, threads)
+            return
+
+        parar = threading.Event()
+        # Ctrl+C / SIGTERM: cada trabalhador termina o trabalho atual e sai
+        signal.signal(signal.SIGTERM, lambda *_: parar.set())
+
+        resultados = []
+        parametros = {
+            'intervalo': options['intervalo'] or getattr(settings, 'FILA_INTERVALO', 1.0),
+            'timeout_visibilidade': options['timeout_visibilidade'],
+            'ate_esvaziar': options['ate_esvaziar'],
+        }
+        trabalhadores = [
+            threading.Thread(
+                target=lambda: resultados.append(trabalhar(parar, **parametros)),
+                name=f'trabalhador-{indice}',
+            )
+            for indice in range(threads)
+        ]
+        self.stdout.write(f'{threads} trabalhador(es) aguardando trabalhos...')
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+        try:
+            for trabalhador in trabalhadores:
+                while trabalhador.is_alive():
+                    trabalhador.join(0.5)
+        except KeyboardInterrupt:
+            parar.set()
+            for trabalhador in trabalhadores:
+                trabalhador.join()
+        self.stdout.write(self.style.SUCCESS(f'{sum(resultados)} trabalho(s) executado(s).'))
+
+    def executar_processos(self, options, threads):
+        comando = [sys.executable, sys.argv[0], 'run_workers', '--threads', str(threads)]
+        for opcao in ('intervalo', 'timeout_visibilidade'):
+            if options[opcao] is not None:
+                comando += [f'--{opcao.replace("_", "-")}', str(options[opcao])]
+        if options['ate_esvaziar']:
+            comando.append('--ate-esvaziar')
+
+        processos = [subprocess.Popen(comando) for _ in range(options['processos'])]
+        self.stdout.write(f'{len(processos)} processo(s) com {threads} trabalhador(es) cada.')
+        try:
+            for processo in processos:
+                processo.wait()
+        except KeyboardInterrupt:
+            for processo in processos:
+                processo.terminate()
+            for processo in processos:
+                processo.wait()
@@ -0,0 +1,178 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.lote import apos_alteracao_em_lote, operacao_em_lote
+from core.models import AcessoProjeto, Categoria, Projeto, Tarefa
+
+
+PREFIXO_USUARIO = 'carga_'
+SENHA_PADRAO = 'carga123'
+
+# Distribuições aproximadas de um uso real: a maioria das tarefas já foi concluída
+# e poucas são urgentes
+PESOS_STATUS = {'PENDENTE': 30, 'EM_ANDAMENTO': 20, 'CONCLUIDA': 45, 'CANCELADA': 5}
+PESOS_PRIORIDADE = {'BAIXA': 25, 'MEDIA': 45, 'ALTA': 20, 'URGENTE': 10}
+PESOS_STATUS_PROJETO = {'PLANEJAMENTO': 20, 'EM_ANDAMENTO': 50, 'CONCLUIDO': 25, 'CANCELADO': 5}
+
+
+def _sortear(aleatorio, pesos):
+    return aleatorio.choices(list(pesos), weights=list(pesos.values()))[0]
+
+
+def _pesos_zipf(quantidade, expoente):
+    """Pesos 1/rank^s: poucos itens concentram a maior parte do volume."""
+    return [1 / (posicao ** expoente) for posicao in range(1, quantidade + 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera dados sintéticos (usuários, projetos, membros, categorias e tarefas) com '
+        'distribuição desigual, para testes de carga e benchmark_views.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=50)
+        parser.add_argument('--projetos', type=int, default=200)
+        parser.add_argument('--tarefas', type=int, default=20000)
+        parser.add_argument('--categorias', type=int, default=15)
+        parser.add_argument('--max-membros', type=int, default=15, help='Máximo de membros por projeto.')
+        parser.add_argument(
+            '--assimetria', type=float, default=1.1,
+            help='Expoente Zipf: quanto maior, mais tarefas e projetos se concentram em poucos.'
+        )
+        parser.add_argument('--semente', type=int, default=42, help='Semente do gerador (reprodutível).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--limpar', action='store_true',
+            help=f'Remove antes os usuários "{PREFIXO_USUARIO}*" e os projetos deles.'
+        )
+
+    def handle(self, *args, **options):
+        aleatorio = random.Random(options['semente'])
+        batch_size = options['batch_size']
+        assimetria = options['assimetria']
+
+        with transaction.atomic(), operacao_em_lote():
+            if options['limpar']:
+                self._limpar()
+
+            # Um único hash para todos: o algoritmo de senha é lento de propósito
+            senha = make_password(SENHA_PADRAO)
+            inicio = User.objects.filter(username__startswith=PREFIXO_USUARIO).count()
+            usuarios = User.objects.bulk_create(
+                [
+                    User(
+                        username=f'{PREFIXO_USUARIO}{inicio + indice}',
+                        email=f'{PREFIXO_USUARIO}{inicio + indice}@exemplo.com',
+                        password=senha,
+                    )
+                    for indice in range(options['usuarios'])
+                ],
+                batch_size=batch_size
+            )
+            if not usuarios:
+                self.stdout.write(self.style.WARNING('Nenhum usuário a gerar.'))
+                return
+            # Poucos usuários são responsáveis pela maioria dos projetos
+            pesos_usuarios = _pesos_zipf(len(usuarios), assimetria)
+
+            Categoria.objects.bulk_create(
+                [Categoria(nome=f'Categoria {indice}') for indice in range(options['categorias'])],
+                ignore_conflicts=True
+            )
+            categorias = list(Categoria.objects.all())
+
+            hoje = date.today()
+            agora = timezone.now()
+            projetos = Projeto.objects.bulk_create(
+                [
+                    Projeto(
+                        nome=f'Projeto de carga {indice}',
+                        descricao='Projeto gerado por seed_load_data.',
+                        status=_sortear(aleatorio, PESOS_STATUS_PROJETO),
+                        responsavel=aleatorio.choices(usuarios, weights=pesos_usuarios)[0],
+                        data_inicio=hoje - timedelta(days=aleatorio.randint(0, 365)),
+                    )
+                    for indice in range(options['projetos'])
+                ],
+                batch_size=batch_size
+            )
+
+            equipes = {}
+            for projeto in projetos:
+                tamanho = min(int(aleatorio.paretovariate(1.5)), options['max_membros'], len(usuarios))
+                equipes[projeto.pk] = {projeto.responsavel} | set(aleatorio.sample(usuarios, tamanho))
+
+            Projeto.membros.through.objects.bulk_create(
+                [
+                    Projeto.membros.through(projeto_id=projeto_id, user_id=usuario.pk)
+                    for projeto_id, equipe in equipes.items()
+                    for usuario in equipe
+                ],
+                batch_size=batch_size
+            )
+            # bulk_create não dispara os sinais que mantêm a tabela de acesso
+            AcessoProjeto.objects.bulk_create(
+                [
+                    AcessoProjeto(projeto_id=projeto_id, user_id=usuario.pk)
+                    for projeto_id, equipe in equipes.items()
+                    for usuario in equipe
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True
+            )
+
+            tarefas, categorias_por_tarefa = [], []
+            destinos = aleatorio.choices(
+                projetos, weights=_pesos_zipf(len(projetos), assimetria), k=options['tarefas']
+            )
+            for indice, projeto in enumerate(destinos):
+                status = _sortear(aleatorio, PESOS_STATUS)
+                prioridade = _sortear(aleatorio, PESOS_PRIORIDADE)
+                estimativa = Decimal(aleatorio.randint(1, 80)) / 2
+                tarefas.append(Tarefa(
+                    titulo=f'Tarefa de carga {indice}',
+                    descricao=aleatorio.choice(['', 'Revisar, implementar e testar a funcionalidade.']),
+                    status=status,
+                    prioridade=prioridade,
+                    nivel_prioridade=Tarefa.NIVEL_PRIORIDADE[prioridade],
+                    projeto=projeto,
+                    responsavel=aleatorio.choice(list(equipes[projeto.pk])),
+                    data_limite=(
+                        hoje + timedelta(days=aleatorio.randint(-30, 90))
+                        if aleatorio.random() < 0.8 else None
+                    ),
+                    estimativa_horas=estimativa,
+                    horas_trabalhadas=estimativa if status == 'CONCLUIDA' else Decimal(0),
+                    data_conclusao=agora if status == 'CONCLUIDA' else None,
+                ))
+                categorias_por_tarefa.append(aleatorio.sample(categorias, min(aleatorio.randint(0, 3), len(categorias))))
+
+            Tarefa.objects.bulk_create(tarefas, batch_size=batch_size)
+            Tarefa.categorias.through.objects.bulk_create(
+                [
+                    Tarefa.categorias.through(tarefa_id=tarefa.pk, categoria_id=categoria.pk)
+                    for tarefa, escolhidas in zip(tarefas, categorias_por_tarefa)
+                    for categoria in escolhidas
+                ],
+                batch_size=batch_size
+            )
+
+            apos_alteracao_em_lote({projeto.pk for projeto in projetos}, {usuario.pk for usuario in usuarios})
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(usuarios)} usuário(s), {len(projetos)} projeto(s) e {len(tarefas)} tarefa(s) '
+            f'gerados. Senha dos usuários: {SENHA_PADRAO}'
+        ))
+
+    def _limpar(self):
+        usuarios = User.objects.filter(username__startswith=PREFIXO_USUARIO)
+        Projeto.objects.filter(responsavel__in=usuarios).delete()
+        usuarios.delete()
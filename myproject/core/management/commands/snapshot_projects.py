@@ -0,0 +1,40 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.retratos import atualizar_retratos
+
+
+class Command(BaseCommand):
+    help = (
+        'Grava o retrato diário dos projetos (contadores por status e horas) para os '
+        'gráficos de burndown e vazão. Rode periodicamente (ex.: a cada hora); os dias '
+        'que ficaram sem retrato são reconstruídos a partir das tarefas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde', default=None,
+            help='Reconstrói os dias sem retrato a partir desta data (AAAA-MM-DD).'
+        )
+        parser.add_argument(
+            '--dias', type=int, default=None,
+            help='Reconstrói os dias sem retrato dos últimos N dias.'
+        )
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['desde']:
+            try:
+                desde = date.fromisoformat(options['desde'])
+            except ValueError:
+                raise CommandError('Use --desde no formato AAAA-MM-DD.')
+        elif options['dias']:
+            desde = timezone.localdate() - timedelta(days=options['dias'])
+
+        dias = atualizar_retratos(
+            desde,
+            progresso=lambda data, projetos: self.stdout.write(f'{data:%d/%m/%Y}: {projetos} projeto(s)'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'{dias} dia(s) gravado(s).'))
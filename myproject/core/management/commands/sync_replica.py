@@ -0,0 +1,38 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copia o banco SQLite principal para as réplicas locais (BANCO_REPLICA_SQLITE=1), '
+        'simulando a replicação para testar o roteamento de leituras.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo', type=float, default=None,
+            help='Repete a cópia a cada N segundos (atraso de replicação simulado).'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.BANCO_REPLICAS:
+            raise CommandError('Nenhuma réplica configurada. Use BANCO_REPLICA_SQLITE=1.')
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Só para SQLite; no PostgreSQL a replicação é feita pelo próprio banco.')
+
+        while True:
+            for alias in settings.BANCO_REPLICAS:
+                self.copiar(connections['default'].settings_dict['NAME'], connections[alias].settings_dict['NAME'])
+                self.stdout.write(f'{alias} atualizada.')
+            if options['intervalo'] is None:
+                break
+            time.sleep(options['intervalo'])
+
+    def copiar(self, origem, destino):
+        # API de backup do SQLite: cópia consistente mesmo com o principal em uso
+        with sqlite3.connect(origem) as principal, sqlite3.connect(destino) as replica:
+            principal.backup(replica)
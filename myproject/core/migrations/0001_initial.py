@@ -0,0 +1,91 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Categoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, unique=True, verbose_name='Nome')),
+                ('descricao', models.TextField(blank=True, null=True, verbose_name='Descrição')),
+                ('cor', models.CharField(default='#007bff', max_length=7, verbose_name='Cor (hex)')),
+            ],
+            options={
+                'verbose_name': 'Categoria',
+                'verbose_name_plural': 'Categorias',
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PerfilUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('telefone', models.CharField(blank=True, max_length=20, null=True, verbose_name='Telefone')),
+                ('cargo', models.CharField(blank=True, max_length=100, null=True, verbose_name='Cargo')),
+                ('departamento', models.CharField(blank=True, max_length=100, null=True, verbose_name='Departamento')),
+                ('foto', models.ImageField(blank=True, null=True, upload_to='perfis/', verbose_name='Foto')),
+                ('bio', models.TextField(blank=True, null=True, verbose_name='Biografia')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='perfil', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Perfil de Usuário',
+                'verbose_name_plural': 'Perfis de Usuários',
+            },
+        ),
+        migrations.CreateModel(
+            name='Projeto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=200, verbose_name='Nome do Projeto')),
+                ('descricao', models.TextField(blank=True, null=True, verbose_name='Descrição')),
+                ('status', models.CharField(choices=[('PLANEJAMENTO', 'Planejamento'), ('EM_ANDAMENTO', 'Em Andamento'), ('CONCLUIDO', 'Concluído'), ('CANCELADO', 'Cancelado')], default='PLANEJAMENTO', max_length=20, verbose_name='Status')),
+                ('data_inicio', models.DateField(verbose_name='Data de Início')),
+                ('data_fim', models.DateField(blank=True, null=True, verbose_name='Data de Término')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('membros', models.ManyToManyField(blank=True, related_name='projetos_membro', to=settings.AUTH_USER_MODEL, verbose_name='Membros')),
+                ('responsavel', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='projetos_responsavel', to=settings.AUTH_USER_MODEL, verbose_name='Responsável')),
+            ],
+            options={
+                'verbose_name': 'Projeto',
+                'verbose_name_plural': 'Projetos',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Tarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titulo', models.CharField(max_length=200, verbose_name='Título')),
+                ('descricao', models.TextField(blank=True, null=True, verbose_name='Descrição')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('EM_ANDAMENTO', 'Em Andamento'), ('CONCLUIDA', 'Concluída'), ('CANCELADA', 'Cancelada')], default='PENDENTE', max_length=20, verbose_name='Status')),
+                ('prioridade', models.CharField(choices=[('BAIXA', 'Baixa'), ('MEDIA', 'Média'), ('ALTA', 'Alta'), ('URGENTE', 'Urgente')], default='MEDIA', max_length=10, verbose_name='Prioridade')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('data_limite', models.DateField(blank=True, null=True, verbose_name='Data Limite')),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True, verbose_name='Data de Conclusão')),
+                ('estimativa_horas', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Estimativa (horas)')),
+                ('horas_trabalhadas', models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='Horas Trabalhadas')),
+                ('categorias', models.ManyToManyField(blank=True, related_name='tarefas', to='core.categoria', verbose_name='Categorias')),
+                ('projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tarefas', to='core.projeto', verbose_name='Projeto')),
+                ('responsavel', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tarefas_responsavel', to=settings.AUTH_USER_MODEL, verbose_name='Responsável')),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projeto',
+            name='contador_canceladas',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tarefas Canceladas'),
+        ),
+        migrations.AddField(
+            model_name='projeto',
+            name='contador_concluidas',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tarefas Concluídas'),
+        ),
+        migrations.AddField(
+            model_name='projeto',
+            name='contador_em_andamento',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tarefas em Andamento'),
+        ),
+        migrations.AddField(
+            model_name='projeto',
+            name='contador_pendentes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tarefas Pendentes'),
+        ),
+        migrations.AddField(
+            model_name='projeto',
+            name='contador_tarefas',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de Tarefas'),
+        ),
+        migrations.AddField(
+            model_name='projeto',
+            name='total_horas_estimadas',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10, verbose_name='Horas Estimadas'),
+        ),
+        migrations.AddField(
+            model_name='projeto',
+            name='total_horas_trabalhadas',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10, verbose_name='Horas Trabalhadas'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_contadores_projeto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AcessoProjeto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='acessos', to='core.projeto', verbose_name='Projeto')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='acessos_projeto', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Acesso a Projeto',
+                'verbose_name_plural': 'Acessos a Projetos',
+                'constraints': [models.UniqueConstraint(fields=('user', 'projeto'), name='core_acesso_user_projeto_uniq')],
+            },
+        ),
+    ]
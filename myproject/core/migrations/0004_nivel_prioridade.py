@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_acessoprojeto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarefa',
+            name='nivel_prioridade',
+            field=models.PositiveSmallIntegerField(default=2, editable=False, verbose_name='Nível de Prioridade'),
+        ),
+        migrations.AddIndex(
+            model_name='projeto',
+            index=models.Index(fields=['-data_criacao'], name='core_projeto_criacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projeto',
+            index=models.Index(fields=['nome'], name='core_projeto_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['status', 'nivel_prioridade', 'data_limite'], name='core_tarefa_status_prio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['projeto', 'status'], name='core_tarefa_projeto_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['responsavel', 'status'], name='core_tarefa_resp_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['-data_criacao'], name='core_tarefa_criacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['nivel_prioridade'], name='core_tarefa_nivel_prio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['data_limite'], name='core_tarefa_data_limite_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['titulo'], name='core_tarefa_titulo_idx'),
+        ),
+    ]
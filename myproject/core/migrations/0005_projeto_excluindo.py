@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_nivel_prioridade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projeto',
+            name='excluindo',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Em exclusão'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_projeto_excluindo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabalho',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome')),
+                ('argumentos', models.JSONField(blank=True, default=dict, verbose_name='Argumentos')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('EXECUTANDO', 'Executando'), ('CONCLUIDO', 'Concluído'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=20, verbose_name='Status')),
+                ('prioridade', models.SmallIntegerField(default=0, verbose_name='Prioridade')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('max_tentativas', models.PositiveSmallIntegerField(default=3, verbose_name='Máximo de Tentativas')),
+                ('disponivel_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponível em')),
+                ('erro', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+            ],
+            options={
+                'verbose_name': 'Trabalho em Segundo Plano',
+                'verbose_name_plural': 'Trabalhos em Segundo Plano',
+                'ordering': ['-data_criacao'],
+                'indexes': [models.Index(fields=['status', 'disponivel_em', '-prioridade'], name='core_trabalho_fila_idx')],
+            },
+        ),
+    ]
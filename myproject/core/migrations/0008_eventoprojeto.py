@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_perfil_miniaturas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoProjeto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('projeto_id', models.PositiveBigIntegerField(verbose_name='Projeto')),
+                ('tipo', models.CharField(max_length=30, verbose_name='Tipo')),
+                ('dados', models.JSONField(blank=True, default=dict, verbose_name='Dados')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Evento de Projeto',
+                'verbose_name_plural': 'Eventos de Projeto',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
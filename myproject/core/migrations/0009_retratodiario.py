@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_eventoprojeto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetratoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('tarefas', models.PositiveIntegerField(default=0, verbose_name='Total de Tarefas')),
+                ('pendentes', models.PositiveIntegerField(default=0, verbose_name='Pendentes')),
+                ('em_andamento', models.PositiveIntegerField(default=0, verbose_name='Em Andamento')),
+                ('concluidas', models.PositiveIntegerField(default=0, verbose_name='Concluídas')),
+                ('canceladas', models.PositiveIntegerField(default=0, verbose_name='Canceladas')),
+                ('horas_estimadas', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Horas Estimadas')),
+                ('horas_trabalhadas', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Horas Trabalhadas')),
+                ('reconstruido', models.BooleanField(default=False, verbose_name='Reconstruído')),
+                ('projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='retratos', to='core.projeto', verbose_name='Projeto')),
+            ],
+            options={
+                'verbose_name': 'Retrato Diário do Projeto',
+                'verbose_name_plural': 'Retratos Diários dos Projetos',
+                'ordering': ['projeto', 'data'],
+                'constraints': [models.UniqueConstraint(fields=('projeto', 'data'), name='core_retrato_projeto_data_uniq')],
+            },
+        ),
+    ]
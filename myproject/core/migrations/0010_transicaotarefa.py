@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_retratodiario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransicaoTarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campo', models.PositiveSmallIntegerField(choices=[(1, 'Status'), (2, 'Prioridade'), (3, 'Responsável')], verbose_name='Campo')),
+                ('valor_anterior', models.CharField(blank=True, max_length=20, verbose_name='De')),
+                ('valor_novo', models.CharField(blank=True, max_length=20, verbose_name='Para')),
+                ('data', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Data')),
+                ('tarefa', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='transicoes', to='core.tarefa', verbose_name='Tarefa')),
+            ],
+            options={
+                'verbose_name': 'Transição de Tarefa',
+                'verbose_name_plural': 'Transições de Tarefas',
+                'ordering': ['data'],
+                'indexes': [models.Index(fields=['tarefa', 'campo', 'data'], name='core_transicao_tarefa_idx')],
+            },
+        ),
+    ]
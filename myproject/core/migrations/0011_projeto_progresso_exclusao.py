@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_transicaotarefa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projeto',
+            name='exclusao_removidas',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tarefas Removidas'),
+        ),
+        migrations.AddField(
+            model_name='projeto',
+            name='exclusao_total',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tarefas a Remover'),
+        ),
+    ]
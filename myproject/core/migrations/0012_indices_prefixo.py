@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+# Índices sobre lower(coluna) para o autocomplete por prefixo sem diferenciar
+# maiúsculas (core.busca.filtrar_prefixo). No PostgreSQL, text_pattern_ops
+# deixa o LIKE 'prefixo%' usar o índice em qualquer collation.
+INDICES = (
+    ('core_auth_user_username_lower', 'auth_user', 'username'),
+    ('core_categoria_nome_lower', 'core_categoria', 'nome'),
+)
+
+
+def criar_indices(apps, schema_editor):
+    conexao = schema_editor.connection
+    classe = ' text_pattern_ops' if conexao.vendor == 'postgresql' else ''
+    for nome, tabela, coluna in INDICES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nome} ON {tabela} (lower({coluna}){classe})'
+        )
+
+
+def remover_indices(apps, schema_editor):
+    for nome, _, _ in INDICES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nome}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0011_projeto_progresso_exclusao'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_indices_prefixo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InteresseProjeto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('projeto_id', models.PositiveBigIntegerField(unique=True, verbose_name='Projeto')),
+                ('valido_ate', models.DateTimeField(db_index=True, verbose_name='Válido até')),
+            ],
+            options={
+                'verbose_name': 'Interesse em Projeto',
+                'verbose_name_plural': 'Interesses em Projetos',
+            },
+        ),
+    ]
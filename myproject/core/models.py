@@ -1,4 +1,9 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.urls import reverse
 
@@ -17,6 +22,61 @@ class Categoria(models.Model):
         return self.nome
 
 
+class OrdenavelQuerySet(models.QuerySet):
+    def ordenar(self, ordem):
+        """Aplica uma das ordenações de ORDENACOES do modelo.
+
+        Valores fora da lista (vindos de ?ordem=) usam a ordenação padrão, o
+        que garante que toda ordenação servida tem um índice correspondente.
+        """
+        ordenacoes = self.model.ORDENACOES
+        return self.order_by(*ordenacoes.get(ordem, ordenacoes[self.model.ORDENACAO_PADRAO]))
+
+
+class ProjetoQuerySet(OrdenavelQuerySet):
+    def visiveis_para(self, user):
+        """Projetos em que o usuário é responsável ou membro."""
+        return self.filter(pk__in=AcessoProjeto.objects.projetos_de(user))
+    
+    def buscar(self, texto):
+        """Busca textual em nome/descrição; anota `relevancia`."""
+        from .busca import buscar
+        return buscar(self, texto)
+    
+    def recalcular_contadores(self, batch_size=500):
+        """Reconstrói os contadores de tarefas dos projetos do queryset.
+
+        Cada lote de `batch_size` projetos é um único UPDATE ... SET campo =
+        (subconsulta agrupada sobre Tarefa): a contagem e a gravação são o
+        mesmo comando, então um delta de F() confirmado por outra conexão
+        não se perde entre a leitura e a escrita. Retorna o número de
+        projetos atualizados.
+        """
+        zero = models.Value(0, output_field=models.DecimalField(max_digits=10, decimal_places=2))
+        
+        def agregado(expressao, vazio=0):
+            subconsulta = (
+                Tarefa.objects.filter(projeto=models.OuterRef('pk')).order_by()
+                .values('projeto').annotate(valor=expressao).values('valor')
+            )
+            return Coalesce(models.Subquery(subconsulta), vazio)
+        
+        valores = {
+            'contador_tarefas': agregado(Count('id')),
+            'contador_pendentes': agregado(Count('id', filter=Q(status='PENDENTE'))),
+            'contador_em_andamento': agregado(Count('id', filter=Q(status='EM_ANDAMENTO'))),
+            'contador_concluidas': agregado(Count('id', filter=Q(status='CONCLUIDA'))),
+            'contador_canceladas': agregado(Count('id', filter=Q(status='CANCELADA'))),
+            'total_horas_estimadas': agregado(Sum('estimativa_horas'), zero),
+            'total_horas_trabalhadas': agregado(Sum('horas_trabalhadas'), zero),
+        }
+        
+        ids = list(self.order_by('pk').values_list('pk', flat=True))
+        for inicio in range(0, len(ids), batch_size):
+            Projeto.objects.filter(pk__in=ids[inicio:inicio + batch_size]).update(**valores)
+        return len(ids)
+
+
 class Projeto(models.Model):
     STATUS_CHOICES = [
         ('PLANEJAMENTO', 'Planejamento'),
@@ -50,11 +110,66 @@ class Projeto(models.Model):
     data_fim = models.DateField(blank=True, null=True, verbose_name="Data de Término")
     data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
     data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+    # Marcado na exclusão; as tarefas são removidas depois, em partes (core/exclusao.py)
+    excluindo = models.BooleanField(default=False, editable=False, verbose_name="Em exclusão")
+    # Progresso da exclusão, gravado a cada lote
+    exclusao_removidas = models.PositiveIntegerField(default=0, editable=False, verbose_name="Tarefas Removidas")
+    exclusao_total = models.PositiveIntegerField(default=0, editable=False, verbose_name="Tarefas a Remover")
+    
+    # Contadores desnormalizados (mantidos pelos sinais de Tarefa em core/signals.py)
+    contador_tarefas = models.PositiveIntegerField(default=0, editable=False, verbose_name="Total de Tarefas")
+    contador_pendentes = models.PositiveIntegerField(default=0, editable=False, verbose_name="Tarefas Pendentes")
+    contador_em_andamento = models.PositiveIntegerField(default=0, editable=False, verbose_name="Tarefas em Andamento")
+    contador_concluidas = models.PositiveIntegerField(default=0, editable=False, verbose_name="Tarefas Concluídas")
+    contador_canceladas = models.PositiveIntegerField(default=0, editable=False, verbose_name="Tarefas Canceladas")
+    total_horas_estimadas = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name="Horas Estimadas"
+    )
+    total_horas_trabalhadas = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name="Horas Trabalhadas"
+    )
+    
+    objects = ProjetoQuerySet.as_manager()
+    
+    CAMPOS_CONTADORES = [
+        'contador_tarefas', 'contador_pendentes', 'contador_em_andamento',
+        'contador_concluidas', 'contador_canceladas',
+        'total_horas_estimadas', 'total_horas_trabalhadas',
+    ]
+    
+    # Campo de contador correspondente a cada status de Tarefa
+    CONTADOR_POR_STATUS = {
+        'PENDENTE': 'contador_pendentes',
+        'EM_ANDAMENTO': 'contador_em_andamento',
+        'CONCLUIDA': 'contador_concluidas',
+        'CANCELADA': 'contador_canceladas',
+    }
+    
+    # Valores aceitos em ?ordem= e os campos (indexados) de cada um
+    ORDENACOES = {
+        '-data_criacao': ['-data_criacao'],
+        'data_criacao': ['data_criacao'],
+        'nome': ['nome'],
+        '-nome': ['-nome'],
+    }
+    ORDENACAO_PADRAO = '-data_criacao'
     
     class Meta:
         verbose_name = "Projeto"
         verbose_name_plural = "Projetos"
         ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['-data_criacao'], name='core_projeto_criacao_idx'),
+            models.Index(fields=['nome'], name='core_projeto_nome_idx'),
+        ]
     
     def __str__(self):
         return self.nome
@@ -64,17 +179,93 @@ class Projeto(models.Model):
     
     @property
     def total_tarefas(self):
-        return self.tarefas.count()
+        return self.contador_tarefas
     
     @property
     def tarefas_concluidas(self):
-        return self.tarefas.filter(status='CONCLUIDA').count()
+        return self.contador_concluidas
     
     @property
     def progresso(self):
-        if self.total_tarefas == 0:
+        if self.contador_tarefas == 0:
             return 0
-        return int((self.tarefas_concluidas / self.total_tarefas) * 100)
+        return int((self.contador_concluidas / self.contador_tarefas) * 100)
+    
+    @property
+    def versao_contadores(self):
+        """Muda junto com qualquer contador (os deltas de F() não tocam data_atualizacao)."""
+        return '-'.join(str(getattr(self, campo)) for campo in self.CAMPOS_CONTADORES)
+    
+    @classmethod
+    def aplicar_deltas(cls, deltas):
+        """Aplica incrementos {projeto_id: {campo: delta}} com expressões F().
+
+        O incremento é feito no próprio UPDATE, então escritas concorrentes
+        não se sobrescrevem.
+        """
+        with transaction.atomic():
+            for projeto_id, campos in deltas.items():
+                campos = {campo: F(campo) + delta for campo, delta in campos.items() if delta}
+                if projeto_id and campos:
+                    cls.objects.filter(pk=projeto_id).update(**campos)
+
+
+class AcessoProjetoQuerySet(models.QuerySet):
+    def projetos_de(self, user):
+        """Subconsulta com os IDs dos projetos visíveis para o usuário."""
+        return self.filter(user=user).values('projeto_id')
+    
+    def reconstruir(self, batch_size=1000):
+        """Recria a tabela de acesso a partir de Projeto.responsavel e Projeto.membros."""
+        with transaction.atomic():
+            self.all().delete()
+            # Projetos em exclusão ficam sem acesso (ver core/exclusao.py)
+            pares = set(
+                Projeto.objects.exclude(responsavel=None).filter(excluindo=False)
+                .values_list('responsavel_id', 'pk')
+            )
+            pares.update(
+                Projeto.membros.through.objects.filter(projeto__excluindo=False)
+                .values_list('user_id', 'projeto_id')
+            )
+            self.bulk_create(
+                [AcessoProjeto(user_id=user_id, projeto_id=projeto_id) for user_id, projeto_id in pares],
+                batch_size=batch_size
+            )
+        return len(pares)
+
+
+class AcessoProjeto(models.Model):
+    """Par (usuário, projeto) materializado para filtros de visibilidade.
+
+    Mantido pelos sinais de Projeto.responsavel e Projeto.membros em
+    core/signals.py; permite filtrar por acesso com uma semi-junção indexada
+    em vez de OR + DISTINCT sobre a tabela de membros.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='acessos_projeto',
+        verbose_name="Usuário"
+    )
+    projeto = models.ForeignKey(
+        Projeto,
+        on_delete=models.CASCADE,
+        related_name='acessos',
+        verbose_name="Projeto"
+    )
+    
+    objects = AcessoProjetoQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = "Acesso a Projeto"
+        verbose_name_plural = "Acessos a Projetos"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'projeto'], name='core_acesso_user_projeto_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} → {self.projeto}"
 
 
 class PerfilUsuario(models.Model):
@@ -83,6 +274,8 @@ class PerfilUsuario(models.Model):
     cargo = models.CharField(max_length=100, blank=True, null=True, verbose_name="Cargo")
     departamento = models.CharField(max_length=100, blank=True, null=True, verbose_name="Departamento")
     foto = models.ImageField(upload_to='perfis/', blank=True, null=True, verbose_name="Foto")
+    # {tamanho: {formato: arquivo}}, gerado a partir da foto (core/imagens.py)
+    miniaturas = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Miniaturas")
     bio = models.TextField(blank=True, null=True, verbose_name="Biografia")
     
     class Meta:
@@ -91,6 +284,52 @@ class PerfilUsuario(models.Model):
     
     def __str__(self):
         return f"Perfil de {self.user.username}"
+    
+    @property
+    def urls_miniaturas(self):
+        """URLs das miniaturas para os templates: perfil.urls_miniaturas.64.webp"""
+        storage = self.foto.storage
+        return {
+            tamanho: {formato: storage.url(nome) for formato, nome in formatos.items()}
+            for tamanho, formatos in (self.miniaturas or {}).items()
+        }
+
+
+class TarefaQuerySet(OrdenavelQuerySet):
+    def visiveis_para(self, user):
+        """Tarefas atribuídas ao usuário ou de projetos visíveis para ele."""
+        return self.filter(
+            Q(responsavel=user, projeto__excluindo=False)
+            | Q(projeto_id__in=AcessoProjeto.objects.projetos_de(user))
+        )
+    
+    def buscar(self, texto):
+        """Busca textual em título/descrição; anota `relevancia`."""
+        from .busca import buscar
+        return buscar(self, texto)
+    
+    def recalcular_nivel_prioridade(self):
+        """Regrava nivel_prioridade a partir de prioridade com um único UPDATE."""
+        return self.update(nivel_prioridade=models.Case(
+            *[models.When(prioridade=codigo, then=nivel) for codigo, nivel in Tarefa.NIVEL_PRIORIDADE.items()],
+            default=0
+        ))
+    
+    def preencher_data_conclusao(self):
+        """Acerta data_conclusao das tarefas gravadas antes de ela ser mantida.
+
+        Concluídas sem data recebem a última alteração (a melhor estimativa
+        disponível); as demais ficam sem data. Retorna o número de tarefas
+        alteradas.
+        """
+        with transaction.atomic():
+            concluidas = self.filter(status='CONCLUIDA', data_conclusao__isnull=True).update(
+                data_conclusao=F('data_atualizacao')
+            )
+            reabertas = self.exclude(status='CONCLUIDA').filter(data_conclusao__isnull=False).update(
+                data_conclusao=None
+            )
+        return concluidas + reabertas
 
 
 class Tarefa(models.Model):
@@ -122,6 +361,12 @@ class Tarefa(models.Model):
         default='MEDIA',
         verbose_name="Prioridade"
     )
+    # Posição numérica da prioridade (os códigos não ordenam corretamente como texto)
+    nivel_prioridade = models.PositiveSmallIntegerField(
+        default=2,
+        editable=False,
+        verbose_name="Nível de Prioridade"
+    )
     
     # Relacionamentos
     projeto = models.ForeignKey(
@@ -165,10 +410,40 @@ class Tarefa(models.Model):
         verbose_name="Horas Trabalhadas"
     )
     
+    objects = TarefaQuerySet.as_manager()
+    
+    NIVEL_PRIORIDADE = {
+        'BAIXA': 1,
+        'MEDIA': 2,
+        'ALTA': 3,
+        'URGENTE': 4,
+    }
+    
+    # Valores aceitos em ?ordem= e os campos (indexados) de cada um
+    ORDENACOES = {
+        '-data_criacao': ['-data_criacao'],
+        'data_criacao': ['data_criacao'],
+        'titulo': ['titulo'],
+        '-prioridade': ['-nivel_prioridade'],
+        'prioridade': ['nivel_prioridade'],
+        'data_limite': ['data_limite'],
+    }
+    ORDENACAO_PADRAO = '-data_criacao'
+    
     class Meta:
         verbose_name = "Tarefa"
         verbose_name_plural = "Tarefas"
         ordering = ['-data_criacao']
+        indexes = [
+            # Filtro por status ordenado por prioridade (dashboard e lista)
+            models.Index(fields=['status', 'nivel_prioridade', 'data_limite'], name='core_tarefa_status_prio_idx'),
+            models.Index(fields=['projeto', 'status'], name='core_tarefa_projeto_status_idx'),
+            models.Index(fields=['responsavel', 'status'], name='core_tarefa_resp_status_idx'),
+            models.Index(fields=['-data_criacao'], name='core_tarefa_criacao_idx'),
+            models.Index(fields=['nivel_prioridade'], name='core_tarefa_nivel_prio_idx'),
+            models.Index(fields=['data_limite'], name='core_tarefa_data_limite_idx'),
+            models.Index(fields=['titulo'], name='core_tarefa_titulo_idx'),
+        ]
     
     def __str__(self):
         return self.titulo
@@ -176,9 +451,209 @@ class Tarefa(models.Model):
     def get_absolute_url(self):
         return reverse('tarefa_detail', kwargs={'pk': self.pk})
     
+    def save(self, *args, **kwargs):
+        self.nivel_prioridade = self.NIVEL_PRIORIDADE.get(self.prioridade, 0)
+        self.ajustar_data_conclusao()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'prioridade' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'nivel_prioridade'}
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'data_conclusao'}
+        
+        # A gravação e a atualização dos contadores do projeto ficam na mesma transação
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+    
+    def ajustar_data_conclusao(self, agora=None):
+        """Preenche data_conclusao ao concluir e a limpa quando a tarefa é reaberta."""
+        if self.status != 'CONCLUIDA':
+            self.data_conclusao = None
+        elif self.data_conclusao is None:
+            self.data_conclusao = agora or timezone.now()
+    
+    def contribuicao_contadores(self):
+        """Parcela desta tarefa nos contadores do projeto."""
+        return Tarefa.calcular_contribuicao(
+            self.status, self.estimativa_horas, self.horas_trabalhadas
+        )
+    
+    @staticmethod
+    def calcular_contribuicao(status, estimativa_horas, horas_trabalhadas):
+        contribuicao = {
+            'contador_tarefas': 1,
+            'total_horas_estimadas': Decimal(str(estimativa_horas or 0)),
+            'total_horas_trabalhadas': Decimal(str(horas_trabalhadas or 0)),
+        }
+        campo_status = Projeto.CONTADOR_POR_STATUS.get(status)
+        if campo_status:
+            contribuicao[campo_status] = 1
+        return contribuicao
+    
     @property
     def atrasada(self):
         from datetime import date
         if self.data_limite and self.status != 'CONCLUIDA':
             return date.today() > self.data_limite
         return False
+
+
+class Trabalho(models.Model):
+    """Trabalho em segundo plano da fila em banco (core/fila.py)."""
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('EXECUTANDO', 'Executando'),
+        ('CONCLUIDO', 'Concluído'),
+        ('FALHOU', 'Falhou'),
+    ]
+    
+    nome = models.CharField(max_length=100, verbose_name="Nome")
+    argumentos = models.JSONField(default=dict, blank=True, verbose_name="Argumentos")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='PENDENTE',
+        verbose_name="Status"
+    )
+    # Maior primeiro
+    prioridade = models.SmallIntegerField(default=0, verbose_name="Prioridade")
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    max_tentativas = models.PositiveSmallIntegerField(default=3, verbose_name="Máximo de Tentativas")
+    # Quando pode ser reservado: atraso, espera entre tentativas ou, se
+    # EXECUTANDO, fim do prazo de visibilidade do trabalhador que o reservou
+    disponivel_em = models.DateTimeField(default=timezone.now, verbose_name="Disponível em")
+    erro = models.TextField(blank=True, verbose_name="Último Erro")
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    data_conclusao = models.DateTimeField(blank=True, null=True, verbose_name="Concluído em")
+    
+    class Meta:
+        verbose_name = "Trabalho em Segundo Plano"
+        verbose_name_plural = "Trabalhos em Segundo Plano"
+        ordering = ['-data_criacao']
+        indexes = [
+            # Busca do próximo trabalho: status + disponível, por prioridade
+            models.Index(fields=['status', 'disponivel_em', '-prioridade'], name='core_trabalho_fila_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.nome} #{self.pk} ({self.get_status_display()})"
+
+
+class EventoProjeto(models.Model):
+    """Evento ao vivo de um projeto no barramento em banco (core/eventos.py)."""
+    # Sem chave estrangeira: o evento pode sobreviver ao projeto por alguns segundos
+    projeto_id = models.PositiveBigIntegerField(verbose_name="Projeto")
+    tipo = models.CharField(max_length=30, verbose_name="Tipo")
+    dados = models.JSONField(default=dict, blank=True, verbose_name="Dados")
+    data_criacao = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Criado em")
+    
+    class Meta:
+        verbose_name = "Evento de Projeto"
+        verbose_name_plural = "Eventos de Projeto"
+        ordering = ['pk']
+    
+    def __str__(self):
+        return f"{self.tipo} (projeto {self.projeto_id})"
+
+
+class InteresseProjeto(models.Model):
+    """Projeto com assinantes no barramento em banco (core/eventos.py).
+
+    Renovado pelo processo que atende as conexões enquanto elas durarem;
+    sem uma linha válida, ninguém grava eventos do projeto.
+    """
+    projeto_id = models.PositiveBigIntegerField(unique=True, verbose_name="Projeto")
+    valido_ate = models.DateTimeField(db_index=True, verbose_name="Válido até")
+    
+    class Meta:
+        verbose_name = "Interesse em Projeto"
+        verbose_name_plural = "Interesses em Projetos"
+    
+    def __str__(self):
+        return f"projeto {self.projeto_id} até {self.valido_ate:%H:%M:%S}"
+
+
+class RetratoDiario(models.Model):
+    """Contadores de um projeto ao fim de um dia, para os gráficos de
+    burndown e vazão (core/retratos.py)."""
+    projeto = models.ForeignKey(
+        Projeto,
+        on_delete=models.CASCADE,
+        related_name='retratos',
+        verbose_name="Projeto"
+    )
+    data = models.DateField(verbose_name="Data")
+    tarefas = models.PositiveIntegerField(default=0, verbose_name="Total de Tarefas")
+    pendentes = models.PositiveIntegerField(default=0, verbose_name="Pendentes")
+    em_andamento = models.PositiveIntegerField(default=0, verbose_name="Em Andamento")
+    concluidas = models.PositiveIntegerField(default=0, verbose_name="Concluídas")
+    canceladas = models.PositiveIntegerField(default=0, verbose_name="Canceladas")
+    horas_estimadas = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Horas Estimadas")
+    horas_trabalhadas = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Horas Trabalhadas")
+    # Dia preenchido depois, a partir das datas das tarefas, e não dos contadores do dia
+    reconstruido = models.BooleanField(default=False, verbose_name="Reconstruído")
+    
+    # Campo do retrato -> contador de Projeto com o mesmo valor
+    CONTADORES = {
+        'tarefas': 'contador_tarefas',
+        'pendentes': 'contador_pendentes',
+        'em_andamento': 'contador_em_andamento',
+        'concluidas': 'contador_concluidas',
+        'canceladas': 'contador_canceladas',
+        'horas_estimadas': 'total_horas_estimadas',
+        'horas_trabalhadas': 'total_horas_trabalhadas',
+    }
+    
+    class Meta:
+        verbose_name = "Retrato Diário do Projeto"
+        verbose_name_plural = "Retratos Diários dos Projetos"
+        ordering = ['projeto', 'data']
+        constraints = [
+            # Também é o índice das consultas dos gráficos (projeto + intervalo de datas)
+            models.UniqueConstraint(fields=['projeto', 'data'], name='core_retrato_projeto_data_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.projeto_id} em {self.data:%d/%m/%Y}"
+
+
+
+class TransicaoTarefa(models.Model):
+    """Mudança de status, prioridade ou responsável de uma tarefa. O histórico
+    só recebe inclusões (core/historico.py)."""
+    STATUS = 1
+    PRIORIDADE = 2
+    RESPONSAVEL = 3
+    CAMPO_CHOICES = [
+        (STATUS, 'Status'),
+        (PRIORIDADE, 'Prioridade'),
+        (RESPONSAVEL, 'Responsável'),
+    ]
+    
+    # Sem o índice próprio da chave estrangeira: o índice composto começa por ela
+    tarefa = models.ForeignKey(
+        Tarefa,
+        on_delete=models.CASCADE,
+        related_name='transicoes',
+        db_index=False,
+        verbose_name="Tarefa"
+    )
+    campo = models.PositiveSmallIntegerField(choices=CAMPO_CHOICES, verbose_name="Campo")
+    # Código do status/prioridade ou id do responsável; vazio quando não havia
+    valor_anterior = models.CharField(max_length=20, blank=True, verbose_name="De")
+    valor_novo = models.CharField(max_length=20, blank=True, verbose_name="Para")
+    data = models.DateTimeField(default=timezone.now, verbose_name="Data")
+    
+    class Meta:
+        verbose_name = "Transição de Tarefa"
+        verbose_name_plural = "Transições de Tarefas"
+        ordering = ['data']
+        indexes = [
+            models.Index(fields=['tarefa', 'campo', 'data'], name='core_transicao_tarefa_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_campo_display()}: {self.valor_anterior or '-'} -> {self.valor_novo or '-'}"
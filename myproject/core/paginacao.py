@@ -0,0 +1,171 @@
+import logging
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+
+
+# Paginação por cursor (keyset).
+#
+# Em vez de OFFSET + COUNT, cada página continua a partir do último item da
+# página anterior: WHERE (campo, id) > (valor, id) ORDER BY campo, id LIMIT n.
+# O custo de uma página profunda é o mesmo da primeira; em troca não há
+# total de páginas nem salto para uma página arbitrária.
+#
+# A condição é escrita como campo >= valor AND (campo > valor OR id > id0),
+# que o banco resolve como uma faixa do índice. Campos anuláveis
+# (data_limite) entram com os nulos depois de todos os valores na ordem
+# crescente (NULLS LAST) e antes deles na decrescente (NULLS FIRST); os nulos
+# são um trecho à parte, lido com uma segunda consulta só quando a página o
+# alcança. Ordenações sem chave (relevância da busca) ficam no OFFSET, com um
+# registro no logger core.paginacao.
+
+logger = logging.getLogger('core.paginacao')
+
+SALT_CURSOR = 'core.paginacao.cursor'
+
+
+class PaginaCursor:
+    def __init__(self, objetos, proximo=None, anterior=None):
+        self.objetos = objetos
+        self.proximo = proximo
+        self.anterior = anterior
+
+
+def _campo_ordenacao(queryset):
+    """Campo usado na ordenação, se ele servir como chave do cursor."""
+    ordem = queryset.query.order_by
+    if len(ordem) != 1 or not isinstance(ordem[0], str):
+        return None, None
+    nome = ordem[0].lstrip('-')
+    try:
+        campo = queryset.model._meta.get_field(nome)
+    except FieldDoesNotExist:
+        return None, None
+    if not campo.concrete or campo.is_relation:
+        return None, None
+    return campo, ordem[0].startswith('-')
+
+
+def _gerar_token(campo, ordem, objeto, direcao):
+    return signing.dumps(
+        {
+            'o': ordem,
+            'v': None if campo.value_from_object(objeto) is None else campo.value_to_string(objeto),
+            'pk': objeto.pk,
+            'd': direcao,
+        },
+        salt=SALT_CURSOR,
+        compress=True,
+    )
+
+
+def _ler_token(token, ordem):
+    if not token:
+        return None
+    try:
+        dados = signing.loads(token, salt=SALT_CURSOR)
+    except signing.BadSignature:
+        return None
+    # Cursor gerado para outra ordenação não vale para esta
+    if dados.get('o') != ordem:
+        return None
+    return dados
+
+
+def _trechos(campo, valor, pk, decrescente):
+    """Condições dos itens depois de (valor, pk), na ordem percorrida.
+
+    Cada trecho é uma faixa do índice; os nulos de um campo anulável ficam
+    num trecho à parte, lido só se a página não se completar antes dele.
+    """
+    operador = 'lt' if decrescente else 'gt'
+    if valor is None:
+        trechos = [Q(**{f'{campo.name}__isnull': True, f'pk__{operador}': pk})]
+        if decrescente:
+            trechos.append(Q(**{f'{campo.name}__isnull': False}))
+        return trechos
+    trechos = [Q(**{f'{campo.name}__{operador}e': valor}) & (
+        Q(**{f'{campo.name}__{operador}': valor}) | Q(**{f'pk__{operador}': pk})
+    )]
+    if campo.null and not decrescente:
+        trechos.append(Q(**{f'{campo.name}__isnull': True}))
+    return trechos
+
+
+def paginar_por_cursor(queryset, tamanho, token=None):
+    """Retorna uma PaginaCursor, ou None se a ordenação não suportar cursor."""
+    campo, decrescente = _campo_ordenacao(queryset)
+    if campo is None:
+        logger.info(
+            'Ordenação %s de %s sem chave de cursor; usando OFFSET.',
+            list(queryset.query.order_by), queryset.model._meta.label,
+        )
+        return None
+
+    ordem = queryset.query.order_by[0]
+    dados = _ler_token(token, ordem)
+    voltando = bool(dados) and dados['d'] == 'anterior'
+
+    # Para voltar, percorre na ordem inversa e depois desinverte a página
+    percorre_decrescente = decrescente != voltando
+    if percorre_decrescente:
+        queryset = queryset.order_by(F(campo.name).desc(nulls_first=campo.null or None), '-pk')
+    else:
+        queryset = queryset.order_by(F(campo.name).asc(nulls_last=campo.null or None), 'pk')
+
+    if dados:
+        valor = None if dados['v'] is None else campo.to_python(dados['v'])
+        trechos = _trechos(campo, valor, dados['pk'], percorre_decrescente)
+    else:
+        trechos = [Q()]
+    objetos = []
+    for condicao in trechos:
+        objetos += queryset.filter(condicao)[:tamanho + 1 - len(objetos)]
+        if len(objetos) > tamanho:
+            break
+    ha_mais = len(objetos) > tamanho
+    objetos = objetos[:tamanho]
+    if voltando:
+        objetos.reverse()
+
+    tem_proxima = True if voltando else ha_mais
+    tem_anterior = ha_mais if voltando else bool(dados)
+    if not objetos:
+        return PaginaCursor(objetos)
+    return PaginaCursor(
+        objetos,
+        proximo=_gerar_token(campo, ordem, objetos[-1], 'proximo') if tem_proxima else None,
+        anterior=_gerar_token(campo, ordem, objetos[0], 'anterior') if tem_anterior else None,
+    )
+
+
+class PaginacaoCursorMixin:
+    """Ativa a paginação por cursor em uma ListView com ?paginacao=cursor.
+
+    Sem o parâmetro, ou quando a ordenação atual não serve como chave do
+    cursor (ex.: relevância da busca), a paginação por número de página
+    continua valendo.
+    """
+    parametro_cursor = 'cursor'
+
+    def usar_paginacao_cursor(self):
+        return (
+            self.request.GET.get('paginacao') == 'cursor'
+            or self.parametro_cursor in self.request.GET
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        self.pagina_cursor = None
+        if self.usar_paginacao_cursor():
+            self.pagina_cursor = paginar_por_cursor(
+                queryset, page_size, self.request.GET.get(self.parametro_cursor)
+            )
+        if self.pagina_cursor is None:
+            return super().paginate_queryset(queryset, page_size)
+        return (None, None, self.pagina_cursor.objetos, False)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['pagina_cursor'] = getattr(self, 'pagina_cursor', None)
+        return context
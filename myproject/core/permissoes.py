@@ -0,0 +1,74 @@
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.db.models import Exists, OuterRef
+from django.http import Http404
+
+from .models import AcessoProjeto, Projeto, Tarefa
+
+
+# Nível de acesso de um usuário a um projeto ou tarefa.
+#
+# Projeto: o responsável é dono (edita e exclui); membros só leem.
+# Tarefa: quem tem acesso ao projeto (ou é o responsável pela tarefa) edita e
+# exclui, como na API; o responsável pelo projeto é dono.
+# Sem acesso, o objeto "não existe" (404), como em visiveis_para().
+
+NENHUM, LEITURA, EDICAO, DONO = range(4)
+
+
+def nivel_acesso(objeto, user):
+    """Nível de `user` em um objeto buscado por AcessoObjetoMixin (com `tem_acesso`)."""
+    projeto = objeto.projeto if isinstance(objeto, Tarefa) else objeto
+    if projeto.excluindo:
+        return NENHUM
+    if isinstance(objeto, Tarefa):
+        if objeto.projeto.responsavel_id == user.pk:
+            return DONO
+        if objeto.tem_acesso or objeto.responsavel_id == user.pk:
+            return EDICAO
+        return NENHUM
+    if objeto.responsavel_id == user.pk:
+        return DONO
+    return LEITURA if objeto.tem_acesso else NENHUM
+
+
+class AcessoObjetoMixin(UserPassesTestMixin):
+    """Busca o objeto da view uma única vez por requisição, já com o nível de
+    acesso do usuário (uma consulta com select_related e um EXISTS em
+    AcessoProjeto), e exige `nivel_exigido` no test_func.
+
+    get_object() devolve o mesmo objeto para o test_func, para a view e para
+    partes_validador(); o nível fica em self.acesso.
+    """
+    nivel_exigido = LEITURA
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        acessos = AcessoProjeto.objects.filter(user=self.request.user)
+        if queryset.model is Tarefa:
+            return queryset.select_related('projeto', 'responsavel').annotate(
+                tem_acesso=Exists(acessos.filter(projeto_id=OuterRef('projeto_id')))
+            )
+        return queryset.select_related('responsavel').annotate(
+            tem_acesso=Exists(acessos.filter(projeto_id=OuterRef('pk')))
+        )
+
+    def get_object(self, queryset=None):
+        if queryset is None and getattr(self, '_objeto', None) is not None:
+            return self._objeto
+        objeto = super().get_object(queryset)
+        if queryset is None:
+            self.acesso = nivel_acesso(objeto, self.request.user)
+            if self.acesso == NENHUM:
+                raise Http404('Não encontrado.')
+            self._objeto = objeto
+        return objeto
+
+    def test_func(self):
+        self.get_object()
+        return self.acesso >= self.nivel_exigido
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Botões de editar/excluir só para quem pode usá-los
+        context['pode_editar'] = self.acesso >= (DONO if self.model is Projeto else EDICAO)
+        return context
@@ -0,0 +1,141 @@
+from datetime import datetime, time, timedelta
+
+from django.db import models, transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Projeto, RetratoDiario, Tarefa
+
+
+# Retratos diários dos projetos (gráficos de burndown e vazão).
+#
+# registrar_retratos() copia os contadores que os sinais já mantêm em
+# Projeto, para todos os projetos de uma vez: uma consulta, sem ler as
+# tarefas. O comando snapshot_projects faz isso periodicamente; o retrato do
+# dia é sobrescrito a cada execução, então vale o último do dia.
+#
+# Dias sem retrato (o comando não rodou, ou são anteriores a ele) são
+# reconstruídos a partir das datas das tarefas, uma consulta agrupada por
+# dia. As horas trabalhadas desses dias são os valores atuais, por falta de
+# histórico, e a linha fica marcada como `reconstruido`.
+#
+# Os gráficos leem uma linha por dia (serie_projeto()), nunca as tarefas.
+
+
+def registrar_retratos(data=None, batch_size=500):
+    """Grava (ou atualiza) o retrato de `data` (padrão: hoje) com os contadores atuais."""
+    data = data or timezone.localdate()
+    contadores = RetratoDiario.CONTADORES
+    retratos = [
+        RetratoDiario(
+            projeto_id=linha['pk'],
+            data=data,
+            **{campo: linha[contador] for campo, contador in contadores.items()}
+        )
+        for linha in Projeto.objects.filter(excluindo=False).order_by().values('pk', *contadores.values())
+    ]
+    RetratoDiario.objects.bulk_create(
+        retratos,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['projeto', 'data'],
+        update_fields=[*contadores, 'reconstruido'],
+    )
+    return len(retratos)
+
+
+def reconstruir_retratos(data, batch_size=500):
+    """Retratos de um dia passado a partir das datas das tarefas.
+
+    Uma tarefa conta se foi criada até o fim do dia, e como concluída se a
+    conclusão (data_conclusao ou, nas antigas, a última alteração) também foi;
+    senão, com o status atual. Não substitui retratos registrados.
+    """
+    limite = timezone.make_aware(datetime.combine(data + timedelta(days=1), time.min))
+    concluida = Q(status='CONCLUIDA', conclusao__lt=limite)
+    zero = models.Value(0, output_field=models.DecimalField(max_digits=10, decimal_places=2))
+    agregados = (
+        Tarefa.objects.filter(data_criacao__lt=limite, projeto__excluindo=False)
+        .alias(conclusao=Coalesce('data_conclusao', 'data_atualizacao'))
+        .values('projeto_id')
+        .annotate(
+            contador_tarefas=Count('id'),
+            contador_pendentes=Count('id', filter=Q(status='PENDENTE')),
+            # Concluída depois do dia: ainda estava em andamento
+            contador_em_andamento=Count('id', filter=Q(status__in=['EM_ANDAMENTO', 'CONCLUIDA']) & ~concluida),
+            contador_concluidas=Count('id', filter=concluida),
+            contador_canceladas=Count('id', filter=Q(status='CANCELADA')),
+            total_horas_estimadas=Coalesce(Sum('estimativa_horas'), zero),
+            total_horas_trabalhadas=Coalesce(Sum('horas_trabalhadas'), zero),
+        ).order_by()
+    )
+
+    retratos = {
+        projeto_id: RetratoDiario(projeto_id=projeto_id, data=data, reconstruido=True)
+        for projeto_id in Projeto.objects.filter(excluindo=False, data_criacao__lt=limite)
+        .order_by().values_list('pk', flat=True)
+    }
+    for linha in agregados:
+        retrato = retratos.get(linha['projeto_id'])
+        if retrato is not None:
+            for campo, contador in RetratoDiario.CONTADORES.items():
+                setattr(retrato, campo, linha[contador])
+
+    with transaction.atomic():
+        RetratoDiario.objects.filter(data=data, reconstruido=True).delete()
+        RetratoDiario.objects.bulk_create(retratos.values(), batch_size=batch_size, ignore_conflicts=True)
+    return len(retratos)
+
+
+def atualizar_retratos(desde=None, progresso=None):
+    """Reconstrói os dias sem retrato desde `desde` (padrão: o dia seguinte ao
+    último retrato) e registra o de hoje. Retorna o número de dias gravados.
+
+    `progresso(data, projetos)` é chamado após cada dia.
+    """
+    hoje = timezone.localdate()
+    if desde is None:
+        ultimo = RetratoDiario.objects.aggregate(ultimo=Max('data'))['ultimo']
+        desde = ultimo + timedelta(days=1) if ultimo else hoje
+
+    dias = 0
+    data = desde
+    while data < hoje:
+        projetos = reconstruir_retratos(data)
+        dias += 1
+        if progresso:
+            progresso(data, projetos)
+        data += timedelta(days=1)
+
+    projetos = registrar_retratos(hoje)
+    if progresso:
+        progresso(hoje, projetos)
+    return dias + 1
+
+
+def serie_projeto(projeto, dias=30):
+    """Um ponto por dia dos últimos `dias` dias; o de hoje vem dos contadores atuais.
+
+    `abertas` é a linha do burndown e `vazao`, as tarefas concluídas desde o
+    ponto anterior (saldo do dia, nunca negativo).
+    """
+    hoje = timezone.localdate()
+    campos = list(RetratoDiario.CONTADORES)
+    pontos = list(
+        RetratoDiario.objects.filter(
+            projeto=projeto, data__gt=hoje - timedelta(days=dias), data__lt=hoje
+        ).order_by('data').values('data', *campos, 'reconstruido')
+    )
+    pontos.append({
+        'data': hoje,
+        **{campo: getattr(projeto, contador) for campo, contador in RetratoDiario.CONTADORES.items()},
+        'reconstruido': False,
+    })
+
+    anterior = None
+    for ponto in pontos:
+        ponto['abertas'] = ponto['pendentes'] + ponto['em_andamento']
+        ponto['vazao'] = None if anterior is None else max(ponto['concluidas'] - anterior['concluidas'], 0)
+        anterior = ponto
+    return pontos
@@ -0,0 +1,114 @@
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Leituras em réplicas (RoteadorReplicas + RoteamentoReplicaMiddleware).
+#
+# Só as views marcadas com `ler_da_replica = True` (listas e detalhes), em
+# GET/HEAD, leem de uma das réplicas de BANCO_REPLICAS; todo o resto, e
+# qualquer escrita, usa o banco principal. Depois de uma escrita, o usuário
+# fica preso ao principal por BANCO_REPLICA_FIXAR_SEGUNDOS (cookie), para ver
+# o que acabou de gravar mesmo com a réplica atrasada.
+#
+# O estado da requisição é um dict em uma ContextVar: as threads do
+# sync_to_async (views assíncronas) recebem uma cópia do contexto, mas o dict
+# é o mesmo, então a escrita feita lá também é vista aqui.
+
+COOKIE_FIXAR_PRIMARIO = 'fixar_primario'
+
+_estado = ContextVar('core_roteamento_replica', default=None)
+
+# Lidos sempre do principal: a sessão de quem acabou de entrar ainda não
+# chegou à réplica
+APPS_SEMPRE_PRIMARIO = {'sessions'}
+
+
+class RoteadorReplicas:
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        replicas = getattr(settings, 'BANCO_REPLICAS', [])
+        if (
+            not estado or not estado['replica'] or estado['escreveu'] or not replicas
+            or model._meta.app_label in APPS_SEMPRE_PRIMARIO
+            # Dentro de uma transação, a leitura precisa ver o que ela gravou
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            estado['escreveu'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas têm os mesmos dados do principal
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # O esquema chega às réplicas pela própria replicação
+        return db == DEFAULT_DB_ALIAS
+
+
+class RoteamentoReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.fixar_segundos = getattr(settings, 'BANCO_REPLICA_FIXAR_SEGUNDOS', 5)
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        estado, token = self.iniciar(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self.finalizar(request, response, estado)
+
+    async def __acall__(self, request):
+        estado, token = self.iniciar(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self.finalizar(request, response, estado)
+
+    def iniciar(self, request):
+        estado = {'replica': False, 'escreveu': False}
+        return estado, _estado.set(estado)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        estado = _estado.get()
+        if estado is None or request.method not in ('GET', 'HEAD'):
+            return
+        classe = getattr(view_func, 'view_class', None)
+        if classe is None or not getattr(classe, 'ler_da_replica', False):
+            return
+        try:
+            fixado_ate = float(request.COOKIES.get(COOKIE_FIXAR_PRIMARIO, 0))
+        except ValueError:
+            fixado_ate = 0
+        estado['replica'] = fixado_ate < time.time()
+
+    def finalizar(self, request, response, estado):
+        if estado['escreveu'] and self.fixar_segundos:
+            response.set_cookie(
+                COOKIE_FIXAR_PRIMARIO,
+                str(int(time.time() + self.fixar_segundos)),
+                max_age=self.fixar_segundos,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
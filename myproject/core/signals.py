@@ -0,0 +1,242 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .dashboard import invalidar_dashboard, usuarios_com_acesso
+from .eventos import publicar_tarefa
+from .fila import enfileirar
+from .historico import registrar, transicoes, valores_rastreados
+from .lote import em_lote
+from .models import AcessoProjeto, PerfilUsuario, Projeto, Tarefa
+
+
+# Contadores de progresso do Projeto
+
+def _somar_contribuicao(deltas, projeto_id, contribuicao, sinal=1):
+    for campo, valor in contribuicao.items():
+        deltas[projeto_id][campo] += sinal * valor
+
+
+@receiver(pre_save, sender=Tarefa)
+def guardar_estado_anterior_tarefa(sender, instance, raw=False, **kwargs):
+    instance._estado_anterior = None
+    if raw or instance.pk is None:
+        return
+    # Lê o estado gravado com bloqueio da linha (Tarefa.save já abre a transação)
+    instance._estado_anterior = (
+        Tarefa.objects.select_for_update()
+        .filter(pk=instance.pk)
+        .values('projeto_id', 'responsavel_id', 'status', 'prioridade', 'estimativa_horas', 'horas_trabalhadas')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Tarefa)
+def atualizar_contadores_ao_salvar(sender, instance, created, raw=False, **kwargs):
+    if raw or em_lote():
+        return
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    anterior = getattr(instance, '_estado_anterior', None)
+    if anterior:
+        _somar_contribuicao(
+            deltas,
+            anterior['projeto_id'],
+            Tarefa.calcular_contribuicao(
+                anterior['status'], anterior['estimativa_horas'], anterior['horas_trabalhadas']
+            ),
+            sinal=-1,
+        )
+    _somar_contribuicao(deltas, instance.projeto_id, instance.contribuicao_contadores())
+
+    Projeto.aplicar_deltas(deltas)
+
+
+@receiver(post_delete, sender=Tarefa)
+def atualizar_contadores_ao_excluir(sender, instance, **kwargs):
+    if em_lote():
+        return
+    deltas = defaultdict(lambda: defaultdict(int))
+    _somar_contribuicao(deltas, instance.projeto_id, instance.contribuicao_contadores(), sinal=-1)
+    Projeto.aplicar_deltas(deltas)
+
+
+# Histórico de transições (core/historico.py)
+
+@receiver(post_save, sender=Tarefa)
+def registrar_transicoes_ao_salvar(sender, instance, created, raw=False, **kwargs):
+    if raw or em_lote():
+        return
+    anterior = getattr(instance, '_estado_anterior', None)
+    if anterior:
+        registrar(transicoes(instance.pk, anterior, valores_rastreados(instance), instance.data_atualizacao))
+
+
+# Tabela de acesso (AcessoProjeto)
+#
+# Registrados antes dos receptores do dashboard, que leem a tabela para saber
+# quais usuários invalidar.
+
+def _conceder_acesso(pares):
+    pares = [(user_id, projeto_id) for user_id, projeto_id in pares if user_id]
+    if not pares:
+        return
+    # Projetos em exclusão ficam sem acesso (ver core/exclusao.py)
+    em_exclusao = set(
+        Projeto.objects.filter(pk__in={projeto_id for _, projeto_id in pares}, excluindo=True)
+        .values_list('pk', flat=True)
+    )
+    AcessoProjeto.objects.bulk_create(
+        [
+            AcessoProjeto(user_id=user_id, projeto_id=projeto_id)
+            for user_id, projeto_id in pares if projeto_id not in em_exclusao
+        ],
+        ignore_conflicts=True
+    )
+
+
+def _revogar_acesso(user_ids, projeto_ids):
+    # O responsável pelo projeto mantém o acesso mesmo fora da lista de membros
+    AcessoProjeto.objects.filter(
+        user_id__in=user_ids, projeto_id__in=projeto_ids
+    ).exclude(projeto__responsavel_id=F('user_id')).delete()
+
+
+@receiver(post_save, sender=Projeto)
+def sincronizar_acesso_responsavel(sender, instance, raw=False, **kwargs):
+    if raw or instance.excluindo:
+        return
+    anterior_id = getattr(instance, '_responsavel_anterior_id', None)
+    if anterior_id and anterior_id != instance.responsavel_id:
+        if not instance.membros.filter(pk=anterior_id).exists():
+            AcessoProjeto.objects.filter(user_id=anterior_id, projeto=instance).delete()
+    _conceder_acesso([(instance.responsavel_id, instance.pk)])
+
+
+@receiver(m2m_changed, sender=Projeto.membros.through)
+def sincronizar_acesso_membros(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Guarda quem sai antes que as linhas sejam apagadas
+        relacionados = instance.projetos_membro if reverse else instance.membros
+        instance._removidos_membros = set(relacionados.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_removidos_membros', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    if reverse:
+        pares = [(instance.pk, projeto_id) for projeto_id in pk_set]
+    else:
+        pares = [(user_id, instance.pk) for user_id in pk_set]
+
+    if action == 'post_add':
+        _conceder_acesso(pares)
+    else:
+        _revogar_acesso({user_id for user_id, _ in pares}, {projeto_id for _, projeto_id in pares})
+
+
+# Invalidação do cache do dashboard
+
+@receiver(post_save, sender=Tarefa)
+def invalidar_dashboard_ao_salvar_tarefa(sender, instance, raw=False, **kwargs):
+    if raw or em_lote():
+        return
+    anterior = getattr(instance, '_estado_anterior', None) or {}
+    user_ids = usuarios_com_acesso({instance.projeto_id, anterior.get('projeto_id')})
+    user_ids.update({instance.responsavel_id, anterior.get('responsavel_id')})
+    invalidar_dashboard(user_ids)
+
+
+@receiver(post_delete, sender=Tarefa)
+def invalidar_dashboard_ao_excluir_tarefa(sender, instance, **kwargs):
+    if em_lote():
+        return
+    user_ids = usuarios_com_acesso([instance.projeto_id])
+    user_ids.add(instance.responsavel_id)
+    invalidar_dashboard(user_ids)
+
+
+@receiver(pre_save, sender=Projeto)
+def guardar_responsavel_anterior_projeto(sender, instance, raw=False, **kwargs):
+    instance._responsavel_anterior_id = None
+    if not raw and instance.pk is not None:
+        instance._responsavel_anterior_id = (
+            Projeto.objects.filter(pk=instance.pk).values_list('responsavel_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Projeto)
+def invalidar_dashboard_ao_salvar_projeto(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    user_ids = usuarios_com_acesso([instance.pk])
+    user_ids.add(getattr(instance, '_responsavel_anterior_id', None))
+    invalidar_dashboard(user_ids)
+
+
+@receiver(pre_delete, sender=Projeto)
+def invalidar_dashboard_ao_excluir_projeto(sender, instance, **kwargs):
+    # Os membros precisam ser lidos antes que o CASCADE remova a tabela intermediária
+    invalidar_dashboard(usuarios_com_acesso([instance.pk]))
+
+
+@receiver(m2m_changed, sender=Projeto.membros.through)
+def invalidar_dashboard_ao_alterar_membros(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_removidos_membros', set())
+    if reverse:
+        # instance é o usuário; pk_set são projetos
+        user_ids = usuarios_com_acesso(pk_set)
+        user_ids.add(instance.pk)
+    else:
+        user_ids = usuarios_com_acesso([instance.pk])
+        user_ids.update(pk_set)
+    invalidar_dashboard(user_ids)
+
+
+# Eventos ao vivo para quem está com o projeto aberto (core/eventos.py)
+
+@receiver(post_save, sender=Tarefa)
+def publicar_tarefa_salva(sender, instance, created, raw=False, **kwargs):
+    if raw or em_lote():
+        return
+    anterior = getattr(instance, '_estado_anterior', None) or {}
+    if anterior.get('projeto_id') not in (None, instance.projeto_id):
+        # Mudou de projeto: sai da lista do antigo
+        publicar_tarefa('tarefa_removida', instance, projeto_id=anterior['projeto_id'])
+        created = True
+    publicar_tarefa('tarefa_criada' if created else 'tarefa_atualizada', instance)
+
+
+@receiver(post_delete, sender=Tarefa)
+def publicar_tarefa_excluida(sender, instance, **kwargs):
+    if em_lote():
+        return
+    publicar_tarefa('tarefa_removida', instance)
+
+
+# Miniaturas da foto de perfil (geradas fora da requisição, pela fila)
+
+@receiver(pre_save, sender=PerfilUsuario)
+def guardar_foto_anterior_perfil(sender, instance, raw=False, **kwargs):
+    instance._foto_anterior = None
+    if not raw and instance.pk is not None:
+        instance._foto_anterior = (
+            PerfilUsuario.objects.filter(pk=instance.pk).values_list('foto', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=PerfilUsuario)
+def agendar_miniaturas_perfil(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    foto = instance.foto.name or None
+    anterior = None if created else (getattr(instance, '_foto_anterior', None) or None)
+    if foto != anterior:
+        transaction.on_commit(lambda: enfileirar('gerar_miniaturas', prioridade=10, perfil_id=instance.pk))
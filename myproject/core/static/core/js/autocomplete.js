@@ -0,0 +1,71 @@
+// Autocomplete dos <select data-autocomplete-url> (widgets AutocompleteSelect
+// e AutocompleteSelectMultiple de forms.py): as opções são buscadas na API
+// conforme o usuário digita, em vez de virem todas no HTML.
+document.querySelectorAll('select[data-autocomplete-url]').forEach(function (select) {
+    const busca = document.createElement('input');
+    busca.type = 'search';
+    busca.className = 'form-control form-control-sm mb-1';
+    busca.placeholder = 'Digite para buscar...';
+    busca.setAttribute('aria-label', 'Buscar opções');
+    select.parentNode.insertBefore(busca, select);
+
+    const mais = document.createElement('button');
+    mais.type = 'button';
+    mais.className = 'btn btn-link btn-sm p-0';
+    mais.textContent = 'Carregar mais';
+    mais.hidden = true;
+    select.insertAdjacentElement('afterend', mais);
+
+    let pagina = 1;
+    let temporizador = null;
+    let controlador = null;
+
+    function carregar(adicionar) {
+        if (controlador) {
+            controlador.abort();
+        }
+        controlador = new AbortController();
+        const url = new URL(select.dataset.autocompleteUrl, window.location.origin);
+        url.searchParams.set('q', busca.value);
+        url.searchParams.set('pagina', pagina);
+
+        fetch(url, { signal: controlador.signal, credentials: 'same-origin' })
+            .then(resposta => resposta.json())
+            .then(dados => {
+                // Mantém a opção vazia e as selecionadas; troca as demais
+                if (!adicionar) {
+                    Array.from(select.options).forEach(opcao => {
+                        if (!opcao.selected && opcao.value !== '') {
+                            opcao.remove();
+                        }
+                    });
+                }
+                const existentes = new Set(Array.from(select.options).map(opcao => opcao.value));
+                dados.resultados.forEach(item => {
+                    if (!existentes.has(String(item.id))) {
+                        select.add(new Option(item.texto, item.id));
+                    }
+                });
+                mais.hidden = !dados.mais;
+            })
+            .catch(() => {});
+    }
+
+    busca.addEventListener('input', () => {
+        clearTimeout(temporizador);
+        temporizador = setTimeout(() => {
+            pagina = 1;
+            carregar(false);
+        }, 250);
+    });
+    // Primeira página ao entrar no campo ou no select
+    [busca, select].forEach(elemento => elemento.addEventListener('focus', () => {
+        if (pagina === 1 && select.options.length <= 1) {
+            carregar(false);
+        }
+    }));
+    mais.addEventListener('click', () => {
+        pagina += 1;
+        carregar(true);
+    });
+});
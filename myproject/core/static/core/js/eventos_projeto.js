@@ -0,0 +1,85 @@
+// Atualização ao vivo da tabela de tarefas em projeto_detail.html: recebe os
+// eventos do projeto por Server-Sent Events (ProjetoEventosView) e altera só
+// as linhas afetadas, em vez de recarregar a página.
+(function () {
+    const container = document.querySelector('[data-eventos-url]');
+    if (!container || !window.EventSource) {
+        return;
+    }
+
+    const CORES_PRIORIDADE = { URGENTE: 'danger', ALTA: 'warning' };
+
+    function linha(id) {
+        return container.querySelector('tr[data-tarefa-id="' + id + '"]');
+    }
+
+    function preencher(tr, tarefa) {
+        tr.querySelector('[data-campo="titulo"]').textContent = tarefa.titulo;
+        tr.querySelector('[data-campo="status"]').textContent = tarefa.status_display;
+        const prioridade = tr.querySelector('[data-campo="prioridade"]');
+        prioridade.textContent = tarefa.prioridade_display;
+        prioridade.className = 'badge bg-' + (CORES_PRIORIDADE[tarefa.prioridade] || 'info');
+        tr.querySelector('[data-campo="responsavel"]').textContent = tarefa.responsavel || 'N/A';
+    }
+
+    function criarLinha(tarefa) {
+        const tr = document.createElement('tr');
+        tr.dataset.tarefaId = tarefa.id;
+        tr.innerHTML =
+            '<td data-campo="titulo"></td>' +
+            '<td><span class="badge bg-secondary" data-campo="status"></span></td>' +
+            '<td><span data-campo="prioridade"></span></td>' +
+            '<td data-campo="responsavel"></td>' +
+            '<td><a class="btn btn-sm btn-outline-primary"><i class="bi bi-eye"></i></a></td>';
+        tr.querySelector('a').href = tarefa.url;
+        return tr;
+    }
+
+    function atualizarProgresso(progresso) {
+        if (progresso === null || progresso === undefined) {
+            return;
+        }
+        const barra = document.getElementById('progresso-projeto');
+        const texto = document.getElementById('progresso-projeto-texto');
+        if (barra) {
+            barra.style.width = progresso + '%';
+        }
+        if (texto) {
+            texto.textContent = progresso;
+        }
+    }
+
+    function salvar(evento) {
+        const tarefa = JSON.parse(evento.data);
+        let tr = linha(tarefa.id);
+        if (!tr) {
+            const corpo = container.querySelector('tbody');
+            if (!corpo) {
+                // Primeira tarefa: a tabela ainda não existe
+                window.location.reload();
+                return;
+            }
+            tr = criarLinha(tarefa);
+            corpo.appendChild(tr);
+        }
+        preencher(tr, tarefa);
+        atualizarProgresso(tarefa.progresso);
+    }
+
+    const fonte = new EventSource(container.dataset.eventosUrl);
+    fonte.addEventListener('tarefa_criada', salvar);
+    fonte.addEventListener('tarefa_atualizada', salvar);
+    fonte.addEventListener('tarefa_removida', function (evento) {
+        const dados = JSON.parse(evento.data);
+        const tr = linha(dados.id);
+        if (tr) {
+            tr.remove();
+        }
+        atualizarProgresso(dados.progresso);
+    });
+    // Alteração em lote ou eventos perdidos: busca a página inteira
+    fonte.addEventListener('recarregar', function () {
+        fonte.close();
+        window.location.reload();
+    });
+})();
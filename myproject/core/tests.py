@@ -1,3 +1,677 @@
-from django.test import TestCase
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import eventos, fila
+from .benchmark import amostrar_usuarios, executar_benchmark
+from .exclusao import marcar_para_exclusao
+from .exportacao import exportar_tarefas, importar_tarefas, ler_linhas
+from .historico import tempos_de_ciclo
+from .models import (
+    AcessoProjeto, Categoria, EventoProjeto, InteresseProjeto, Projeto, RetratoDiario, Tarefa,
+    Trabalho, TransicaoTarefa,
+)
+from .paginacao import paginar_por_cursor
+from .retratos import atualizar_retratos, registrar_retratos
+from .roteador import COOKIE_FIXAR_PRIMARIO, RoteadorReplicas, RoteamentoReplicaMiddleware, _estado
+
+
+# Regressão de consultas das views principais (dashboard, listas de projetos
+# e de tarefas, detalhe do projeto) contra a linha de base versionada em
+# LINHA_BASE_CONSULTAS. Os tempos e as massas de dados maiores ficam com o
+# comando benchmark_views.
+
+LINHA_BASE_CONSULTAS = Path(__file__).with_name('linha_base_consultas.json')
+
+
+class ConsultasViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_load_data', usuarios=6, projetos=12, tarefas=300, categorias=5, stdout=StringIO()
+        )
+
+    def test_consultas_nao_aumentam(self):
+        """Cada view faz no máximo as consultas da linha de base.
+
+        Numa mudança intencional, atualize o arquivo com os valores medidos.
+        """
+        linha_base = json.loads(LINHA_BASE_CONSULTAS.read_text(encoding='utf-8'))
+        resultado = executar_benchmark(amostrar_usuarios(3), repeticoes=2)
+        medidas = {nome: medida['consultas'] for nome, medida in resultado.items()}
+        self.assertEqual(set(medidas), set(linha_base))
+        for nome, consultas in sorted(medidas.items()):
+            with self.subTest(view=nome):
+                self.assertLessEqual(
+                    consultas, linha_base[nome],
+                    f'{nome}: {consultas} consultas (linha de base: {linha_base[nome]}). Medido: {medidas}'
+                )
+
+
+# Comportamento dos módulos de core: contadores, acesso, cursores, API em
+# lote, importação/exportação, ETag, fila, réplicas, eventos, retratos e
+# histórico. Cada classe monta só os poucos objetos de que precisa.
+
+def criar_projeto(responsavel, nome='Projeto', **campos):
+    return Projeto.objects.create(nome=nome, responsavel=responsavel, data_inicio=date.today(), **campos)
+
+
+class ContadoresProjetoTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('dono')
+        self.projeto = criar_projeto(self.user)
+
+    def assertContadores(self, projeto, **esperados):
+        projeto.refresh_from_db()
+        for campo, valor in esperados.items():
+            self.assertEqual(getattr(projeto, campo), valor, campo)
+
+    def test_sinais_acompanham_criacao_alteracao_e_exclusao(self):
+        tarefa = Tarefa.objects.create(
+            titulo='a', projeto=self.projeto, responsavel=self.user, estimativa_horas=Decimal('2.5')
+        )
+        self.assertContadores(
+            self.projeto, contador_tarefas=1, contador_pendentes=1, total_horas_estimadas=Decimal('2.5')
+        )
+
+        tarefa.status = 'CONCLUIDA'
+        tarefa.horas_trabalhadas = Decimal('3')
+        tarefa.save()
+        self.assertContadores(
+            self.projeto, contador_tarefas=1, contador_pendentes=0, contador_concluidas=1,
+            total_horas_trabalhadas=Decimal('3')
+        )
+
+        tarefa.delete()
+        self.assertContadores(
+            self.projeto, contador_tarefas=0, contador_concluidas=0,
+            total_horas_estimadas=Decimal('0'), total_horas_trabalhadas=Decimal('0')
+        )
+
+    def test_mudar_de_projeto_move_a_contribuicao(self):
+        outro = criar_projeto(self.user, 'Outro')
+        tarefa = Tarefa.objects.create(titulo='a', projeto=self.projeto, status='EM_ANDAMENTO')
+        tarefa.projeto = outro
+        tarefa.save()
+        self.assertContadores(self.projeto, contador_tarefas=0, contador_em_andamento=0)
+        self.assertContadores(outro, contador_tarefas=1, contador_em_andamento=1)
+
+    def test_recalcular_contadores_corrige_desvio(self):
+        Tarefa.objects.create(titulo='a', projeto=self.projeto, status='CANCELADA')
+        Projeto.objects.filter(pk=self.projeto.pk).update(contador_tarefas=99, contador_canceladas=0)
+        self.assertEqual(Projeto.objects.filter(pk=self.projeto.pk).recalcular_contadores(), 1)
+        self.assertContadores(self.projeto, contador_tarefas=1, contador_canceladas=1)
+
+
+class AcessoProjetoTest(TestCase):
+    def setUp(self):
+        self.dono = User.objects.create_user('dono')
+        self.membro = User.objects.create_user('membro')
+        self.projeto = criar_projeto(self.dono)
+
+    def acessos(self):
+        return set(AcessoProjeto.objects.filter(projeto=self.projeto).values_list('user__username', flat=True))
+
+    def test_responsavel_e_membros(self):
+        self.assertEqual(self.acessos(), {'dono'})
+        self.projeto.membros.add(self.membro)
+        self.assertEqual(self.acessos(), {'dono', 'membro'})
+        self.assertIn(self.projeto, Projeto.objects.visiveis_para(self.membro))
+
+        self.projeto.membros.remove(self.membro)
+        self.assertEqual(self.acessos(), {'dono'})
+
+    def test_troca_de_responsavel(self):
+        self.projeto.responsavel = self.membro
+        self.projeto.save()
+        self.assertEqual(self.acessos(), {'membro'})
+
+    def test_projeto_em_exclusao_nao_recebe_acesso(self):
+        marcar_para_exclusao(self.projeto)
+        self.assertEqual(self.acessos(), set())
+
+        self.projeto.membros.add(self.membro)
+        self.projeto.refresh_from_db()
+        self.projeto.save()
+        self.assertEqual(self.acessos(), set())
+        self.assertFalse(Projeto.objects.visiveis_para(self.dono).exists())
+
+    def test_reconstruir(self):
+        self.projeto.membros.add(self.membro)
+        AcessoProjeto.objects.all().delete()
+        AcessoProjeto.objects.reconstruir()
+        self.assertEqual(self.acessos(), {'dono', 'membro'})
+
+
+class PaginacaoCursorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('dono')
+        cls.projeto = criar_projeto(cls.user)
+        hoje = date.today()
+        # Valores repetidos e nulos, para o desempate pelo pk e o trecho dos nulos
+        limites = [None, hoje, hoje, hoje + timedelta(days=1), None, hoje - timedelta(days=1)]
+        Tarefa.objects.bulk_create([
+            Tarefa(titulo=f'Tarefa {indice % 7}', projeto=cls.projeto, data_limite=limites[indice % len(limites)])
+            for indice in range(23)
+        ])
+
+    def esperado(self, ordem):
+        campo = ordem.lstrip('-')
+        tarefas = list(Tarefa.objects.filter(projeto=self.projeto))
+        nulos = sorted((t for t in tarefas if getattr(t, campo) is None), key=lambda t: t.pk)
+        valores = sorted(
+            (t for t in tarefas if getattr(t, campo) is not None), key=lambda t: (getattr(t, campo), t.pk)
+        )
+        # Nulos no fim da ordem crescente e no começo da decrescente
+        if ordem.startswith('-'):
+            return [t.pk for t in reversed(valores + nulos)]
+        return [t.pk for t in valores + nulos]
+
+    def test_ida_e_volta(self):
+        for ordem in ('data_limite', '-data_limite', 'titulo', '-data_criacao'):
+            with self.subTest(ordem=ordem):
+                queryset = Tarefa.objects.filter(projeto=self.projeto).order_by(ordem)
+                paginas, token = [], None
+                while True:
+                    pagina = paginar_por_cursor(queryset, 5, token)
+                    paginas.append(pagina)
+                    if not pagina.proximo:
+                        break
+                    token = pagina.proximo
+                self.assertEqual([obj.pk for pagina in paginas for obj in pagina.objetos], self.esperado(ordem))
+
+                voltando, token = [], paginas[-1].anterior
+                while token:
+                    pagina = paginar_por_cursor(queryset, 5, token)
+                    voltando.insert(0, [obj.pk for obj in pagina.objetos])
+                    token = pagina.anterior
+                self.assertEqual(voltando, [[obj.pk for obj in pagina.objetos] for pagina in paginas[:-1]])
+
+    def test_cursor_de_outra_ordenacao_volta_ao_inicio(self):
+        token = paginar_por_cursor(Tarefa.objects.order_by('titulo'), 5).proximo
+        pagina = paginar_por_cursor(Tarefa.objects.order_by('data_limite'), 5, token)
+        self.assertEqual([obj.pk for obj in pagina.objetos], self.esperado('data_limite')[:5])
+        self.assertIsNone(pagina.anterior)
+
+    def test_ordenacao_sem_chave(self):
+        self.assertIsNone(paginar_por_cursor(Tarefa.objects.order_by('titulo', 'pk'), 5))
+
+
+class TarefaApiLoteTest(TestCase):
+    def setUp(self):
+        self.dono = User.objects.create_user('dono')
+        self.colega = User.objects.create_user('colega')
+        self.estranho = User.objects.create_user('estranho')
+        self.projeto = criar_projeto(self.dono)
+        self.projeto.membros.add(self.colega)
+        self.alheio = criar_projeto(self.estranho, 'Alheio')
+        self.client.force_login(self.dono)
+        self.url = reverse('api_tarefa_lote')
+
+    def enviar(self, metodo, dados):
+        return getattr(self.client, metodo)(self.url, json.dumps(dados), content_type='application/json')
+
+    def test_criar_e_tudo_ou_nada(self):
+        resposta = self.enviar('post', {'tarefas': [
+            {'titulo': 'ok', 'projeto': self.projeto.pk, 'status': 'PENDENTE', 'prioridade': 'MEDIA'},
+            {'titulo': 'sem acesso', 'projeto': self.alheio.pk, 'status': 'PENDENTE', 'prioridade': 'MEDIA'},
+        ]})
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(list(resposta.json()['erros']), ['1'])
+        self.assertFalse(Tarefa.objects.exists())
+
+        resposta = self.enviar('post', {'tarefas': [
+            {'titulo': 'a', 'projeto': self.projeto.pk, 'status': 'CONCLUIDA', 'prioridade': 'MEDIA'},
+            {'titulo': 'b', 'projeto': str(self.projeto.pk), 'status': 'PENDENTE', 'prioridade': 'ALTA',
+             'responsavel': 'colega'},
+        ]})
+        self.assertEqual(resposta.status_code, 201)
+        a, b = Tarefa.objects.order_by('titulo')
+        self.assertEqual((a.responsavel, b.responsavel), (self.dono, self.colega))
+        self.projeto.refresh_from_db()
+        self.assertEqual((self.projeto.contador_tarefas, self.projeto.contador_concluidas), (2, 1))
+
+    def test_username_numerico_nao_se_confunde_com_pk(self):
+        numerico = User.objects.create_user(str(self.colega.pk))
+        self.projeto.membros.add(numerico)
+        resposta = self.enviar('post', {'tarefas': [
+            {'titulo': 'pk', 'projeto': self.projeto.pk, 'status': 'PENDENTE', 'prioridade': 'MEDIA',
+             'responsavel': self.colega.pk},
+            {'titulo': 'nome', 'projeto': self.projeto.pk, 'status': 'PENDENTE', 'prioridade': 'MEDIA',
+             'responsavel': str(self.colega.pk)},
+        ]})
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(
+            dict(Tarefa.objects.values_list('titulo', 'responsavel_id')),
+            {'pk': self.colega.pk, 'nome': numerico.pk}
+        )
+
+    def test_alterar(self):
+        tarefa = Tarefa.objects.create(titulo='a', projeto=self.projeto, responsavel=self.colega)
+        resposta = self.enviar('patch', {'tarefas': [{'id': tarefa.pk, 'status': 'CONCLUIDA', 'responsavel': None}]})
+        self.assertEqual(resposta.status_code, 200)
+        tarefa.refresh_from_db()
+        self.assertEqual((tarefa.status, tarefa.responsavel), ('CONCLUIDA', None))
+        self.assertIsNotNone(tarefa.data_conclusao)
+        self.projeto.refresh_from_db()
+        self.assertEqual((self.projeto.contador_pendentes, self.projeto.contador_concluidas), (0, 1))
+
+    def test_alterar_recusa_invalidos_sem_gravar(self):
+        tarefa = Tarefa.objects.create(titulo='a', projeto=self.projeto)
+        alheia = Tarefa.objects.create(titulo='b', projeto=self.alheio)
+        resposta = self.enviar('patch', {'tarefas': [
+            {'id': tarefa.pk, 'status': 'CONCLUIDA'},
+            {'id': alheia.pk, 'status': 'CONCLUIDA'},
+            {'id': tarefa.pk, 'titulo': 'novo'},
+        ]})
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(set(resposta.json()['erros']), {'1', '2'})
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, 'PENDENTE')
+
+    def test_excluir(self):
+        tarefas = [Tarefa.objects.create(titulo=titulo, projeto=self.projeto) for titulo in 'ab']
+        alheia = Tarefa.objects.create(titulo='c', projeto=self.alheio)
+        resposta = self.enviar('delete', {'ids': [tarefas[0].pk, alheia.pk]})
+        self.assertEqual(resposta.status_code, 404)
+        self.assertEqual(resposta.json()['ids'], [alheia.pk])
+        self.assertEqual(Tarefa.objects.count(), 3)
+
+        resposta = self.enviar('delete', {'ids': [tarefa.pk for tarefa in tarefas]})
+        self.assertEqual(resposta.json(), {'excluidas': 2})
+        self.projeto.refresh_from_db()
+        self.assertEqual(self.projeto.contador_tarefas, 0)
+
+    def test_exige_login(self):
+        self.client.logout()
+        self.assertEqual(self.enviar('delete', {'ids': [1]}).status_code, 401)
+
+
+class ImportacaoExportacaoTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('dono')
+        self.projeto = criar_projeto(self.user)
+        self.categoria = Categoria.objects.create(nome='Bug')
+        tarefa = Tarefa.objects.create(
+            titulo='Com, vírgula', descricao='linha 1\nlinha 2', projeto=self.projeto, responsavel=self.user,
+            status='EM_ANDAMENTO', prioridade='ALTA', estimativa_horas=Decimal('1.5'),
+            data_limite=date(2030, 1, 31),
+        )
+        tarefa.categorias.add(self.categoria)
+        Tarefa.objects.create(titulo='Simples', projeto=self.projeto, responsavel=self.user, status='CONCLUIDA')
+
+    def campos(self, tarefa):
+        return (
+            tarefa.titulo, tarefa.descricao or '', tarefa.status, tarefa.prioridade, tarefa.responsavel_id,
+            tarefa.estimativa_horas, tarefa.data_limite, sorted(tarefa.categorias.values_list('nome', flat=True)),
+        )
+
+    def test_ida_e_volta(self):
+        for formato in ('csv', 'ndjson'):
+            with self.subTest(formato=formato):
+                originais = list(Tarefa.objects.filter(projeto=self.projeto).order_by('pk'))
+                conteudo = ''.join(exportar_tarefas(Tarefa.objects.filter(pk__in=[t.pk for t in originais]), formato))
+                resultado = importar_tarefas(ler_linhas(StringIO(conteudo, newline=''), formato), self.user)
+                self.assertEqual(resultado, {'criadas': len(originais), 'erros': {}})
+
+                novas = Tarefa.objects.exclude(pk__in=[t.pk for t in originais]).order_by('pk')
+                self.assertEqual([self.campos(t) for t in novas], [self.campos(t) for t in originais])
+                self.projeto.refresh_from_db()
+                self.assertEqual(self.projeto.contador_tarefas, 2 * len(originais))
+                novas.delete()
+
+    def test_linhas_invalidas_sao_relatadas(self):
+        conteudo = (
+            'titulo,projeto,status,prioridade\n'
+            f'boa,{self.projeto.pk},PENDENTE,BAIXA\n'
+            f'ruim,{self.projeto.pk},INEXISTENTE,BAIXA\n'
+        )
+        self.client.force_login(self.user)
+        resposta = self.client.post(reverse('api_tarefa_import'), conteudo, content_type='text/csv')
+        dados = resposta.json()
+        self.assertEqual(dados['criadas'], 1)
+        self.assertEqual(list(dados['erros']), ['2'])
+        self.assertIn('status', dados['erros']['2'])
+
+
+class RespostaCondicionalTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('dono')
+        self.projeto = criar_projeto(self.user)
+        self.tarefa = Tarefa.objects.create(titulo='a', projeto=self.projeto)
+        self.client.force_login(self.user)
+
+    def test_304_ate_uma_alteracao(self):
+        for nome in ('projeto_list', 'tarefa_list'):
+            with self.subTest(view=nome):
+                url = reverse(nome)
+                # A primeira visita cria o cookie CSRF, que faz parte do ETag
+                self.client.get(url)
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+                self.tarefa.status = 'CONCLUIDA' if self.tarefa.status == 'PENDENTE' else 'PENDENTE'
+                self.tarefa.save()
+                resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(resposta.status_code, 200)
+                self.assertNotEqual(resposta['ETag'], etag)
+
+
+CHAMADAS = []
+
+
+@fila.trabalho('teste_registrar')
+def _trabalho_registrar(valor):
+    CHAMADAS.append((valor, fila.estender_reserva()))
+
+
+@fila.trabalho('teste_falhar')
+def _trabalho_falhar():
+    raise ValueError('falhou')
+
+
+class FilaTest(TestCase):
+    def setUp(self):
+        CHAMADAS.clear()
+
+    def test_executa_e_conclui(self):
+        fila.enfileirar('teste_registrar', valor=7)
+        trabalho = fila.reservar()
+        self.assertEqual((trabalho.status, trabalho.tentativas), ('EXECUTANDO', 1))
+        prazo = trabalho.disponivel_em
+        self.assertTrue(fila.executar(trabalho))
+        trabalho.refresh_from_db()
+        self.assertEqual(trabalho.status, 'CONCLUIDO')
+        # estender_reserva() renovou o prazo de dentro do trabalho
+        self.assertEqual(CHAMADAS, [(7, True)])
+        self.assertGreaterEqual(trabalho.disponivel_em, prazo)
+        self.assertIsNone(fila.reservar())
+
+    def test_um_trabalho_e_reservado_uma_vez(self):
+        fila.enfileirar('teste_registrar', valor=1)
+        self.assertIsNotNone(fila.reservar())
+        self.assertIsNone(fila.reservar())
+
+    def test_prioridade(self):
+        fila.enfileirar('teste_registrar', valor='baixa')
+        fila.enfileirar('teste_registrar', prioridade=5, valor='alta')
+        self.assertEqual(fila.reservar().argumentos, {'valor': 'alta'})
+
+    def test_falha_volta_com_espera_ate_esgotar(self):
+        fila.enfileirar('teste_falhar', max_tentativas=2)
+        with self.assertLogs('core.fila', 'WARNING'):
+            self.assertFalse(fila.executar(fila.reservar()))
+        trabalho = Trabalho.objects.get()
+        self.assertEqual(trabalho.status, 'PENDENTE')
+        self.assertGreater(trabalho.disponivel_em, timezone.now())
+        self.assertIn('ValueError', trabalho.erro)
+        self.assertIsNone(fila.reservar())
+
+        Trabalho.objects.update(disponivel_em=timezone.now())
+        with self.assertLogs('core.fila', 'ERROR'):
+            fila.executar(fila.reservar())
+        self.assertEqual(Trabalho.objects.get().status, 'FALHOU')
+
+    def test_prazo_vencido_devolve_o_trabalho(self):
+        fila.enfileirar('teste_registrar', valor=1)
+        antigo = fila.reservar()
+        Trabalho.objects.update(disponivel_em=timezone.now() - timedelta(seconds=1))
+        novo = fila.reservar()
+        self.assertEqual((novo.pk, novo.tentativas), (antigo.pk, 2))
+
+        # A reserva antiga não grava mais nada nem renova o prazo
+        self.assertTrue(fila.executar(antigo))
+        self.assertEqual(CHAMADAS, [(1, False)])
+        self.assertEqual(Trabalho.objects.get().status, 'EXECUTANDO')
+
+    def test_nao_registrado(self):
+        with self.assertRaises(ValueError):
+            fila.enfileirar('inexistente')
+
+
+@override_settings(BANCO_REPLICAS=['replica'])
+class RoteadorReplicasTest(SimpleTestCase):
+    def setUp(self):
+        self.roteador = RoteadorReplicas()
+
+    def com_estado(self, **estado):
+        token = _estado.set({'replica': True, 'escreveu': False, **estado})
+        self.addCleanup(_estado.reset, token)
+
+    def test_fora_de_uma_requisicao_le_do_principal(self):
+        self.assertEqual(self.roteador.db_for_read(Tarefa), DEFAULT_DB_ALIAS)
+
+    def test_view_marcada_le_da_replica_ate_escrever(self):
+        self.com_estado()
+        self.assertEqual(self.roteador.db_for_read(Tarefa), 'replica')
+        self.assertEqual(self.roteador.db_for_read(Session), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.roteador.db_for_write(Tarefa), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.roteador.db_for_read(Tarefa), DEFAULT_DB_ALIAS)
+
+    def test_transacao_le_do_principal(self):
+        self.com_estado()
+        with mock.patch.object(connections[DEFAULT_DB_ALIAS], 'in_atomic_block', True):
+            self.assertEqual(self.roteador.db_for_read(Tarefa), DEFAULT_DB_ALIAS)
+
+    def test_middleware(self):
+        from .views import DashboardView, ProjetoListView
+
+        def resposta(request):
+            vistos.append(_estado.get()['replica'])
+            if request.method == 'POST':
+                self.roteador.db_for_write(Tarefa)
+            return mock.MagicMock(set_cookie=mock.MagicMock())
+
+        middleware = RoteamentoReplicaMiddleware(resposta)
+        fabrica = RequestFactory()
+        casos = [
+            (fabrica.get('/'), ProjetoListView, True),
+            (fabrica.get('/'), DashboardView, False),
+            (fabrica.post('/'), ProjetoListView, False),
+        ]
+        fixado = fabrica.get('/')
+        fixado.COOKIES[COOKIE_FIXAR_PRIMARIO] = str(timezone.now().timestamp() + 60)
+        casos.append((fixado, ProjetoListView, False))
+        for request, classe, replica in casos:
+            with self.subTest(view=classe.__name__, metodo=request.method):
+                vistos = []
+
+                def view(request):
+                    middleware.process_view(request, classe.as_view(), (), {})
+                    return resposta(request)
+
+                middleware.get_response = view
+                response = middleware(request)
+                self.assertEqual(vistos, [replica])
+                self.assertEqual(response.set_cookie.called, request.method == 'POST')
+
+
+class EventosTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('dono')
+        self.projeto = criar_projeto(self.user)
+        anterior = eventos._barramento
+        eventos._barramento = eventos.BarramentoMemoria()
+        self.addCleanup(setattr, eventos, '_barramento', anterior)
+        self.url = reverse('projeto_eventos', args=[self.projeto.pk])
+
+    def test_wsgi_responde_204(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(self.url).status_code, 204)
+
+    async def test_stream(self):
+        estranho = await User.objects.acreate(username='estranho')
+        await self.async_client.aforce_login(estranho)
+        self.assertEqual((await self.async_client.get(self.url)).status_code, 404)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        conteudo = response.streaming_content
+        try:
+            self.assertEqual(await anext(conteudo), b'retry: 3000\n\n')
+            eventos.barramento().publicar(self.projeto.pk, 'tarefa_criada', {'id': 1})
+            mensagem = await asyncio.wait_for(anext(conteudo), 5)
+            self.assertIn(b'event: tarefa_criada', mensagem)
+            self.assertIn(b'data: {"id":1}', mensagem)
+        finally:
+            await conteudo.aclose()
+
+    @override_settings(EVENTOS_LIMITE_FILA=2)
+    async def test_cliente_lento_recebe_recarregar(self):
+        canal = eventos.barramento()
+        assinatura = canal.assinar(self.projeto.pk)
+        for indice in range(3):
+            canal.publicar(self.projeto.pk, 'tarefa_atualizada', {'id': indice})
+        await asyncio.sleep(0)
+        stream = eventos.transmitir(assinatura)
+        self.assertEqual(await anext(stream), 'retry: 3000\n\n')
+        self.assertIn('event: recarregar', await anext(stream))
+        await stream.aclose()
+        self.assertEqual(canal.conexoes(), 0)
+
+    def test_sem_assinantes_nao_monta_o_evento(self):
+        dados = mock.Mock(return_value={})
+        with self.captureOnCommitCallbacks(execute=True):
+            eventos.publicar(self.projeto.pk, 'tarefa_criada', dados, com_progresso=True)
+        dados.assert_not_called()
+
+    @override_settings(EVENTOS_RETENCAO=60)
+    def test_barramento_banco(self):
+        canal = eventos.BarramentoBanco()
+        self.assertFalse(canal.interessado(self.projeto.pk))
+
+        canal.renovar([self.projeto.pk], validade=30)
+        self.assertTrue(canal.interessado(self.projeto.pk))
+        EventoProjeto.objects.create(projeto_id=self.projeto.pk, tipo='velho')
+        EventoProjeto.objects.update(data_criacao=timezone.now() - timedelta(minutes=5))
+        InteresseProjeto.objects.create(projeto_id=0, valido_ate=timezone.now() - timedelta(seconds=1))
+
+        # Publicar também apaga os eventos e interesses vencidos
+        canal.publicar(self.projeto.pk, 'tarefa_criada', {'id': 1})
+        self.assertEqual(list(EventoProjeto.objects.values_list('tipo', flat=True)), ['tarefa_criada'])
+        self.assertEqual(list(InteresseProjeto.objects.values_list('projeto_id', flat=True)), [self.projeto.pk])
+
+
+class RetratosTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('dono')
+        self.projeto = criar_projeto(self.user)
+        self.hoje = timezone.localdate()
+
+    def no_dia(self, dias_atras, hora=12):
+        return timezone.make_aware(datetime.combine(self.hoje - timedelta(days=dias_atras), datetime.min.time())) \
+            + timedelta(hours=hora)
+
+    def test_registrar_copia_os_contadores(self):
+        tarefa = Tarefa.objects.create(titulo='a', projeto=self.projeto)
+        registrar_retratos()
+        tarefa.status = 'CONCLUIDA'
+        tarefa.save()
+        registrar_retratos()
+        retrato = RetratoDiario.objects.get()
+        self.assertEqual((retrato.data, retrato.tarefas, retrato.pendentes, retrato.concluidas), (self.hoje, 1, 0, 1))
+        self.assertFalse(retrato.reconstruido)
+
+    def test_reconstroi_os_dias_sem_retrato(self):
+        concluida = Tarefa.objects.create(titulo='a', projeto=self.projeto, status='CONCLUIDA')
+        aberta = Tarefa.objects.create(titulo='b', projeto=self.projeto)
+        Projeto.objects.update(data_criacao=self.no_dia(3))
+        Tarefa.objects.filter(pk=concluida.pk).update(data_criacao=self.no_dia(3), data_conclusao=self.no_dia(1))
+        Tarefa.objects.filter(pk=aberta.pk).update(data_criacao=self.no_dia(2))
+
+        self.assertEqual(atualizar_retratos(desde=self.hoje - timedelta(days=3)), 4)
+        retratos = {
+            retrato.data: (retrato.tarefas, retrato.em_andamento, retrato.concluidas, retrato.reconstruido)
+            for retrato in RetratoDiario.objects.all()
+        }
+        self.assertEqual(retratos, {
+            self.hoje - timedelta(days=3): (1, 1, 0, True),
+            self.hoje - timedelta(days=2): (2, 1, 0, True),
+            self.hoje - timedelta(days=1): (2, 0, 1, True),
+            self.hoje: (2, 0, 1, False),
+        })
+
+        self.client.force_login(self.user)
+        serie = self.client.get(reverse('api_projeto_historico', args=[self.projeto.pk]), {'dias': 7}).json()['dias']
+        self.assertEqual([ponto['vazao'] for ponto in serie], [None, 0, 1, 0])
+        self.assertEqual(serie[-1]['abertas'], 1)
+
+    def test_historico_de_projeto_alheio(self):
+        self.client.force_login(User.objects.create_user('estranho'))
+        resposta = self.client.get(reverse('api_projeto_historico', args=[self.projeto.pk]))
+        self.assertEqual(resposta.status_code, 404)
+
+
+class TransicoesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('dono')
+        self.projeto = criar_projeto(self.user)
+        self.tarefa = Tarefa.objects.create(titulo='a', projeto=self.projeto, responsavel=self.user)
+
+    def transicoes(self):
+        return list(TransicaoTarefa.objects.order_by('pk').values_list('campo', 'valor_anterior', 'valor_novo'))
+
+    def test_gravadas_juntas_no_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.tarefa.status = 'EM_ANDAMENTO'
+                self.tarefa.save()
+                self.tarefa.prioridade = 'ALTA'
+                self.tarefa.responsavel = None
+                self.tarefa.save()
+                self.assertEqual(self.transicoes(), [])
+        self.assertEqual(self.transicoes(), [
+            (TransicaoTarefa.STATUS, 'PENDENTE', 'EM_ANDAMENTO'),
+            (TransicaoTarefa.PRIORIDADE, 'MEDIA', 'ALTA'),
+            (TransicaoTarefa.RESPONSAVEL, str(self.user.pk), ''),
+        ])
+
+    def test_transacao_desfeita_nao_deixa_historico(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.tarefa.status = 'CANCELADA'
+                self.tarefa.save()
+                raise RuntimeError
+        self.assertEqual(self.transicoes(), [])
+
+    def test_alteracao_em_lote(self):
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse('api_tarefa_lote'),
+                json.dumps({'tarefas': [{'id': self.tarefa.pk, 'status': 'CONCLUIDA'}]}),
+                content_type='application/json',
+            )
+        self.assertEqual(self.transicoes(), [(TransicaoTarefa.STATUS, 'PENDENTE', 'CONCLUIDA')])
+
+    def test_tempos_de_ciclo(self):
+        agora = timezone.now()
+        direta = Tarefa.objects.create(titulo='b', projeto=self.projeto)
+        Tarefa.objects.filter(pk=self.tarefa.pk).update(
+            status='CONCLUIDA', data_criacao=agora - timedelta(hours=15), data_conclusao=agora
+        )
+        Tarefa.objects.filter(pk=direta.pk).update(
+            status='CONCLUIDA', data_criacao=agora - timedelta(hours=3), data_conclusao=agora
+        )
+        TransicaoTarefa.objects.create(
+            tarefa=self.tarefa, campo=TransicaoTarefa.STATUS, valor_anterior='PENDENTE',
+            valor_novo='EM_ANDAMENTO', data=agora - timedelta(hours=5),
+        )
+        # Ciclo: 5 h (desde "Em Andamento") e 3 h (sem a transição, desde a criação)
+        self.assertEqual(tempos_de_ciclo([self.projeto.pk]), {
+            self.projeto.pk: {'concluidas': 2, 'ciclo_medio': 4.0, 'lead_medio': 9.0},
+        })
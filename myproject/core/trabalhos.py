@@ -0,0 +1,45 @@
+from .dashboard import invalidar_dashboard, usuarios_com_acesso
+from .exclusao import excluir_em_partes
+from .fila import estender_reserva, trabalho
+from .imagens import gerar_miniaturas as gerar_miniaturas_perfil
+from .models import AcessoProjeto, PerfilUsuario, Projeto
+from .retratos import atualizar_retratos
+
+
+# Trabalhos que podem ser enfileirados com core.fila.enfileirar(). Importado
+# em CoreConfig.ready(), para que o registro exista também no run_workers.
+
+
+@trabalho('excluir_projeto')
+def excluir_projeto(projeto_id):
+    # Renova a reserva a cada lote: uma exclusão longa não volta para a fila
+    excluir_em_partes(projeto_id, progresso=lambda removidas, total: estender_reserva())
+
+
+@trabalho('recalcular_contadores')
+def recalcular_contadores(projeto_ids=None):
+    queryset = Projeto.objects.all()
+    if projeto_ids is not None:
+        queryset = queryset.filter(pk__in=projeto_ids)
+    queryset.recalcular_contadores()
+
+
+@trabalho('reconstruir_acessos')
+def reconstruir_acessos():
+    AcessoProjeto.objects.reconstruir()
+
+
+@trabalho('gerar_miniaturas')
+def gerar_miniaturas(perfil_id):
+    perfil = PerfilUsuario.objects.filter(pk=perfil_id).first()
+    if perfil is None:
+        return
+    gerar_miniaturas_perfil(perfil)
+    # Páginas com a foto (membros do projeto) guardadas pelo ETag
+    projeto_ids = AcessoProjeto.objects.filter(user_id=perfil.user_id).values_list('projeto_id', flat=True)
+    invalidar_dashboard(usuarios_com_acesso(projeto_ids) | {perfil.user_id})
+
+
+@trabalho('registrar_retratos')
+def registrar_retratos():
+    atualizar_retratos()
@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth.views import LogoutView
-from . import views
+from . import api, views, views_async
+
+# Sob ASGI (settings.VIEWS_ASYNC) estas páginas usam as variantes assíncronas
+paginas = views_async if settings.VIEWS_ASYNC else views
 
 urlpatterns = [
     # Autenticação
@@ -9,19 +13,21 @@ urlpatterns = [
     path('registro/', views.RegistroView.as_view(), name='registro'),
     
     # Dashboard
-    path('', views.DashboardView.as_view(), name='dashboard'),
+    path('', paginas.DashboardView.as_view(), name='dashboard'),
     
     # Projetos
     path('projetos/', views.ProjetoListView.as_view(), name='projeto_list'),
-    path('projetos/<int:pk>/', views.ProjetoDetailView.as_view(), name='projeto_detail'),
+    path('projetos/<int:pk>/', paginas.ProjetoDetailView.as_view(), name='projeto_detail'),
+    path('projetos/<int:pk>/eventos/', views_async.ProjetoEventosView.as_view(), name='projeto_eventos'),
     path('projetos/novo/', views.ProjetoCreateView.as_view(), name='projeto_create'),
     path('projetos/<int:pk>/editar/', views.ProjetoUpdateView.as_view(), name='projeto_update'),
     path('projetos/<int:pk>/excluir/', views.ProjetoDeleteView.as_view(), name='projeto_delete'),
     
     # Tarefas
-    path('tarefas/', views.TarefaListView.as_view(), name='tarefa_list'),
+    path('tarefas/', paginas.TarefaListView.as_view(), name='tarefa_list'),
     path('tarefas/<int:pk>/', views.TarefaDetailView.as_view(), name='tarefa_detail'),
     path('tarefas/nova/', views.TarefaCreateView.as_view(), name='tarefa_create'),
+    path('tarefas/exportar/', views.TarefaExportView.as_view(), name='tarefa_export'),
     path('tarefas/<int:pk>/editar/', views.TarefaUpdateView.as_view(), name='tarefa_update'),
     path('tarefas/<int:pk>/excluir/', views.TarefaDeleteView.as_view(), name='tarefa_delete'),
     
@@ -33,4 +39,17 @@ urlpatterns = [
     
     # Perfil
     path('perfil/', views.PerfilUsuarioUpdateView.as_view(), name='perfil_update'),
+    
+    # API JSON
+    path('api/projetos/', api.ProjetoApiListView.as_view(), name='api_projeto_list'),
+    path('api/projetos/<int:pk>/', api.ProjetoApiDetailView.as_view(), name='api_projeto_detail'),
+    path('api/projetos/<int:pk>/historico/', api.ProjetoApiHistoricoView.as_view(), name='api_projeto_historico'),
+    path('api/tarefas/', api.TarefaApiListView.as_view(), name='api_tarefa_list'),
+    path('api/tarefas/lote/', api.TarefaApiLoteView.as_view(), name='api_tarefa_lote'),
+    path('api/tarefas/importar/', api.TarefaApiImportView.as_view(), name='api_tarefa_import'),
+    path('api/tarefas/<int:pk>/', api.TarefaApiDetailView.as_view(), name='api_tarefa_detail'),
+    path('api/categorias/', api.CategoriaApiListView.as_view(), name='api_categoria_list'),
+    path('api/autocomplete/usuarios/', api.UsuarioApiAutocompleteView.as_view(), name='api_autocomplete_usuarios'),
+    path('api/autocomplete/projetos/', api.ProjetoApiAutocompleteView.as_view(), name='api_autocomplete_projetos'),
+    path('api/autocomplete/categorias/', api.CategoriaApiAutocompleteView.as_view(), name='api_autocomplete_categorias'),
 ]
@@ -1,15 +1,25 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
+from django.http import StreamingHttpResponse
+from django.views import View
 from django.views.generic import (
     ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
 )
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from django.db.models import Q, Count
 from django.contrib import messages
+from django.db.models import Count, Max
 from .models import Tarefa, Projeto, Categoria, PerfilUsuario
+from .condicional import RespostaCondicionalMixin
+from .dashboard import obter_estatisticas
+from .exclusao import marcar_para_exclusao
+from .fila import enfileirar
+from .exportacao import FORMATOS, exportar_tarefas
+from .paginacao import PaginacaoCursorMixin
+from .permissoes import DONO, EDICAO, AcessoObjetoMixin
 from .forms import (
     TarefaForm, ProjetoForm, CategoriaForm, 
     CustomUserCreationForm, PerfilUsuarioForm
@@ -44,93 +54,80 @@ class RegistroView(CreateView):
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'core/dashboard.html'
     login_url = 'login'
+    # Sem ler_da_replica: as estatísticas vão para o cache e são calculadas
+    # no banco principal (ver core/dashboard.py)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user = self.request.user
         
-        # Estatísticas gerais
-        context['total_projetos'] = Projeto.objects.filter(
-            Q(responsavel=user) | Q(membros=user)
-        ).distinct().count()
-        
-        context['total_tarefas'] = Tarefa.objects.filter(
-            Q(responsavel=user) | Q(projeto__membros=user)
-        ).distinct().count()
-        
-        context['tarefas_pendentes'] = Tarefa.objects.filter(
-            Q(responsavel=user) | Q(projeto__membros=user),
-            status='PENDENTE'
-        ).distinct().count()
-        
-        context['tarefas_atrasadas'] = Tarefa.objects.filter(
-            Q(responsavel=user) | Q(projeto__membros=user),
-            status__in=['PENDENTE', 'EM_ANDAMENTO'],
-            data_limite__lt=timezone.now().date()
-        ).distinct().count()
-        
-        # Projetos recentes
-        context['projetos_recentes'] = Projeto.objects.filter(
-            Q(responsavel=user) | Q(membros=user)
-        ).distinct().order_by('-data_criacao')[:5]
-        
-        # Tarefas urgentes
-        context['tarefas_urgentes'] = Tarefa.objects.filter(
-            Q(responsavel=user) | Q(projeto__membros=user),
-            prioridade__in=['ALTA', 'URGENTE'],
-            status__in=['PENDENTE', 'EM_ANDAMENTO']
-        ).distinct().order_by('-prioridade', 'data_limite')[:10]
+        # Estatísticas, projetos recentes e tarefas urgentes (com cache por usuário)
+        context.update(obter_estatisticas(self.request.user))
         
         return context
 
 
 # Projetos
-class ProjetoListView(LoginRequiredMixin, ListView):
+class ProjetoListView(LoginRequiredMixin, RespostaCondicionalMixin, PaginacaoCursorMixin, ListView):
     model = Projeto
     template_name = 'core/projeto_list.html'
     context_object_name = 'projetos'
     paginate_by = 10
     login_url = 'login'
+    ler_da_replica = True
     
     def get_queryset(self):
-        queryset = Projeto.objects.filter(
-            Q(responsavel=self.request.user) | Q(membros=self.request.user)
-        ).distinct()
+        queryset = Projeto.objects.visiveis_para(self.request.user).select_related('responsavel')
         
         # Filtro por status
         status = self.request.GET.get('status')
         if status:
             queryset = queryset.filter(status=status)
         
-        # Busca por nome
+        # Busca por nome (índice de texto completo)
         busca = self.request.GET.get('busca')
         if busca:
-            queryset = queryset.filter(
-                Q(nome__icontains=busca) | Q(descricao__icontains=busca)
-            )
+            queryset = queryset.buscar(busca)
         
-        # Ordenação
-        ordem = self.request.GET.get('ordem', '-data_criacao')
-        queryset = queryset.order_by(ordem)
+        # Ordenação (somente as da lista ORDENACOES; com busca e sem ordem
+        # explícita, mais relevantes primeiro)
+        ordem = self.request.GET.get('ordem')
+        if not ordem and busca and 'relevancia' in queryset.query.annotations:
+            queryset = queryset.order_by('-relevancia', '-data_criacao')
+        else:
+            queryset = queryset.ordenar(ordem)
         
         return queryset
     
+    def partes_validador(self):
+        # Contadores e exclusões mudam a versão do usuário (ver condicional.py)
+        return list(self.get_queryset().aggregate(
+            ultima=Max('data_atualizacao'), total=Count('pk')
+        ).values())
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['status_choices'] = Projeto.STATUS_CHOICES
         return context
 
 
-class ProjetoDetailView(LoginRequiredMixin, DetailView):
+class ProjetoDetailView(LoginRequiredMixin, AcessoObjetoMixin, RespostaCondicionalMixin, DetailView):
     model = Projeto
     template_name = 'core/projeto_detail.html'
     context_object_name = 'projeto'
     login_url = 'login'
+    ler_da_replica = True
+    
+    def partes_validador(self):
+        projeto = self.get_object()
+        return [projeto.data_atualizacao, *projeto.tarefas.aggregate(
+            ultima_tarefa=Max('data_atualizacao'),
+            tarefas=Count('pk'),
+        ).values()]
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        projeto = self.get_object()
-        context['tarefas'] = projeto.tarefas.select_related('responsavel').prefetch_related('categorias')
+        context['tarefas'] = list(self.object.tarefas.select_related('responsavel'))
+        context['membros'] = list(self.object.membros.select_related('perfil'))
         return context
 
 
@@ -146,48 +143,47 @@ class ProjetoCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class ProjetoUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class ProjetoUpdateView(LoginRequiredMixin, AcessoObjetoMixin, UpdateView):
     model = Projeto
     form_class = ProjetoForm
     template_name = 'core/projeto_form.html'
     login_url = 'login'
-    
-    def test_func(self):
-        projeto = self.get_object()
-        return self.request.user == projeto.responsavel
+    nivel_exigido = DONO
     
     def form_valid(self, form):
         messages.success(self.request, 'Projeto atualizado com sucesso!')
         return super().form_valid(form)
 
 
-class ProjetoDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class ProjetoDeleteView(LoginRequiredMixin, AcessoObjetoMixin, DeleteView):
     model = Projeto
     template_name = 'core/projeto_confirm_delete.html'
     success_url = reverse_lazy('projeto_list')
     login_url = 'login'
+    nivel_exigido = DONO
     
-    def test_func(self):
-        projeto = self.get_object()
-        return self.request.user == projeto.responsavel
-    
-    def delete(self, request, *args, **kwargs):
-        messages.success(request, 'Projeto excluído com sucesso!')
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        # Some da lista na hora; as tarefas saem em lotes depois (core/exclusao.py)
+        marcar_para_exclusao(self.object)
+        if settings.EXCLUSAO_EM_SEGUNDO_PLANO:
+            enfileirar('excluir_projeto', projeto_id=self.object.pk)
+        messages.success(self.request, 'Projeto excluído com sucesso!')
+        return redirect(self.get_success_url())
 
 
 # Tarefas
-class TarefaListView(LoginRequiredMixin, ListView):
+class TarefaListView(LoginRequiredMixin, RespostaCondicionalMixin, PaginacaoCursorMixin, ListView):
     model = Tarefa
     template_name = 'core/tarefa_list.html'
     context_object_name = 'tarefas'
     paginate_by = 15
     login_url = 'login'
+    ler_da_replica = True
     
     def get_queryset(self):
-        queryset = Tarefa.objects.filter(
-            Q(responsavel=self.request.user) | Q(projeto__membros=self.request.user)
-        ).select_related('projeto', 'responsavel').prefetch_related('categorias').distinct()
+        queryset = Tarefa.objects.visiveis_para(self.request.user).select_related(
+            'projeto', 'responsavel'
+        ).prefetch_related('categorias')
         
         # Filtro por status
         status = self.request.GET.get('status')
@@ -204,34 +200,47 @@ class TarefaListView(LoginRequiredMixin, ListView):
         if projeto_id:
             queryset = queryset.filter(projeto_id=projeto_id)
         
-        # Busca
+        # Busca (índice de texto completo)
         busca = self.request.GET.get('busca')
         if busca:
-            queryset = queryset.filter(
-                Q(titulo__icontains=busca) | Q(descricao__icontains=busca)
-            )
+            queryset = queryset.buscar(busca)
         
-        # Ordenação
-        ordem = self.request.GET.get('ordem', '-data_criacao')
-        queryset = queryset.order_by(ordem)
+        # Ordenação (somente as da lista ORDENACOES; com busca e sem ordem
+        # explícita, mais relevantes primeiro)
+        ordem = self.request.GET.get('ordem')
+        if not ordem and busca and 'relevancia' in queryset.query.annotations:
+            queryset = queryset.order_by('-relevancia', '-data_criacao')
+        else:
+            queryset = queryset.ordenar(ordem)
         
         return queryset
     
+    def partes_validador(self):
+        return list(self.get_queryset().aggregate(
+            ultima=Max('data_atualizacao'),
+            ultimo_projeto=Max('projeto__data_atualizacao'),
+            total=Count('pk'),
+        ).values())
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['status_choices'] = Tarefa.STATUS_CHOICES
         context['prioridade_choices'] = Tarefa.PRIORIDADE_CHOICES
-        context['projetos'] = Projeto.objects.filter(
-            Q(responsavel=self.request.user) | Q(membros=self.request.user)
-        ).distinct()
+        context['projetos'] = Projeto.objects.visiveis_para(self.request.user)
         return context
 
 
-class TarefaDetailView(LoginRequiredMixin, DetailView):
+class TarefaDetailView(LoginRequiredMixin, AcessoObjetoMixin, RespostaCondicionalMixin, DetailView):
     model = Tarefa
     template_name = 'core/tarefa_detail.html'
     context_object_name = 'tarefa'
     login_url = 'login'
+    ler_da_replica = True
+    
+    def partes_validador(self):
+        # O objeto já buscado pelo test_func basta: nenhuma consulta extra
+        tarefa = self.get_object()
+        return [tarefa.data_atualizacao, tarefa.projeto.data_atualizacao, tarefa.responsavel_id]
 
 
 class TarefaCreateView(LoginRequiredMixin, CreateView):
@@ -252,11 +261,12 @@ class TarefaCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class TarefaUpdateView(LoginRequiredMixin, UpdateView):
+class TarefaUpdateView(LoginRequiredMixin, AcessoObjetoMixin, UpdateView):
     model = Tarefa
     form_class = TarefaForm
     template_name = 'core/tarefa_form.html'
     login_url = 'login'
+    nivel_exigido = EDICAO
     
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -268,17 +278,39 @@ class TarefaUpdateView(LoginRequiredMixin, UpdateView):
         return super().form_valid(form)
 
 
-class TarefaDeleteView(LoginRequiredMixin, DeleteView):
+class TarefaDeleteView(LoginRequiredMixin, AcessoObjetoMixin, DeleteView):
     model = Tarefa
     template_name = 'core/tarefa_confirm_delete.html'
     success_url = reverse_lazy('tarefa_list')
     login_url = 'login'
+    nivel_exigido = EDICAO
     
     def delete(self, request, *args, **kwargs):
         messages.success(request, 'Tarefa excluída com sucesso!')
         return super().delete(request, *args, **kwargs)
 
 
+class TarefaExportView(LoginRequiredMixin, View):
+    """Exporta as tarefas visíveis em CSV ou NDJSON, em streaming."""
+    login_url = 'login'
+    
+    def get(self, request, *args, **kwargs):
+        formato = request.GET.get('formato', 'csv')
+        if formato not in FORMATOS:
+            formato = 'csv'
+        
+        queryset = Tarefa.objects.visiveis_para(request.user)
+        projeto_id = request.GET.get('projeto')
+        if projeto_id:
+            queryset = queryset.filter(projeto_id=projeto_id)
+        
+        response = StreamingHttpResponse(
+            exportar_tarefas(queryset, formato), content_type=FORMATOS[formato]
+        )
+        response['Content-Disposition'] = f'attachment; filename="tarefas.{formato}"'
+        return response
+
+
 # Categorias
 class CategoriaListView(LoginRequiredMixin, ListView):
     model = Categoria
@@ -339,7 +371,3 @@ class PerfilUsuarioUpdateView(LoginRequiredMixin, UpdateView):
     def form_valid(self, form):
         messages.success(self.request, 'Perfil atualizado com sucesso!')
         return super().form_valid(form)
-
-
-# Importar timezone para usar no DashboardView
-from django.utils import timezone
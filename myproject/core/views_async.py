@@ -0,0 +1,157 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Exists, OuterRef
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import resolve_url
+from django.views import View
+
+from . import views
+from .dashboard import alistar, aobter_estatisticas
+from .eventos import barramento, transmitir
+from .models import AcessoProjeto, Projeto, Tarefa
+from .permissoes import DONO, NENHUM, AcessoObjetoMixin, nivel_acesso
+
+
+# Variantes assíncronas das páginas mais acessadas, usadas no lugar das de
+# views.py quando settings.VIEWS_ASYNC está ativo (padrão sob ASGI, ver
+# myproject/asgi.py). As consultas independentes de cada página são
+# disparadas juntas com asyncio.gather; o template é o mesmo.
+
+
+class LoginRequiredAsyncMixin:
+    """LoginRequiredMixin para views assíncronas (usa request.auser())."""
+    login_url = 'login'
+
+    async def dispatch(self, request, *args, **kwargs):
+        # O usuário já carregado evita uma nova consulta síncrona no template
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), resolve_url(self.login_url))
+        if isinstance(self, AcessoObjetoMixin):
+            # O test_func (síncrono) reaproveita o objeto já buscado aqui
+            await sync_to_async(self.get_object)()
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class DashboardView(LoginRequiredAsyncMixin, views.DashboardView):
+    def get_context_data(self, **kwargs):
+        # Sem as estatísticas: elas vêm de aobter_estatisticas() em get()
+        return super(views.DashboardView, self).get_context_data(**kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        context.update(await aobter_estatisticas(request.user))
+        return self.render_to_response(context)
+
+
+class TarefaListView(LoginRequiredAsyncMixin, views.TarefaListView):
+    async def paginar(self, queryset):
+        """(paginator, page, objetos, is_paginated) sem a paginação síncrona do ListView."""
+        if self.usar_paginacao_cursor():
+            return await sync_to_async(self.paginate_queryset)(queryset, self.paginate_by)
+
+        numero = self.request.GET.get(self.page_kwarg) or 1
+        paginator = Paginator(queryset, self.paginate_by)
+        try:
+            numero = int(numero)
+        except ValueError:
+            if numero != 'last':
+                raise Http404('Página inválida.')
+            paginator.count = await queryset.acount()
+            numero = paginator.num_pages
+        if numero < 1:
+            raise Http404('Página inválida.')
+
+        # A contagem e os itens da página são independentes
+        inicio = (numero - 1) * self.paginate_by
+        total, objetos = await asyncio.gather(
+            queryset.acount(), alistar(queryset[inicio:inicio + self.paginate_by])
+        )
+        paginator.count = total
+        try:
+            paginator.validate_number(numero)
+        except InvalidPage as erro:
+            raise Http404(str(erro))
+        pagina = Page(objetos, numero, paginator)
+        return paginator, pagina, objetos, paginator.num_pages > 1
+
+    async def get(self, request, *args, **kwargs):
+        resposta = await sync_to_async(self.resposta_condicional)()
+        if resposta is not None:
+            return resposta
+        queryset = self.get_queryset()
+        (paginator, pagina, objetos, paginado), projetos = await asyncio.gather(
+            self.paginar(queryset), alistar(Projeto.objects.visiveis_para(request.user))
+        )
+        self.object_list = objetos
+        context = {
+            'view': self,
+            'paginator': paginator,
+            'page_obj': pagina,
+            'is_paginated': paginado,
+            'object_list': objetos,
+            self.context_object_name: objetos,
+            'pagina_cursor': getattr(self, 'pagina_cursor', None),
+            'status_choices': Tarefa.STATUS_CHOICES,
+            'prioridade_choices': Tarefa.PRIORIDADE_CHOICES,
+            'projetos': projetos,
+        }
+        return self.aplicar_validador(self.render_to_response(context))
+
+
+class ProjetoDetailView(LoginRequiredAsyncMixin, views.ProjetoDetailView):
+    async def get(self, request, *args, **kwargs):
+        resposta = await sync_to_async(self.resposta_condicional)()
+        if resposta is not None:
+            return resposta
+        # Projeto já buscado (e permitido) em dispatch(); tarefas e membros juntos
+        projeto = self.object = self.get_object()
+        tarefas, membros = await asyncio.gather(
+            alistar(Tarefa.objects.filter(projeto_id=projeto.pk).select_related('responsavel')),
+            alistar(User.objects.filter(projetos_membro=projeto.pk).select_related('perfil')),
+        )
+        return self.aplicar_validador(self.render_to_response({
+            'view': self,
+            'object': projeto,
+            self.context_object_name: projeto,
+            'tarefas': tarefas,
+            'membros': membros,
+            'pode_editar': self.acesso >= DONO,
+        }))
+
+
+class ProjetoEventosView(View):
+    """Stream SSE com as alterações nas tarefas do projeto (core/eventos.py).
+
+    Só sob ASGI: no WSGI cada conexão aberta prenderia uma thread, então a
+    resposta é 204, que faz o EventSource do navegador desistir.
+    """
+
+    async def get(self, request, pk):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+
+        projeto = await Projeto.objects.filter(pk=pk).annotate(
+            tem_acesso=Exists(AcessoProjeto.objects.filter(user=user, projeto_id=OuterRef('pk')))
+        ).afirst()
+        if projeto is None or nivel_acesso(projeto, user) == NENHUM:
+            raise Http404('Não encontrado.')
+
+        canal = barramento()
+        if canal.conexoes() >= getattr(settings, 'EVENTOS_MAX_CONEXOES', 1000):
+            return HttpResponse(status=503, headers={'Retry-After': '30'})
+
+        response = StreamingHttpResponse(transmitir(canal.assinar(projeto.pk)), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Proxies (nginx) não devem acumular o stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
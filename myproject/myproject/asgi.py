@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
+# Views assíncronas nas páginas mais acessadas (ver core/views_async.py)
+os.environ.setdefault('VIEWS_ASYNC', '1')
+# Conexões não persistentes (CONN_MAX_AGE = 0), ver settings
+os.environ['SERVIDOR_ASGI'] = '1'
 
 application = get_asgi_application()
@@ -10,11 +10,16 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Rodando pelo "manage.py test"
+TESTANDO = sys.argv[1:2] == ['test']
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -41,6 +46,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primeiro: arquivos estáticos saem sem passar pelo restante da cadeia
+    'core.estaticos.EstaticosMiddleware',
+    'core.instrumentacao.InstrumentacaoMiddleware',
+    # Antes da sessão: gravar a sessão (ex.: login) também conta como escrita
+    'core.roteador.RoteamentoReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,6 +72,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.cache_fragmentos',
             ],
         },
     },
@@ -69,30 +80,200 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'myproject.wsgi.application'
 
+# Dashboard, lista de tarefas e detalhe do projeto em versão assíncrona
+# (core/views_async.py). O myproject/asgi.py liga por padrão; sob WSGI as
+# views síncronas continuam sendo usadas.
+VIEWS_ASYNC = os.environ.get('VIEWS_ASYNC', '0') == '1'
+# Definido pelo myproject/asgi.py antes de carregar o settings
+SERVIDOR_ASGI = os.environ.get('SERVIDOR_ASGI') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-# PostgreSQL Database (OBRIGATÓRIO para o projeto)
-#DATABASES = {
-#    'default': {
-#        'ENGINE': 'django.db.backends.postgresql',
-#        'NAME': 'taskmanager_db',
-#        'USER': 'postgres',
-#        'PASSWORD': 'postgres',  # Altere para sua senha
-#        'HOST': 'localhost',
-#        'PORT': '5432',
-#    }
-#}
-
-# Para desenvolvimento local, você pode usar SQLite temporariamente:
-DATABASES = {
-     'default': {
-         'ENGINE': 'django.db.backends.sqlite3',
-         'NAME': BASE_DIR / 'db.sqlite3',
-     }
+# Perfis de banco, escolhidos pela variável de ambiente BANCO:
+# sqlite (padrão, desenvolvimento) ou postgresql (OBRIGATÓRIO em produção).
+# BANCO_AJUSTES=0 usa a configuração padrão do Django, sem os ajustes de
+# desempenho abaixo (para comparar com o comando benchmark_banco).
+BANCO = os.environ.get('BANCO', 'sqlite')
+BANCO_AJUSTES = os.environ.get('BANCO_AJUSTES', '1') == '1'
+
+BANCOS = {
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Aplicados a cada nova conexão. WAL: leituras não bloqueiam a
+            # escrita (e vice-versa); synchronous=NORMAL é seguro com WAL;
+            # busy_timeout espera pelo lock em vez de falhar com "database is
+            # locked"; mmap (128 MB) e cache (20 MB) reduzem leituras do disco
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA busy_timeout=5000;'
+                'PRAGMA mmap_size=134217728;'
+                'PRAGMA cache_size=-20000;'
+                'PRAGMA temp_store=MEMORY'
+            ),
+            # Transações pegam o lock de escrita já no BEGIN: duas transações
+            # não ficam presas tentando promover uma leitura em escrita
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
+    'postgresql': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'taskmanager_db'),
+        'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'postgres'),  # Altere para sua senha
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        # Conexões persistentes, verificadas antes de serem reaproveitadas
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    },
+}
+
+DATABASES = {'default': BANCOS[BANCO]}
+
+if not BANCO_AJUSTES:
+    DATABASES['default'] = {
+        chave: valor for chave, valor in DATABASES['default'].items()
+        if chave in ('ENGINE', 'NAME', 'USER', 'PASSWORD', 'HOST', 'PORT')
+    }
+elif BANCO == 'postgresql' and os.environ.get('BANCO_POOL') == '1':
+    # Pool de conexões do psycopg 3 (requirements.txt); no lugar das
+    # conexões persistentes, que o Django não permite junto com o pool
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('BANCO_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('BANCO_POOL_MAX', 10)),
+            'timeout': 10,
+        },
+    }
+elif SERVIDOR_ASGI:
+    # Sob ASGI, o Django abre e fecha as conexões em threads diferentes a cada
+    # requisição: as persistentes não seriam reaproveitadas, só acumulariam
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Réplicas de leitura (core/roteador.py): listas e detalhes leem delas;
+# escritas, o dashboard e o restante vão para o principal ("default").
+# - SQLite, para testar localmente: BANCO_REPLICA_SQLITE=1 usa uma cópia do
+#   banco (db_replica.sqlite3, atualizada pelo comando sync_replica);
+# - PostgreSQL: POSTGRES_REPLICAS com os hosts das réplicas, separados por vírgula.
+BANCO_REPLICAS = []
+if BANCO == 'sqlite' and os.environ.get('BANCO_REPLICA_SQLITE') == '1':
+    BANCO_REPLICAS = ['replica']
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': BASE_DIR / 'db_replica.sqlite3'}
+elif BANCO == 'postgresql':
+    for indice, host in enumerate(filter(None, os.environ.get('POSTGRES_REPLICAS', '').split(',')), start=1):
+        BANCO_REPLICAS.append(f'replica{indice}')
+        DATABASES[f'replica{indice}'] = {**DATABASES['default'], 'HOST': host.strip()}
+for alias in BANCO_REPLICAS:
+    # Nos testes, a réplica é o próprio banco de teste principal
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['core.roteador.RoteadorReplicas']
+# Após uma escrita, o usuário lê do principal por este tempo (atraso da réplica)
+BANCO_REPLICA_FIXAR_SEGUNDOS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Cache dos fragmentos de template (linhas de projetos e tarefas).
+# Escolha o backend com a variável de ambiente CACHE_FRAGMENTOS:
+# locmem (padrão), file ou redis (precisa do pacote "redis" e de REDIS_URL).
+CACHES_FRAGMENTOS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragmentos',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'fragmentos',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+# Com vários processos (gunicorn/uvicorn), troque por um backend compartilhado
+# (FileBasedCache, Redis, Memcached) para que a invalidação alcance todos eles.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'taskmanager',
+    },
+    'fragmentos': CACHES_FRAGMENTOS[os.environ.get('CACHE_FRAGMENTOS', 'locmem')],
 }
 
+# Tempo (segundos) dos fragmentos. A chave já muda quando o objeto muda;
+# o tempo só limita por quanto tempo entradas antigas ocupam o cache.
+CACHE_FRAGMENTOS_TIMEOUT = 3600
+
+# Tempo (segundos) que as estatísticas do dashboard ficam em cache
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Máximo de itens por requisição nos endpoints em lote da API
+API_LOTE_MAXIMO = 1000
+
+# Instrumentação por requisição (core/instrumentacao.py)
+INSTRUMENTACAO_CONSULTA_LENTA_MS = 100   # consultas acima disto são registradas com a origem
+INSTRUMENTACAO_LIMITE_DUPLICADAS = 5     # mesma consulta repetida N vezes = possível N+1
+INSTRUMENTACAO_SERVER_TIMING = DEBUG     # o cabeçalho expõe tempos internos; em produção, só se desejado
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.instrumentacao': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'core.exclusao': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'core.fila': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'core.eventos': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+if TESTANDO:
+    # Sem uma linha de log por requisição, trabalho ou exclusão na saída dos testes
+    for logger in LOGGING['loggers'].values():
+        logger['level'] = 'WARNING'
+
+# Exclusão de projetos (core/exclusao.py): tarefas removidas em lotes pela
+# fila de trabalhos; com False, só pelo comando purge_projects
+EXCLUSAO_EM_SEGUNDO_PLANO = True
+EXCLUSAO_TAMANHO_LOTE = 500
+
+# Fila de trabalhos em segundo plano (core/fila.py, comando run_workers)
+FILA_THREADS = 2
+FILA_INTERVALO = 1.0  # segundos entre consultas quando a fila está vazia
+FILA_TIMEOUT_VISIBILIDADE = 300  # segundos até um trabalho reservado voltar à fila
+FILA_MAX_TENTATIVAS = 3
+FILA_ESPERA_BASE = 10  # segundos; dobra a cada nova tentativa
+
+# Eventos ao vivo dos projetos por SSE (core/eventos.py; o stream só é servido sob ASGI).
+# EVENTOS_BARRAMENTO: 'memoria' (no próprio processo) ou 'banco' (tabela
+# EventoProjeto, para eventos gravados por outros processos: WSGI, run_workers)
+EVENTOS_BARRAMENTO = os.environ.get('EVENTOS_BARRAMENTO', 'memoria')
+EVENTOS_LIMITE_FILA = 100          # eventos pendentes por conexão antes de mandar "recarregar"
+EVENTOS_LIMITE_BYTES = 64 * 1024   # idem, em bytes
+EVENTOS_MAX_CONEXOES = 1000        # conexões abertas por processo; acima disso, 503
+EVENTOS_PING = 15                  # segundos entre comentários de keep-alive
+EVENTOS_DURACAO_MAXIMA = 300       # segundos até fechar o stream (o navegador reconecta)
+EVENTOS_INTERVALO = 0.5            # barramento em banco: segundos entre leituras
+EVENTOS_RETENCAO = 300             # barramento em banco: segundos que um evento fica na tabela
+EVENTOS_VALIDADE_INTERESSE = 30    # barramento em banco: segundos que um projeto assinado conta como ouvido
+
+# Linha de base do comando benchmark_views (gerada com --gravar-linha-base)
+BENCHMARK_LINHA_BASE = BASE_DIR / 'benchmark_linha_base.json'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,10 +315,23 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Nomes com hash do conteúdo + variantes .gz/.br geradas no collectstatic
+# (core/estaticos.py). Com DEBUG = False é preciso rodar o collectstatic.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.estaticos.ArmazenamentoComprimido'},
+}
+if TESTANDO:
+    # Os testes rodam com DEBUG = False e sem collectstatic, logo sem manifesto
+    STORAGES['staticfiles'] = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
+
 # Media files (uploads de usuários)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Lados (px) das miniaturas quadradas das fotos de perfil (core/imagens.py)
+MINIATURAS_TAMANHOS = (32, 64, 128)
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
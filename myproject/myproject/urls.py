@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
@@ -5,3 +7,6 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('core.urls')),  
 ]
+
+# Fotos de perfil e miniaturas em desenvolvimento (em produção, pelo servidor web)
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)